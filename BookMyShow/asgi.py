@@ -1,6 +1,9 @@
 """
 ASGI config for BookMyShow project.
 
+Serves the same API as the WSGI application plus the long-lived seat map
+stream (`/api/slots/<slot_id>/seats/stream/`), which needs an ASGI server
+such as uvicorn or daphne.
 """
 
 import os
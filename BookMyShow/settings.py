@@ -15,6 +15,7 @@ from pathlib import Path
 
 import environ
 import os
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -31,7 +32,7 @@ environ.Env.read_env(BASE_DIR / ".env")
 SECRET_KEY = env("SECRET_KEY")
 
 # Debug file loading from .env file
-DEBUG = env("DEBUG")
+DEBUG = env.bool("DEBUG")
 
 ALLOWED_HOSTS = ["*"]
 
@@ -75,6 +76,8 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key", "x-queue-token")
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=20),
     "REFRESH_TOKEN_LIFETIME": timedelta(weeks=1),
@@ -118,6 +121,31 @@ WSGI_APPLICATION = "BookMyShow.wsgi.application"
 DATABASES = {"default": env.db("DATABASE_URL")}
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Seat holds, waiting rooms and revoked tickets live in the cache, so it
+# must be shared (redis / memcached) by the web workers and the hold
+# sweeper. The in-process default is only accepted with DEBUG, see the
+# `slot.E001` deploy check.
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+
+
+# Queue bookings per slot and write them in batches (see apps/slot/group_commit.py).
+# Only requests served concurrently by the same process are grouped, so it
+# needs threaded workers, e.g. `gunicorn --threads 8`: gunicorn's default
+# sync workers serve one request at a time and never form a batch.
+BOOKING_GROUP_COMMIT = env.bool("BOOKING_GROUP_COMMIT", default=False)
+
+# Waiting room of hot slots (see apps/slot/waiting_room.py): visitors
+# admitted per second, and the requests per second to a slot after which
+# it is marked hot automatically.
+WAITING_ROOM_ADMIT_PER_SECOND = env.int("WAITING_ROOM_ADMIT_PER_SECOND", default=10)
+WAITING_ROOM_HOT_REQUESTS_PER_SECOND = env.int(
+    "WAITING_ROOM_HOT_REQUESTS_PER_SECOND", default=200
+)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
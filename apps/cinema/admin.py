@@ -1,10 +1,47 @@
+from django import forms
 from django.contrib import admin
 
-from apps.cinema import models as cinema_models
+from apps.cinema import models as cinema_models, relayout
+
+LAYOUT_FIELDS = ("rows", "seats_per_row")
+
+
+class CinemaForm(forms.ModelForm):
+    """
+    Checks that a layout change does not drop seats booked for upcoming
+    slots before it is saved.
+    """
+
+    class Meta:
+        model = cinema_models.Cinema
+        fields = "__all__"
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if self.instance.pk and set(LAYOUT_FIELDS).intersection(self.changed_data):
+            relayout.plan_layout_change(
+                cinema_models.Cinema.objects.get(pk=self.instance.pk),
+                cleaned_data["rows"],
+                cleaned_data["seats_per_row"],
+            )
+        return cleaned_data
 
 
 class CinemaModelAdmin(admin.ModelAdmin):
-    readonly_fields = ("slug",)
+    form = CinemaForm
+    readonly_fields = ("slug", "seat_id_base")
+
+    def save_model(self, request, obj, form, change):
+        if change and set(LAYOUT_FIELDS).intersection(form.changed_data):
+            # The layout is applied, and saved, by the seat diff
+            rows, seats_per_row = obj.rows, obj.seats_per_row
+            obj.rows = form.initial["rows"]
+            obj.seats_per_row = form.initial["seats_per_row"]
+            super().save_model(request, obj, form, change)
+            relayout.change_layout(obj, rows, seats_per_row)
+            obj.refresh_from_db()
+        else:
+            super().save_model(request, obj, form, change)
 
 
 class CinemaSeatModelAdmin(admin.ModelAdmin):
@@ -8,6 +8,7 @@ class MaxLength:
 
     NAME = 200
     LOCATION = 100
+    TIMEZONE = 64
 
 
 class ErrorMessage:
@@ -34,6 +35,10 @@ class ErrorMessage:
     DATE_PARAM_REQUIRED = "Date query param is required"
     SLOT_NOT_BELONG_CINEMA = "Slot does not belong to this cinema"
     PAST_SLOT_SEATS = "Past Slot seats cannot be checked"
+    LAYOUT_SEATS_BOOKED = (
+        "The new layout drops seats that are booked for upcoming slots."
+    )
+    INVALID_TIMEZONE = "Enter a valid time zone name, e.g. Asia/Kolkata."
 
 
 class HelpText:
@@ -46,6 +51,25 @@ class HelpText:
     )
     AUTO_GENERATE = "This field is automatically generated"
     SLUG = "Slug is an auto generated field"
+    LAYOUT_MODE = (
+        "Compact cinemas validate and render seats from the stored layout "
+        "instead of reading their CinemaSeat rows"
+    )
+    DISABLED_SEATS = "Bitmask of the layout positions that are gaps or disabled"
+    TIMEZONE = "Time zone of the cinema, show dates of its slots are local to it"
+
+
+class LayoutMode(Enum):
+    SEATS = "S"
+    COMPACT = "C"
+
+
+class CinemaSeatConfig:
+    """
+    Tuning for writing CinemaSeat rows
+    """
+
+    BATCH_SIZE = 1000
 
 
 class PurchaseParam(Enum):
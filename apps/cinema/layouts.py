@@ -0,0 +1,197 @@
+"""
+Compact seat layouts.
+
+Every cinema keeps one `CinemaSeat` row per grid position as the target
+of `BookingSeat`. A cinema in compact layout mode also stores its grid
+once, so seats can be validated and rendered without reading those rows:
+
+- `seat_id_base` is the id of row 1 seat 1. The seat at layout position
+  `(row_number - 1) * seats_per_row + (seat_number - 1)` has the id
+  `seat_id_base + position`.
+- `disabled_seats` is a bitmask, least significant bit first, of the
+  positions that are gaps or disabled seats.
+
+Cinemas whose seat ids do not follow their layout stay in seats mode.
+"""
+
+from django.db.models import Count
+
+from apps.cinema import constants as cinema_constants, models as cinema_models
+
+
+class SeatLayout:
+    """
+    Arithmetic mapping between seat ids and `(row_number, seat_number)`
+    of a compact cinema.
+    """
+
+    __slots__ = ("cinema_id", "rows", "seats_per_row", "seat_id_base", "disabled")
+
+    def __init__(self, cinema):
+        self.cinema_id = cinema.id
+        self.rows = cinema.rows
+        self.seats_per_row = cinema.seats_per_row
+        self.seat_id_base = cinema.seat_id_base
+        self.disabled = bytes(cinema.disabled_seats)
+
+    def position(self, seat_id):
+        """
+        Returns the layout position of a seat id, or None when the id is
+        not a bookable seat of this cinema.
+        """
+
+        position = seat_id - self.seat_id_base
+        if not 0 <= position < self.rows * self.seats_per_row or self._is_disabled(
+            position
+        ):
+            return None
+        return position
+
+    def seat(self, seat_id):
+        """
+        Returns an unsaved CinemaSeat carrying the id, row and seat
+        number of a seat id, or None when it is not a bookable seat.
+        """
+
+        position = self.position(seat_id)
+        if position is None:
+            return None
+        return cinema_models.CinemaSeat(
+            id=seat_id,
+            row_number=position // self.seats_per_row + 1,
+            seat_number=position % self.seats_per_row + 1,
+            cinema_id_id=self.cinema_id,
+        )
+
+    def seats(self):
+        """
+        Yields `(id, row_number, seat_number)` of every bookable seat.
+        """
+
+        for position in range(self.rows * self.seats_per_row):
+            if not self._is_disabled(position):
+                yield (
+                    self.seat_id_base + position,
+                    position // self.seats_per_row + 1,
+                    position % self.seats_per_row + 1,
+                )
+
+    def capacity(self):
+        return self.rows * self.seats_per_row - sum(
+            bin(byte).count("1") for byte in self.disabled
+        )
+
+    def _is_disabled(self, position):
+        byte = position >> 3
+        return byte < len(self.disabled) and bool(
+            self.disabled[byte] & (1 << (position & 7))
+        )
+
+
+def get_layout(cinema):
+    """
+    Returns the `SeatLayout` of a compact cinema, None in seats mode.
+    """
+
+    if (
+        cinema.layout_mode != cinema_constants.LayoutMode.COMPACT.value
+        or cinema.seat_id_base is None
+    ):
+        return None
+    return SeatLayout(cinema)
+
+
+def get_seats(cinemas):
+    """
+    Returns `(id, row_number, seat_number)` of the bookable seats of
+    every cinema in row-major order, keyed by cinema id. Only cinemas in
+    seats mode are read from `CinemaSeat`, with a single query.
+    """
+
+    seats = {}
+    seat_mode_ids = []
+    for cinema in cinemas:
+        layout = get_layout(cinema)
+        if layout is None:
+            seat_mode_ids.append(cinema.id)
+            seats[cinema.id] = []
+        else:
+            seats[cinema.id] = list(layout.seats())
+
+    if seat_mode_ids:
+        for cinema_id, *seat in (
+            cinema_models.CinemaSeat.objects.in_layout()
+            .filter(cinema_id__in=seat_mode_ids)
+            .order_by("cinema_id", "row_number", "seat_number")
+            .values_list("cinema_id", "id", "row_number", "seat_number")
+        ):
+            seats[cinema_id].append(tuple(seat))
+    return seats
+
+
+def get_capacities(cinemas):
+    """
+    Returns the number of bookable seats of every cinema keyed by cinema
+    id, counting `CinemaSeat` rows in a single query for seats mode only.
+    """
+
+    capacities = {}
+    seat_mode_ids = []
+    for cinema in cinemas:
+        layout = get_layout(cinema)
+        if layout is None:
+            seat_mode_ids.append(cinema.id)
+            capacities[cinema.id] = 0
+        else:
+            capacities[cinema.id] = layout.capacity()
+
+    if seat_mode_ids:
+        capacities.update(
+            cinema_models.CinemaSeat.objects.in_layout()
+            .filter(cinema_id__in=seat_mode_ids)
+            .values("cinema_id")
+            .annotate(count=Count("id"))
+            .values_list("cinema_id", "count")
+        )
+    return capacities
+
+
+def compact_cinema(cinema, seats=None):
+    """
+    Switches a cinema to the compact layout when its seat ids follow the
+    layout in row-major order. Positions without a CinemaSeat row become
+    disabled, retired seats outside the layout are ignored. Returns
+    whether the cinema was converted.
+    """
+
+    if seats is None:
+        seats = cinema_models.CinemaSeat.objects.filter(cinema_id=cinema.id).only(
+            "id", "row_number", "seat_number"
+        )
+
+    positions = {
+        (seat.row_number - 1) * cinema.seats_per_row + seat.seat_number - 1: seat.id
+        for seat in seats
+        if seat.row_number <= cinema.rows and seat.seat_number <= cinema.seats_per_row
+    }
+    bases = {seat_id - position for position, seat_id in positions.items()}
+    if len(bases) != 1:
+        return False
+    (seat_id_base,) = bases
+    if seat_id_base <= 0:
+        return False
+
+    size = cinema.rows * cinema.seats_per_row
+    disabled = bytearray((size + 7) // 8)
+    for position in set(range(size)).difference(positions):
+        disabled[position >> 3] |= 1 << (position & 7)
+
+    cinema.layout_mode = cinema_constants.LayoutMode.COMPACT.value
+    cinema.seat_id_base = seat_id_base
+    cinema.disabled_seats = bytes(disabled) if any(disabled) else b""
+    cinema_models.Cinema.objects.filter(id=cinema.id).update(
+        layout_mode=cinema.layout_mode,
+        seat_id_base=cinema.seat_id_base,
+        disabled_seats=cinema.disabled_seats,
+    )
+    return True
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from apps.cinema import constants as cinema_constants, layouts, models as cinema_models
+
+
+class Command(BaseCommand):
+    """
+    Converts cinemas in seats mode to the compact layout, skipping those
+    whose seat ids do not follow their layout.
+    """
+
+    help = "Switch existing cinemas to the compact seat layout."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "cinema_ids",
+            nargs="*",
+            type=int,
+            help="Cinemas to convert, every cinema in seats mode by default.",
+        )
+
+    def handle(self, *args, **options):
+        cinemas = cinema_models.Cinema.objects.filter(
+            layout_mode=cinema_constants.LayoutMode.SEATS.value
+        )
+        if options["cinema_ids"]:
+            cinemas = cinemas.filter(id__in=options["cinema_ids"])
+
+        converted = skipped = 0
+        for cinema in cinemas.iterator():
+            if layouts.compact_cinema(cinema):
+                converted += 1
+            else:
+                skipped += 1
+                self.stdout.write(f"Skipped {cinema.slug}: seat ids are not in order")
+
+        self.stdout.write(f"Converted {converted} cinemas, skipped {skipped}")
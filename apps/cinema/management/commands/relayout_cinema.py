@@ -0,0 +1,47 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.cinema import models as cinema_models, relayout
+
+
+class Command(BaseCommand):
+    """
+    Changes the layout of an existing cinema, adding and removing only
+    the seats that differ between the two layouts.
+    """
+
+    help = "Change the rows and seats per row of a cinema."
+
+    def add_arguments(self, parser):
+        parser.add_argument("cinema_id", type=int)
+        parser.add_argument("--rows", type=int, required=True)
+        parser.add_argument("--seats-per-row", type=int, required=True)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report the seats the change touches without applying it.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            cinema = cinema_models.Cinema.objects.get(id=options["cinema_id"])
+        except cinema_models.Cinema.DoesNotExist:
+            raise CommandError(f"Cinema {options['cinema_id']} does not exist")
+
+        apply = (
+            relayout.plan_layout_change
+            if options["dry_run"]
+            else relayout.change_layout
+        )
+        try:
+            change = apply(cinema, options["rows"], options["seats_per_row"])
+        except ValidationError as error:
+            raise CommandError(error.messages[0])
+
+        add, remove = (
+            ("Would add", "remove") if options["dry_run"] else ("Added", "removed")
+        )
+        self.stdout.write(
+            f"{add} {len(change.added)} seats and {remove} {len(change.removed)}, "
+            f"{len(change.retired)} retired seats kept for past bookings"
+        )
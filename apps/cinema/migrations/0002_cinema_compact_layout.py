@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("cinema", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cinema",
+            name="disabled_seats",
+            field=models.BinaryField(
+                blank=True,
+                default=b"",
+                help_text="Bitmask of the layout positions that are gaps or disabled",
+            ),
+        ),
+        migrations.AddField(
+            model_name="cinema",
+            name="layout_mode",
+            field=models.CharField(
+                choices=[("S", "Seats"), ("C", "Compact")],
+                default="S",
+                help_text="Compact cinemas validate and render seats from the stored layout instead of reading their CinemaSeat rows",
+                max_length=1,
+            ),
+        ),
+        migrations.AddField(
+            model_name="cinema",
+            name="seat_id_base",
+            field=models.PositiveBigIntegerField(
+                blank=True, help_text="This field is automatically generated", null=True
+            ),
+        ),
+    ]
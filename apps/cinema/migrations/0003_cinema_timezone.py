@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:31
+
+import apps.cinema.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("cinema", "0002_cinema_compact_layout"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cinema",
+            name="timezone",
+            field=models.CharField(
+                default="Asia/Kolkata",
+                help_text="Time zone of the cinema, show dates of its slots are local to it",
+                max_length=64,
+                validators=[apps.cinema.validators.validate_timezone],
+            ),
+        ),
+    ]
@@ -1,9 +1,13 @@
+import zoneinfo
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models as db_models
 from django.dispatch import receiver
+from django.utils import timezone
 from django.utils.text import slugify
 
-from apps.cinema import constants as cinema_constants
+from apps.cinema import constants as cinema_constants, validators as cinema_validators
 from apps.common import models as common_models
 
 User = get_user_model()
@@ -41,8 +45,21 @@ class Cinema(common_models.TimeStampModel):
         location: The physical location of the cinema.
         slug: A unique identifier, automatically generated from the
             cinema's name and location.
+        layout_mode: Whether seats are read from CinemaSeat rows or from
+            the compact layout, see `apps.cinema.layouts`.
+        seat_id_base: Compact layouts only, the CinemaSeat id of row 1
+            seat 1, the id of every other seat follows arithmetically.
+        disabled_seats: Compact layouts only, the positions without a
+            bookable seat.
+        timezone: The IANA time zone of the cinema, slots are listed by
+            their local show date.
     """
 
+    LAYOUT_MODE_CHOICES = [
+        (cinema_constants.LayoutMode.SEATS.value, "Seats"),
+        (cinema_constants.LayoutMode.COMPACT.value, "Compact"),
+    ]
+
     name = db_models.CharField(max_length=cinema_constants.MaxLength.NAME)
     location = db_models.ForeignKey(Location, on_delete=db_models.CASCADE)
     rows = db_models.PositiveIntegerField()
@@ -50,6 +67,24 @@ class Cinema(common_models.TimeStampModel):
     slug = db_models.SlugField(
         unique=True, blank=True, help_text=cinema_constants.HelpText.SLUG
     )
+    layout_mode = db_models.CharField(
+        max_length=1,
+        choices=LAYOUT_MODE_CHOICES,
+        default=cinema_constants.LayoutMode.SEATS.value,
+        help_text=cinema_constants.HelpText.LAYOUT_MODE,
+    )
+    seat_id_base = db_models.PositiveBigIntegerField(
+        null=True, blank=True, help_text=cinema_constants.HelpText.AUTO_GENERATE
+    )
+    disabled_seats = db_models.BinaryField(
+        default=b"", blank=True, help_text=cinema_constants.HelpText.DISABLED_SEATS
+    )
+    timezone = db_models.CharField(
+        max_length=cinema_constants.MaxLength.TIMEZONE,
+        default=settings.TIME_ZONE,
+        validators=[cinema_validators.validate_timezone],
+        help_text=cinema_constants.HelpText.TIMEZONE,
+    )
 
     class Meta:
         constraints = [
@@ -66,10 +101,38 @@ class Cinema(common_models.TimeStampModel):
         self.clean()
         super().save(*args, **kwargs)
 
+    @property
+    def tzinfo(self):
+        return zoneinfo.ZoneInfo(self.timezone)
+
+    def local_date(self, value):
+        """
+        Returns the date of an aware datetime in the cinema's time zone.
+        """
+
+        return timezone.localtime(value, self.tzinfo).date()
+
     def __str__(self):
         return self.slug
 
 
+class CinemaSeatQuerySet(db_models.QuerySet):
+    """
+    QuerySet of CinemaSeat
+    """
+
+    def in_layout(self):
+        """
+        Leaves out retired seats, kept outside the layout of their cinema
+        for past bookings, see `apps.cinema.relayout`.
+        """
+
+        return self.filter(
+            row_number__lte=db_models.F("cinema_id__rows"),
+            seat_number__lte=db_models.F("cinema_id__seats_per_row"),
+        )
+
+
 class CinemaSeat(db_models.Model):
     """
     Represents a CinemaSeat of the particular cinema.
@@ -79,6 +142,8 @@ class CinemaSeat(db_models.Model):
     seat_number = db_models.PositiveSmallIntegerField()
     cinema_id = db_models.ForeignKey(Cinema, on_delete=db_models.CASCADE)
 
+    objects = CinemaSeatQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.cinema_id.slug} - R{self.row_number} S{self.seat_number}"
 
@@ -88,15 +153,19 @@ def create_seats_after_cinema_save(sender, instance, created, **kwargs):
     if not created:
         return
 
-    seats = []
-
     if not CinemaSeat.objects.filter(cinema_id=instance.id).exists():
-        for row_index in range(1, instance.rows + 1):
-            for seat_num in range(1, instance.seats_per_row + 1):
-                seats.append(
-                    CinemaSeat(
-                        cinema_id=instance, row_number=row_index, seat_number=seat_num
-                    )
+        seats = CinemaSeat.objects.bulk_create(
+            (
+                CinemaSeat(
+                    cinema_id=instance, row_number=row_index, seat_number=seat_num
                 )
+                for row_index in range(1, instance.rows + 1)
+                for seat_num in range(1, instance.seats_per_row + 1)
+            ),
+            batch_size=cinema_constants.CinemaSeatConfig.BATCH_SIZE,
+        )
+
+        if instance.layout_mode == cinema_constants.LayoutMode.COMPACT.value:
+            from apps.cinema import layouts
 
-        CinemaSeat.objects.bulk_create(seats)
+            layouts.compact_cinema(instance, seats)
@@ -0,0 +1,149 @@
+"""
+Layout changes of existing cinemas.
+
+Changing `rows` or `seats_per_row` adds the `CinemaSeat` rows of the
+positions the new layout gains and removes those of the positions it
+loses, in batches of `CinemaSeatConfig.BATCH_SIZE`:
+
+- Seats booked for an upcoming slot block the change, including seats
+  booked while the change is applied.
+- Seats referenced by past bookings are kept as retired rows outside
+  the layout, so the booking history survives. Retired seats are never
+  offered nor accepted, every seat lookup is bounded by the layout.
+"""
+
+from dataclasses import dataclass
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.cinema import (
+    constants as cinema_constants,
+    layouts,
+    models as cinema_models,
+)
+from apps.slot import constants as slot_constants, models as slot_models
+
+
+@dataclass
+class LayoutChange:
+    """
+    Seats touched by a layout change.
+
+    Attributes:
+    -----------
+        added: `(row_number, seat_number)` of the seats to create.
+        removed: Ids of the seats to delete.
+        retired: Ids of the seats left out of the layout but kept for
+            their past bookings.
+    """
+
+    added: list
+    removed: list
+    retired: list
+
+
+def plan_layout_change(cinema, rows, seats_per_row):
+    """
+    Returns the `LayoutChange` turning the cinema's layout into
+    `rows` x `seats_per_row`.
+
+    Raises `ValidationError` when a seat to drop is booked for an
+    upcoming slot.
+    """
+
+    # Retired seats coming back into the layout are reused
+    retired_positions = set(
+        cinema_models.CinemaSeat.objects.filter(cinema_id=cinema.id)
+        .exclude(row_number__lte=cinema.rows, seat_number__lte=cinema.seats_per_row)
+        .values_list("row_number", "seat_number")
+    )
+    added = [
+        (row_number, seat_number)
+        for row_number in range(1, rows + 1)
+        for seat_number in range(1, seats_per_row + 1)
+        if (row_number > cinema.rows or seat_number > cinema.seats_per_row)
+        and (row_number, seat_number) not in retired_positions
+    ]
+    dropped = list(
+        cinema_models.CinemaSeat.objects.filter(
+            cinema_id=cinema.id,
+            row_number__lte=cinema.rows,
+            seat_number__lte=cinema.seats_per_row,
+        )
+        .exclude(row_number__lte=rows, seat_number__lte=seats_per_row)
+        .values_list("id", flat=True)
+    )
+
+    booked = slot_models.BookingSeat.objects.filter(cinema_seat_id__in=dropped)
+    if booked.filter(
+        status=slot_constants.BookingStatus.BOOKED.value,
+        slot__start_time__gte=timezone.now(),
+    ).exists():
+        raise ValidationError(cinema_constants.ErrorMessage.LAYOUT_SEATS_BOOKED)
+
+    retired = set(booked.values_list("cinema_seat_id", flat=True).distinct())
+    return LayoutChange(
+        added=added,
+        removed=[seat_id for seat_id in dropped if seat_id not in retired],
+        retired=sorted(retired),
+    )
+
+
+def change_layout(cinema, rows, seats_per_row):
+    """
+    Applies a layout change in one transaction and returns it.
+
+    Upcoming slots of the cinema get their capacity and seat maps
+    refreshed. A compact cinema stays compact only when its seat ids
+    still follow the new layout.
+    """
+
+    batch_size = cinema_constants.CinemaSeatConfig.BATCH_SIZE
+
+    with transaction.atomic():
+        cinema = cinema_models.Cinema.objects.select_for_update().get(id=cinema.id)
+        change = plan_layout_change(cinema, rows, seats_per_row)
+
+        cinema_models.CinemaSeat.objects.bulk_create(
+            (
+                cinema_models.CinemaSeat(
+                    cinema_id=cinema, row_number=row_number, seat_number=seat_number
+                )
+                for row_number, seat_number in change.added
+            ),
+            batch_size=batch_size,
+        )
+        for start in range(0, len(change.removed), batch_size):
+            removed = change.removed[start : start + batch_size]
+            _, deleted = cinema_models.CinemaSeat.objects.filter(
+                id__in=removed, bookingseat__isnull=True
+            ).delete()
+            # A seat booked since the change was planned is either left
+            # out or deleted along with its booking, both undo the change
+            if deleted != {cinema_models.CinemaSeat._meta.label: len(removed)}:
+                raise ValidationError(cinema_constants.ErrorMessage.LAYOUT_SEATS_BOOKED)
+
+        cinema.rows, cinema.seats_per_row = rows, seats_per_row
+        cinema.save(update_fields=["rows", "seats_per_row", "updated_at"])
+
+        if cinema.layout_mode == cinema_constants.LayoutMode.COMPACT.value and (
+            not layouts.compact_cinema(cinema)
+        ):
+            cinema.layout_mode = cinema_constants.LayoutMode.SEATS.value
+            cinema.seat_id_base = None
+            cinema.disabled_seats = b""
+            cinema.save(update_fields=["layout_mode", "seat_id_base", "disabled_seats"])
+
+        # The version bump has no SeatChange, so cached seat maps of these
+        # slots are rebuilt on their next read in every worker process.
+        slot_models.Slot.objects.filter(
+            cinema_id=cinema.id, start_time__gte=timezone.now()
+        ).update(
+            capacity=layouts.get_capacities([cinema])[cinema.id],
+            seat_version=F("seat_version") + 1,
+        )
+
+    return change
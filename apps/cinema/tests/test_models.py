@@ -1,12 +1,22 @@
 from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
 
 from ddf import G
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
 from django.test import TestCase
 from django.utils import timezone
 
-from apps.cinema import models as cinema_models
+from apps.cinema import (
+    constants as cinema_constants,
+    layouts,
+    models as cinema_models,
+    relayout,
+)
 from apps.movie import models as movie_models
+from apps.slot import bookings, models as slot_models
 
 User = get_user_model()
 
@@ -102,3 +112,167 @@ class CinemaModelsTest(TestCase):
         Testing booking_seat model
         """
         self.assertTrue(self.booking_seat)
+
+
+class CinemaLayoutTests(TestCase):
+    """
+    Testcases for compact cinema layouts
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.location = G(cinema_models.Location, city="delhi")
+
+    def test_compact_cinema_maps_seat_ids_arithmetically(self):
+        """
+        Ensure a compact cinema resolves seats from its layout alone.
+        """
+        cinema = G(
+            cinema_models.Cinema,
+            location=self.location,
+            rows=3,
+            seats_per_row=4,
+            layout_mode=cinema_constants.LayoutMode.COMPACT.value,
+        )
+        seats = list(
+            cinema_models.CinemaSeat.objects.filter(cinema_id=cinema).order_by(
+                "row_number", "seat_number"
+            )
+        )
+        layout = layouts.get_layout(cinema)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                list(layout.seats()),
+                [(seat.id, seat.row_number, seat.seat_number) for seat in seats],
+            )
+            seat = layout.seat(seats[5].id)
+            self.assertEqual((seat.row_number, seat.seat_number), (2, 2))
+            self.assertIsNone(layout.seat(seats[11].id + 1))
+            self.assertEqual(layout.capacity(), 12)
+
+    def test_compact_cinema_layouts_command(self):
+        """
+        Ensure existing cinemas are converted with missing seats disabled.
+        """
+        cinema = G(
+            cinema_models.Cinema, location=self.location, rows=2, seats_per_row=3
+        )
+        self.assertIsNone(layouts.get_layout(cinema))
+        removed = cinema_models.CinemaSeat.objects.get(
+            cinema_id=cinema, row_number=1, seat_number=2
+        )
+        cinema_models.CinemaSeat.objects.filter(id=removed.id).delete()
+
+        call_command("compact_cinema_layouts", stdout=StringIO())
+        cinema.refresh_from_db()
+        layout = layouts.get_layout(cinema)
+        self.assertEqual(layout.capacity(), 5)
+        self.assertIsNone(layout.seat(removed.id))
+        self.assertEqual(layouts.get_capacities([cinema]), {cinema.id: 5})
+
+
+class CinemaRelayoutTests(TestCase):
+    """
+    Testcases for layout changes of existing cinemas
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.location = G(cinema_models.Location, city="delhi")
+        cls.movie = G(
+            movie_models.Movie,
+            duration=timedelta(hours=2),
+            release_date=timezone.now().date() - timedelta(days=10),
+        )
+        cls.user = G(User, email="relayout@gmail.com", phone_number="1234567890")
+
+    def setUp(self):
+        self.cinema = G(
+            cinema_models.Cinema, location=self.location, rows=3, seats_per_row=3
+        )
+        self.slot = G(
+            slot_models.Slot,
+            cinema=self.cinema,
+            movie=self.movie,
+            start_time=timezone.now() + timedelta(days=1),
+            price=100,
+        )
+
+    def seat(self, row_number, seat_number):
+        return cinema_models.CinemaSeat.objects.get(
+            cinema_id=self.cinema, row_number=row_number, seat_number=seat_number
+        )
+
+    def test_change_layout_applies_seat_diff(self):
+        """
+        Ensure only the seats that differ are added and removed, seats of
+        past bookings are retired and reused when the layout grows back.
+        """
+        past_seat = self.seat(3, 1)
+        past_slot = slot_models.Slot.objects.create(
+            cinema=self.cinema,
+            movie=self.movie,
+            start_time=timezone.now() + timedelta(days=2),
+            price=100,
+        )
+        bookings.book_seats(past_slot, self.user, [past_seat.id])
+        slot_models.Slot.objects.filter(id=past_slot.id).update(
+            start_time=timezone.now() - timedelta(days=2)
+        )
+        kept_ids = set(
+            cinema_models.CinemaSeat.objects.filter(
+                cinema_id=self.cinema, row_number__lte=2, seat_number__lte=3
+            ).values_list("id", flat=True)
+        )
+
+        change = relayout.change_layout(self.cinema, 2, 4)
+        self.assertEqual(change.added, [(1, 4), (2, 4)])
+        self.assertEqual(len(change.removed), 2)
+        self.assertEqual(change.retired, [past_seat.id])
+        self.assertTrue(
+            kept_ids < set(self.cinema.cinemaseat_set.values_list("id", flat=True))
+        )
+        self.assertEqual(
+            cinema_models.CinemaSeat.objects.in_layout()
+            .filter(cinema_id=self.cinema)
+            .count(),
+            8,
+        )
+        self.slot.refresh_from_db()
+        self.assertEqual((self.slot.capacity, self.slot.seat_version), (8, 1))
+
+        change = relayout.change_layout(self.cinema, 3, 4)
+        self.assertNotIn((3, 1), change.added)
+        self.assertEqual(self.seat(3, 1).id, past_seat.id)
+
+    def test_change_layout_refuses_upcoming_bookings(self):
+        """
+        Ensure seats booked for an upcoming slot block the change.
+        """
+        bookings.book_seats(self.slot, self.user, [self.seat(3, 3).id])
+
+        with self.assertRaises(ValidationError):
+            relayout.change_layout(self.cinema, 2, 3)
+        self.cinema.refresh_from_db()
+        self.assertEqual(self.cinema.rows, 3)
+
+    def test_change_layout_refuses_seats_booked_meanwhile(self):
+        """
+        Ensure a seat booked after the change was planned is neither
+        deleted with its booking nor dropped from the layout.
+        """
+        seat = self.seat(3, 3)
+        plan_layout_change = relayout.plan_layout_change
+
+        def plan_then_book(*args):
+            change = plan_layout_change(*args)
+            bookings.book_seats(self.slot, self.user, [seat.id])
+            return change
+
+        with mock.patch.object(relayout, "plan_layout_change", plan_then_book):
+            with self.assertRaises(ValidationError):
+                relayout.change_layout(self.cinema, 2, 3)
+        self.assertEqual(self.seat(3, 3).id, seat.id)
+        self.cinema.refresh_from_db()
+        self.assertEqual(self.cinema.rows, 3)
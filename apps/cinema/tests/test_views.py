@@ -2,6 +2,7 @@ from datetime import timedelta
 
 from ddf import G
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
@@ -9,6 +10,7 @@ from rest_framework.test import APITestCase
 
 from apps.cinema import models as cinema_models
 from apps.movie import models as movie_models
+from apps.slot import models as slot_models
 
 User = get_user_model()
 
@@ -181,3 +183,134 @@ class CinemaViewTests(APITestCase):
         else:
             items = response.data
         self.assertEqual(len(items), 0)
+
+
+class ShowtimeRangeTests(APITestCase):
+    """
+    Tests for the date range mode of the showtime listings and the show
+    date calendars
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cinema = G(cinema_models.Cinema, rows=2, seats_per_row=3)
+        cls.movie = G(
+            movie_models.Movie,
+            duration=timedelta(hours=2),
+            release_date=timezone.now().date() - timedelta(days=1),
+        )
+        cls.slot = G(
+            slot_models.Slot,
+            cinema=cls.cinema,
+            movie=cls.movie,
+            start_time=timezone.now() + timedelta(days=2),
+            price=100.00,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cinema_movie_slots_for_a_range_of_dates(self):
+        """
+        Ensure a range of dates is listed grouped by date in one response
+        with a fixed number of queries.
+        """
+        later_slot = G(
+            slot_models.Slot,
+            cinema=self.cinema,
+            movie=self.movie,
+            start_time=self.slot.start_time + timedelta(days=2),
+            price=100.00,
+        )
+        from_date = self.slot.show_date - timedelta(days=1)
+        url = reverse("cinema_movie_slots", args=[self.cinema.id])
+
+        # Cinema, movies, their languages and slots
+        with self.assertNumQueries(4):
+            response = self.client.get(
+                url,
+                {"from": from_date, "to": later_slot.show_date + timedelta(days=1)},
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("max-age=300", response["Cache-Control"])
+        self.assertEqual(len(response.data), 5)
+        days = {day["date"]: day["movies"] for day in response.data}
+        self.assertEqual(days[str(from_date)], [])
+        for slot in (self.slot, later_slot):
+            (movie,) = days[str(slot.show_date)]
+            self.assertEqual(movie["id"], self.movie.id)
+            self.assertEqual([item["id"] for item in movie["slots"]], [slot.id])
+
+    def test_cinema_movie_slots_with_invalid_range(self):
+        """
+        Ensure incomplete, reversed and too long ranges are rejected.
+        """
+        url = reverse("cinema_movie_slots", args=[self.cinema.id])
+        today = timezone.localdate()
+        for params in (
+            {"from": today},
+            {"from": today, "to": today - timedelta(days=1)},
+            {"from": today, "to": today + timedelta(days=14)},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_movie_cinema_slots_for_a_range_of_dates(self):
+        """
+        Ensure the cinemas of a movie are grouped by date too.
+        """
+        url = reverse("movie_cinema_slots", args=[self.movie.id])
+        response = self.client.get(
+            url, {"from": self.slot.show_date, "to": self.slot.show_date}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        (day,) = response.data
+        self.assertEqual(day["date"], str(self.slot.show_date))
+        self.assertEqual([cinema["id"] for cinema in day["cinemas"]], [self.cinema.id])
+
+    def test_show_dates_are_cached_until_a_slot_changes(self):
+        """
+        Ensure show dates come from the cache until a slot of the cinema
+        is saved or deleted.
+        """
+        url = reverse("cinema_show_dates", args=[self.cinema.id])
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.data["dates"], [str(self.slot.show_date)])
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            later_slot = G(
+                slot_models.Slot,
+                cinema=self.cinema,
+                movie=self.movie,
+                start_time=self.slot.start_time + timedelta(days=3),
+                price=100.00,
+            )
+        response = self.client.get(url)
+        self.assertEqual(
+            response.data["dates"],
+            [str(self.slot.show_date), str(later_slot.show_date)],
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.slot.delete()
+        response = self.client.get(url)
+        self.assertEqual(response.data["dates"], [str(later_slot.show_date)])
+
+        response = self.client.get(reverse("cinema_show_dates", args=[0]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_movie_show_dates_of_a_city(self):
+        """
+        Ensure the show dates of a movie can be narrowed to a city.
+        """
+        url = reverse("movie_show_dates", args=[self.movie.id])
+        response = self.client.get(url, {"city": self.cinema.location.city.upper()})
+        self.assertEqual(response.data["dates"], [str(self.slot.show_date)])
+
+        response = self.client.get(url, {"city": "nowhere"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["dates"], [])
@@ -13,4 +13,9 @@ urlpatterns = [
         cinema_views.CinemaMovieSlotView.as_view(),
         name="cinema_movie_slots",
     ),
+    path(
+        "<int:cinema_id>/dates/",
+        cinema_views.CinemaShowDatesView.as_view(),
+        name="cinema_show_dates",
+    ),
 ]
@@ -0,0 +1,14 @@
+import zoneinfo
+
+from django.core.exceptions import ValidationError
+
+from apps.cinema import constants as cinema_constants
+
+
+def validate_timezone(value):
+    """
+    Validate the value is an IANA time zone name such as Asia/Kolkata
+    """
+
+    if value not in zoneinfo.available_timezones():
+        raise ValidationError(cinema_constants.ErrorMessage.INVALID_TIMEZONE)
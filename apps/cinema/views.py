@@ -1,7 +1,4 @@
-from datetime import datetime
-
 from django.db.models import Prefetch
-from django.utils import timezone
 from rest_framework import exceptions, generics
 
 from apps.cinema import (
@@ -18,7 +15,7 @@ from apps.cinema import (
 )
 from apps.common import pagination as common_pagination
 from apps.movie import models as movie_models
-from apps.slot import models as slot_models
+from apps.slot import models as slot_models, showtimes
 
 
 class CinemaView(generics.ListAPIView):
@@ -54,53 +51,47 @@ class LocationView(generics.ListAPIView):
     serializer_class = cinema_serializers.LocationSerializer
 
 
-class CinemaMovieSlotView(generics.ListAPIView):
+class CinemaMovieSlotView(showtimes.ShowtimeListMixin, generics.ListAPIView):
     """
     View for finding all the slots for a specific cinema
     """
 
     serializer_class = cinema_serializers.CinemaMovieSlotSerializer
+    group_key = "movies"
 
     def get_queryset(self):
         """
-        Function which filter the slots of given date.
-        then attach them in their respective cinema data.
+        Function which filter the slots of the given date or dates,
+        then attach them in their respective movie data.
         """
 
         cinema_id = self.kwargs["cinema_id"]
-
-        date = self.request.query_params.get("date")
-
-        if not date:
-            raise exceptions.ValidationError(
-                cinema_constants.ErrorMessage.DATE_PARAM_REQUIRED
-            )
-        else:
-            try:
-                date = datetime.strptime(date, "%Y-%m-%d").date()
-            except ValueError:
-                raise exceptions.ValidationError(
-                    cinema_constants.ErrorMessage.INVALID_DATE_FORMAT
-                )
+        from_date, to_date = self.get_show_dates()
 
         if not cinema_models.Cinema.objects.filter(id=cinema_id).exists():
             raise exceptions.NotFound(cinema_constants.ErrorMessage.CINEMA_NOT_EXIST)
 
-        now = timezone.now()
-
-        if now.date() == date:
-            slots_qs = slot_models.Slot.objects.filter(
-                cinema_id=cinema_id,
-                start_time__date=date,
-                start_time__time__gte=now.time(),
-            )
-        else:
-            slots_qs = slot_models.Slot.objects.filter(
-                cinema_id=cinema_id, start_time__date=date
-            )
+        slots_qs = (
+            slot_models.Slot.objects.filter(cinema_id=cinema_id)
+            .between(from_date, to_date)
+            .order_by("start_time")
+        )
 
         return (
             movie_models.Movie.objects.filter(slot__in=slots_qs)
             .distinct()
-            .prefetch_related(Prefetch("slot_set", queryset=slots_qs, to_attr="slots"))
+            .prefetch_related(
+                "languages",
+                Prefetch("slot_set", queryset=slots_qs, to_attr="slots"),
+            )
         )
+
+
+class CinemaShowDatesView(showtimes.ShowDatesView):
+    """
+    View for the upcoming show dates of a specific cinema
+    """
+
+    model = cinema_models.Cinema
+    lookup_url_kwarg = "cinema_id"
+    not_found_message = cinema_constants.ErrorMessage.CINEMA_NOT_EXIST
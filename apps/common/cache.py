@@ -0,0 +1,80 @@
+import contextlib
+import math
+import secrets
+import time
+
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework import exceptions, status
+
+from apps.common import constants as common_constants
+
+# Deletes the lock only while it still holds the owner's token
+_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class CacheLockTimeout(exceptions.APIException):
+    """
+    Raised when a cache lock could not be acquired in time. Answered with
+    503 and a Retry-After of the lock timeout, by when a stuck holder's
+    lock has expired.
+    """
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = common_constants.ErrorMessage.CACHE_LOCK_TIMEOUT
+    default_code = "cache_lock_timeout"
+
+    def __init__(self, key, wait=None):
+        super().__init__()
+        self.key = key
+        self.wait = wait
+
+
+def is_process_local(cache):
+    """
+    Tells whether `cache` lives in the memory of the current process, so
+    other workers can't see its keys.
+    """
+
+    return isinstance(cache, LocMemCache)
+
+
+def _release(cache, lock_key, token):
+    client = getattr(cache, "_cache", None)
+    if hasattr(client, "get_client"):
+        # Redis: compare and delete in one step
+        key = cache.make_and_validate_key(lock_key)
+        client.get_client(key, write=True).eval(_RELEASE_SCRIPT, 1, key, token)
+    elif cache.get(lock_key) == token:
+        cache.delete(lock_key)
+
+
+@contextlib.contextmanager
+def cache_lock(cache, key, timeout=5, wait=5, interval=0.01):
+    """
+    Mutual exclusion across workers sharing a cache backend.
+
+    Relies on `cache.add` being atomic; the lock expires after `timeout`
+    seconds so a crashed holder cannot block others forever. The lock
+    holds a token of its owner, a holder that outlived `timeout` leaves
+    the lock of the next owner in place.
+    """
+
+    lock_key = f"lock:{key}"
+    # An int is stored as is by the redis backend, unlike a pickled str
+    token = secrets.randbits(63)
+    deadline = time.monotonic() + wait
+
+    while not cache.add(lock_key, token, timeout):
+        if time.monotonic() > deadline:
+            raise CacheLockTimeout(key, wait=math.ceil(timeout))
+        time.sleep(interval)
+
+    try:
+        yield
+    finally:
+        _release(cache, lock_key, token)
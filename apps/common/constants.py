@@ -0,0 +1,26 @@
+class ErrorMessage:
+    """
+    Error messages shared by the apps
+    """
+
+    IDEMPOTENCY_KEY_INVALID = "Idempotency-Key must be 1 to 255 characters long."
+    IDEMPOTENCY_KEY_REUSED = (
+        "This Idempotency-Key was already used with a different request."
+    )
+    IDEMPOTENCY_KEY_IN_PROGRESS = (
+        "A request with this Idempotency-Key is still being processed."
+    )
+    CACHE_LOCK_TIMEOUT = "The service is busy, please retry shortly."
+
+
+class IdempotencyConfig:
+    """
+    Tuning for `Idempotency-Key` handling
+    """
+
+    HEADER = "Idempotency-Key"
+    MAX_KEY_LENGTH = 255
+    # How long the first response is replayed for
+    TTL_SECONDS = 24 * 60 * 60
+    # How long a duplicate waits for the in-flight request
+    WAIT_SECONDS = 30
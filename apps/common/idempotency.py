@@ -0,0 +1,106 @@
+"""
+`Idempotency-Key` support for unsafe API requests.
+
+A client retrying a request sends the same `Idempotency-Key` header. The
+first response is stored in the default cache, keyed by user and key,
+and replayed for every retry within `IdempotencyConfig.TTL_SECONDS`
+without running the view again. A retry arriving while the first request
+is still running waits for it under a cache lock instead of running in
+parallel.
+"""
+
+import functools
+import hashlib
+import json
+
+from django.core.cache import cache
+from rest_framework import exceptions, response, status
+
+from apps.common import cache as common_cache, constants as common_constants
+
+
+class IdempotencyKeyInProgress(exceptions.APIException):
+    """
+    Raised when a duplicate request gave up waiting for the first one.
+    """
+
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = common_constants.ErrorMessage.IDEMPOTENCY_KEY_IN_PROGRESS
+    default_code = "idempotency_key_in_progress"
+
+
+class IdempotencyKeyReused(exceptions.APIException):
+    """
+    Raised when a key is sent again with a different request.
+    """
+
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = common_constants.ErrorMessage.IDEMPOTENCY_KEY_REUSED
+    default_code = "idempotency_key_reused"
+
+
+def _fingerprint(request):
+    payload = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(
+        f"{request.method} {request.path}\n{payload}".encode()
+    ).hexdigest()
+
+
+def idempotent(method):
+    """
+    Makes a viewset action honour the `Idempotency-Key` header.
+
+    Only responses returned by the action are stored. Errors raised as
+    exceptions and 5xx responses are not, a retry runs the action again.
+    """
+
+    config = common_constants.IdempotencyConfig
+
+    @functools.wraps(method)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(config.HEADER)
+        if key is None:
+            return method(view, request, *args, **kwargs)
+
+        if not 0 < len(key) <= config.MAX_KEY_LENGTH:
+            raise exceptions.ValidationError(
+                {config.HEADER: common_constants.ErrorMessage.IDEMPOTENCY_KEY_INVALID}
+            )
+
+        cache_key = f"idempotency:{request.user.pk}:{key}"
+        fingerprint = _fingerprint(request)
+
+        try:
+            with common_cache.cache_lock(
+                cache,
+                cache_key,
+                timeout=config.WAIT_SECONDS,
+                wait=config.WAIT_SECONDS,
+            ):
+                stored = cache.get(cache_key)
+                if stored is None:
+                    result = method(view, request, *args, **kwargs)
+                    if result.status_code < 500:
+                        cache.set(
+                            cache_key,
+                            {
+                                "fingerprint": fingerprint,
+                                "status": result.status_code,
+                                "data": result.data,
+                            },
+                            config.TTL_SECONDS,
+                        )
+                    return result
+        except common_cache.CacheLockTimeout:
+            raise IdempotencyKeyInProgress()
+
+        if stored["fingerprint"] != fingerprint:
+            raise IdempotencyKeyReused()
+
+        return response.Response(
+            stored["data"],
+            status=stored["status"],
+            headers={"Idempotent-Replayed": "true"},
+        )
+
+    return wrapper
@@ -14,4 +14,9 @@ urlpatterns = [
         movie_views.MovieCinemaSlotView.as_view(),
         name="movie_cinema_slots",
     ),
+    path(
+        "<int:movie_id>/dates/",
+        movie_views.MovieShowDatesView.as_view(),
+        name="movie_show_dates",
+    ),
 ]
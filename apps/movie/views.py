@@ -1,5 +1,3 @@
-from datetime import datetime
-
 from django.db.models import Prefetch
 from django.utils import timezone
 from rest_framework import exceptions, generics
@@ -12,7 +10,7 @@ from apps.movie import (
     models as movie_models,
     serializers as movie_serializers,
 )
-from apps.slot import models as slot_models
+from apps.slot import models as slot_models, showtimes
 
 
 class MoviesView(generics.ListAPIView):
@@ -65,53 +63,47 @@ class LanguageView(generics.ListAPIView):
     serializer_class = movie_serializers.LanguageSerializer
 
 
-class MovieCinemaSlotView(generics.ListAPIView):
+class MovieCinemaSlotView(showtimes.ShowtimeListMixin, generics.ListAPIView):
     """
     View for finding all the slots for a specific movie
     """
 
     serializer_class = cinema_serializers.MovieCinemaSlotSerializer
+    group_key = "cinemas"
 
     def get_queryset(self):
         """
-        Function which filter the slots of given date.
+        Function which filter the slots of the given date or dates,
         then attach them in their respective cinema data.
         """
 
         movie_id = self.kwargs["movie_id"]
-
-        date = self.request.query_params.get("date")
-
-        if not date:
-            raise exceptions.ValidationError(
-                movie_constants.ErrorMessage.DATE_PARAM_REQUIRED
-            )
-        else:
-            try:
-                date = datetime.strptime(date, "%Y-%m-%d").date()
-            except ValueError:
-                raise exceptions.ValidationError(
-                    movie_constants.ErrorMessage.INVALID_DATE_FORMAT
-                )
+        from_date, to_date = self.get_show_dates()
 
         if not movie_models.Movie.objects.filter(id=movie_id).exists():
             raise exceptions.NotFound(movie_constants.ErrorMessage.MOVIE_NOT_EXIST)
 
-        now = timezone.now()
-
-        if now.date() == date:
-            slots_qs = slot_models.Slot.objects.filter(
-                movie_id=movie_id,
-                start_time__gte=now,
-                start_time__date=date,
-            )
-        else:
-            slots_qs = slot_models.Slot.objects.filter(
-                movie_id=movie_id, start_time__date=date
-            )
+        slots_qs = (
+            slot_models.Slot.objects.filter(movie_id=movie_id)
+            .between(from_date, to_date)
+            .order_by("start_time")
+        )
 
         return (
             cinema_models.Cinema.objects.filter(slot__in=slots_qs)
             .distinct()
+            .select_related("location")
             .prefetch_related(Prefetch("slot_set", queryset=slots_qs, to_attr="slots"))
         )
+
+
+class MovieShowDatesView(showtimes.ShowDatesView):
+    """
+    View for the upcoming show dates of a specific movie, of a city with
+    `?city=`
+    """
+
+    model = movie_models.Movie
+    lookup_url_kwarg = "movie_id"
+    city_filter = True
+    not_found_message = movie_constants.ErrorMessage.MOVIE_NOT_EXIST
@@ -1,6 +1,7 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.exceptions import ValidationError
 
-from apps.slot import models as slot_models
+from apps.slot import models as slot_models, schedules, waiting_room
 
 
 class BookingAdmin(admin.ModelAdmin):
@@ -13,4 +14,43 @@ class BookingAdmin(admin.ModelAdmin):
 
 admin.site.register(slot_models.Booking, BookingAdmin)
 admin.site.register(slot_models.BookingSeat, BookingAdmin)
-admin.site.register(slot_models.Slot)
+
+
+@admin.register(slot_models.Slot)
+class SlotAdmin(admin.ModelAdmin):
+    list_display = ["__str__", "start_time", "is_hot", "admission_rate"]
+    list_filter = ["is_hot"]
+    actions = ["mark_hot", "clear_hot"]
+
+    @admin.action(description="Send visitors through the waiting room")
+    def mark_hot(self, request, queryset):
+        self.set_hot(queryset, True)
+
+    @admin.action(description="Stop sending visitors through the waiting room")
+    def clear_hot(self, request, queryset):
+        self.set_hot(queryset, False)
+
+    def set_hot(self, queryset, is_hot):
+        # Updated in bulk as `Slot.save` refuses slots in the past
+        queryset.update(is_hot=is_hot)
+        for slot_id, admission_rate in queryset.values_list("id", "admission_rate"):
+            waiting_room.set_slot_state(slot_id, is_hot, admission_rate)
+
+
+@admin.register(slot_models.ScheduleTemplate)
+class ScheduleTemplateAdmin(admin.ModelAdmin):
+    list_display = ["__str__", "start_date", "end_date", "generated_until"]
+    readonly_fields = ["generated_until"]
+    actions = ["generate"]
+
+    @admin.action(description="Generate the slots of the selected templates")
+    def generate(self, request, queryset):
+        for template in queryset.select_related("movie", "cinema"):
+            try:
+                slots = schedules.generate_slots(template)
+            except ValidationError as error:
+                self.message_user(
+                    request, f"{template}: {' '.join(error.messages)}", messages.ERROR
+                )
+            else:
+                self.message_user(request, f"{template}: created {len(slots)} slots")
@@ -0,0 +1,90 @@
+"""
+Best-available seat allocation.
+
+Picks a block of adjacent seats in one row for a party, so clients
+asking for "4 seats together" don't have to download the seat map and
+race other users for the same seats. Rows closer to the ideal row of the
+requested range win, then blocks closer to the middle of the row.
+"""
+
+from django.conf import settings
+
+from apps.slot import (
+    bookings,
+    constants as slot_constants,
+    exceptions as slot_exceptions,
+    group_commit,
+    holds,
+    seat_maps,
+)
+
+
+def find_block(seat_map, party_size, from_row=1, to_row=None, unavailable=()):
+    """
+    Returns the CinemaSeat ids of the best block of `party_size` adjacent
+    available seats between `from_row` and `to_row`, or None.
+    Seats in `unavailable` (e.g. held seats) are skipped.
+    """
+
+    to_row = min(to_row or seat_map.rows, seat_map.rows)
+    if from_row > to_row:
+        return None
+
+    ideal_row = from_row + round(
+        (to_row - from_row) * slot_constants.AllocationConfig.IDEAL_ROW_FRACTION
+    )
+    middle = (seat_map.seats_per_row + 1) / 2
+    best = None
+
+    # Rows ordered by distance to the ideal row, the first distance with
+    # any fitting run decides the row.
+    for distance in range(max(ideal_row - from_row, to_row - ideal_row) + 1):
+        for row_number in {ideal_row - distance, ideal_row + distance}:
+            if not from_row <= row_number <= to_row:
+                continue
+            for seat_number, length in seat_map.free_runs(row_number, unavailable):
+                if length < party_size:
+                    continue
+                # Block of the run whose centre is closest to the middle
+                start = round(middle - (party_size - 1) / 2)
+                start = min(max(start, seat_number), seat_number + length - party_size)
+                offset = abs(start + (party_size - 1) / 2 - middle)
+                if best is None or (offset, row_number) < best[:2]:
+                    best = (offset, row_number, start)
+        if best is not None:
+            break
+
+    if best is None:
+        return None
+
+    _, row_number, start = best
+    first = seat_map.index(row_number, start)
+    return list(seat_map.seat_ids[first : first + party_size])
+
+
+def book_best_available(slot, user, party_size, from_row=1, to_row=None):
+    """
+    Books the best available block through the regular booking path.
+
+    A block booked concurrently by someone else is dropped and the next
+    best block is tried, up to `AllocationConfig.ATTEMPTS` times.
+    Raises `NoContiguousSeats` when no block fits.
+    """
+
+    unavailable = holds.held_seat_ids(slot.id, exclude_user_id=user.id)
+
+    for attempt in range(slot_constants.AllocationConfig.ATTEMPTS):
+        seat_ids = find_block(
+            seat_maps.get_seat_map(slot), party_size, from_row, to_row, unavailable
+        )
+        if seat_ids is None:
+            raise slot_exceptions.NoContiguousSeats()
+
+        try:
+            if settings.BOOKING_GROUP_COMMIT:
+                return group_commit.submit(slot, user, seat_ids)
+            return bookings.book_seats(slot, user, seat_ids)
+        except slot_exceptions.SeatConflict as error:
+            if attempt == slot_constants.AllocationConfig.ATTEMPTS - 1:
+                raise
+            unavailable = unavailable.union(error.detail["seat_ids"])
@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class SlotConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.slot"
+
+    def ready(self):
+        # Connects the seat map, broadcast, waiting room, show date and
+        # showtime grid receivers, and registers the system checks
+        from apps.slot import (  # noqa: F401
+            broadcast,
+            checks,
+            grids,
+            seat_maps,
+            showtimes,
+            waiting_room,
+        )
@@ -0,0 +1,192 @@
+from collections import defaultdict
+from functools import partial
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Value, When
+
+from apps.slot import (
+    constants as slot_constants,
+    exceptions as slot_exceptions,
+    models as slot_models,
+    seat_maps,
+    signals as slot_signals,
+)
+
+
+def is_seat_conflict(error):
+    """
+    Tells whether an `IntegrityError` comes from the one active booking
+    per seat constraint, rather than e.g. a seat deleted meanwhile.
+    """
+
+    diag = getattr(error.__cause__, "diag", None)
+    if diag is not None:
+        # PostgreSQL names the violated constraint
+        return diag.constraint_name == slot_constants.Constraint.UNIQUE_BOOKED_SEAT
+    # SQLite only names the columns of the violated index
+    return str(error) == slot_constants.Constraint.UNIQUE_BOOKED_SEAT_SQLITE_ERROR
+
+
+def book_seats(slot, user, seat_ids):
+    """
+    Books the seats of a slot for a user in one transaction.
+
+    Conflicts are detected by the database on insert and raised as
+    `SeatConflict` listing the seats that are already booked.
+    """
+
+    try:
+        with transaction.atomic():
+            booking = slot_models.Booking.objects.create(
+                user=user,
+                slot=slot,
+                status=slot_constants.BookingStatus.BOOKED.value,
+            )
+            slot_models.BookingSeat.objects.bulk_create(
+                slot_models.BookingSeat(
+                    cinema_seat_id=seat_id, booking=booking, slot=slot
+                )
+                for seat_id in seat_ids
+            )
+            seats_booked(slot.id, seat_ids)
+    except IntegrityError as error:
+        if not is_seat_conflict(error):
+            raise
+        # The client most likely picked these seats from a stale map
+        seat_maps.discard_seat_map(slot.id)
+        raise slot_exceptions.SeatConflict(
+            slot_models.BookingSeat.objects.filter(
+                slot=slot,
+                cinema_seat_id__in=seat_ids,
+                status=slot_constants.BookingStatus.BOOKED.value,
+            ).values_list("cinema_seat_id", flat=True)
+        )
+
+    return booking
+
+
+def book_cart(user, seat_ids_by_slot):
+    """
+    Books seats of several slots for a user in one transaction, all or
+    nothing. `seat_ids_by_slot` maps every Slot to its CinemaSeat ids.
+
+    Costs the same statements whatever the number of slots and seats:
+    one insert per table plus the seat version bump. Raises
+    `CartConflict` listing the seats of every slot that are already booked.
+    """
+
+    slots = list(seat_ids_by_slot)
+
+    try:
+        with transaction.atomic():
+            created = slot_models.Booking.objects.bulk_create(
+                slot_models.Booking(
+                    user=user,
+                    slot=slot,
+                    status=slot_constants.BookingStatus.BOOKED.value,
+                )
+                for slot in slots
+            )
+            slot_models.BookingSeat.objects.bulk_create(
+                slot_models.BookingSeat(
+                    cinema_seat_id=seat_id, booking=booking, slot=booking.slot
+                )
+                for booking in created
+                for seat_id in seat_ids_by_slot[booking.slot]
+            )
+            _record_seats_changed(
+                {slot.id: seat_ids for slot, seat_ids in seat_ids_by_slot.items()},
+                available=False,
+            )
+    except IntegrityError as error:
+        if not is_seat_conflict(error):
+            raise
+        requested = {
+            (slot.id, seat_id)
+            for slot, seat_ids in seat_ids_by_slot.items()
+            for seat_id in seat_ids
+        }
+        conflicts = defaultdict(list)
+        for slot_id, seat_id in slot_models.BookingSeat.objects.filter(
+            slot__in=slots,
+            cinema_seat_id__in={seat_id for _, seat_id in requested},
+            status=slot_constants.BookingStatus.BOOKED.value,
+        ).values_list("slot_id", "cinema_seat_id"):
+            if (slot_id, seat_id) in requested:
+                conflicts[slot_id].append(seat_id)
+                seat_maps.discard_seat_map(slot_id)
+        raise slot_exceptions.CartConflict(conflicts)
+
+    return created
+
+
+def seats_booked(slot_id, seat_ids):
+    """
+    Records booked seats, must run inside the booking's transaction.
+    They are announced once the transaction commits.
+    """
+
+    _record_seats_changed({slot_id: seat_ids}, available=False)
+
+
+def seats_released(slot_id, seat_ids):
+    """
+    Records released seats, must run inside the cancellation's transaction.
+    They are announced once the transaction commits.
+    """
+
+    _record_seats_changed({slot_id: seat_ids}, available=True)
+
+
+def _record_seats_changed(seat_ids_by_slot, available):
+    """
+    Bumps the seat version and booked count of every slot and logs its
+    `SeatChange`, with three queries however many slots changed.
+    """
+
+    seat_ids_by_slot = {
+        slot_id: list(seat_ids) for slot_id, seat_ids in seat_ids_by_slot.items()
+    }
+
+    # Locking the slot rows holds off concurrent bookings of these slots
+    # until commit, so it runs last. Rows are locked in id order to keep
+    # multi-slot bookings from deadlocking each other.
+    versions = {
+        slot_id: version + 1
+        for slot_id, version in slot_models.Slot.objects.select_for_update()
+        .filter(id__in=seat_ids_by_slot)
+        .order_by("id")
+        .values_list("id", "seat_version")
+    }
+    sign = -1 if available else 1
+    slot_models.Slot.objects.filter(id__in=seat_ids_by_slot).update(
+        seat_version=F("seat_version") + 1,
+        booked_count=F("booked_count")
+        + Case(
+            *(
+                When(id=slot_id, then=Value(sign * len(seat_ids)))
+                for slot_id, seat_ids in seat_ids_by_slot.items()
+            )
+        ),
+    )
+    slot_models.SeatChange.objects.bulk_create(
+        slot_models.SeatChange(
+            slot_id=slot_id,
+            version=versions[slot_id],
+            seat_ids=seat_ids,
+            available=available,
+        )
+        for slot_id, seat_ids in seat_ids_by_slot.items()
+    )
+
+    for slot_id, seat_ids in seat_ids_by_slot.items():
+        transaction.on_commit(
+            partial(
+                slot_signals.seats_changed.send,
+                sender=slot_models.Booking,
+                slot_id=slot_id,
+                seat_ids=seat_ids,
+                available=available,
+                version=versions[slot_id],
+            )
+        )
@@ -0,0 +1,121 @@
+"""
+In-process broadcast of seat map changes.
+
+Viewers streaming a slot's seat map subscribe here and receive a small
+delta every time seats of that slot are booked, cancelled, held or
+released, instead of polling the full map. Subscriptions live in the
+worker process that serves the stream, so a viewer only sees changes
+committed by the same process; bookings from other workers reach it
+through the periodic snapshot refresh of the stream.
+"""
+
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.dispatch import receiver
+
+from apps.slot import (
+    constants as slot_constants,
+    models as slot_models,
+    signals as slot_signals,
+)
+
+
+class Subscription:
+    """
+    A viewer's queue of pending seat changes, bound to the event loop
+    that serves its stream.
+    """
+
+    def __init__(self, slot_id):
+        self.slot_id = slot_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(
+            maxsize=slot_constants.SeatMapStreamConfig.QUEUE_SIZE
+        )
+        self.overflowed = False
+
+    def push(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A slow viewer gets a fresh snapshot instead of every delta
+            self.overflowed = True
+
+    def reset(self):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.overflowed = False
+
+    async def get(self):
+        return await self.queue.get()
+
+
+_subscriptions = defaultdict(set)
+_lock = threading.Lock()
+
+
+def subscribe(slot_id):
+    subscription = Subscription(slot_id)
+    with _lock:
+        _subscriptions[slot_id].add(subscription)
+    return subscription
+
+
+def unsubscribe(subscription):
+    with _lock:
+        subscriptions = _subscriptions.get(subscription.slot_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del _subscriptions[subscription.slot_id]
+
+
+def has_subscribers(slot_id):
+    return slot_id in _subscriptions
+
+
+def publish(slot_id, seat_ids, available):
+    """
+    Delivers a seat change to every viewer of the slot.
+    Safe to call from any thread.
+    """
+
+    event = {"seat_ids": sorted(seat_ids), "available": available}
+
+    with _lock:
+        subscriptions = list(_subscriptions.get(slot_id, ()))
+
+    for subscription in subscriptions:
+        try:
+            subscription.loop.call_soon_threadsafe(subscription.push, event)
+        except RuntimeError:
+            # The stream's event loop is gone
+            unsubscribe(subscription)
+
+
+@receiver(slot_signals.seats_changed)
+def publish_seats_changed(sender, slot_id, seat_ids, available, **kwargs):
+    if has_subscribers(slot_id):
+        publish(slot_id, seat_ids, available)
+
+
+@receiver(slot_signals.seat_holds_changed)
+def publish_seat_holds_changed(sender, slot_id, seat_ids, held, **kwargs):
+    if not has_subscribers(slot_id):
+        return
+
+    if not held:
+        # Seats of a confirmed hold stay unavailable
+        booked_seat_ids = set(
+            slot_models.BookingSeat.objects.filter(
+                slot_id=slot_id,
+                cinema_seat_id__in=seat_ids,
+                status=slot_constants.BookingStatus.BOOKED.value,
+            ).values_list("cinema_seat_id", flat=True)
+        )
+        seat_ids = [seat_id for seat_id in seat_ids if seat_id not in booked_seat_ids]
+
+    if seat_ids:
+        publish(slot_id, seat_ids, available=not held)
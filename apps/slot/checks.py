@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core import checks
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+
+from apps.common import cache as common_cache
+from apps.slot import constants as slot_constants
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Seat holds, waiting rooms and revoked tickets must be seen by every
+    web worker and by the hold sweeper.
+    """
+
+    if settings.DEBUG or not common_cache.is_process_local(caches[DEFAULT_CACHE_ALIAS]):
+        return []
+    return [
+        checks.Error(
+            slot_constants.ErrorMessage.SHARED_CACHE_REQUIRED,
+            hint="Set CACHE_URL to a shared cache, e.g. redis://host:6379/0.",
+            id="slot.E001",
+        )
+    ]
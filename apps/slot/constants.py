@@ -6,7 +6,9 @@ class ErrorMessage:
     Error messages for cinema serializers
     """
 
-    INVALID_SEAT = "One or more seat IDs do not exist or does not belong to this cinema."
+    INVALID_SEAT = (
+        "One or more seat IDs do not exist or does not belong to this cinema."
+    )
     BOOKED_SEAT = "One or more seats are already booked."
     BOOKING_NOT_EXIST = "This booking or booking with this user does not exist."
     BOOKING_CANCEL = "This booking is already cancelled."
@@ -18,11 +20,34 @@ class ErrorMessage:
     )
     INVALID_SLOT_DATE = "Cannot schedule a slot for an unreleased movie."
     INVALID_DATE_FORMAT = "Invalid date format (YYYY-MM-DD)."
+    INVALID_DATE_RANGE = "Send from and to dates, at most 14 days apart."
+    CITY_PARAM_REQUIRED = "City query param is required"
     PAST_BOOKING = "Past bookings cannot be cancelled"
     PAST_BOOKING_BOOKED = "Past slots cannot be booked"
     DATE_PARAM_REQUIRED = "Date query param is required"
     SLOT_NOT_BELONG_CINEMA = "Slot does not belong to this cinema"
     PAST_SLOT_SEATS = "Past Slot seats cannot be checked"
+    INVALID_SEAT_VERSION = "Invalid seat map version."
+    NO_CONTIGUOUS_SEATS = "Not enough adjacent seats are available together."
+    QUEUE_REQUIRED = "This slot is in high demand, join the queue to continue."
+    INVALID_QUEUE_TOKEN = "Invalid or expired queue token."
+    DUPLICATE_CART_SLOT = "Each slot can only appear once in the cart."
+    INVALID_TICKET = "Invalid ticket."
+    REVOKED_TICKET = "This ticket belongs to a cancelled booking."
+    INVALID_ROW_RANGE = "from_row must not be greater than to_row."
+    INVALID_ROWS_PARAM = "rows must be a range such as 10-20 within the cinema."
+    HOLD_NOT_FOUND = "This hold does not exist or has expired."
+    MOVIE_NOT_EXIST = "Movie with this id doesn't exist."
+    INVALID_SCHEDULE_FILE = "Send a CSV file, or a JSON list of slots."
+    INVALID_SLOT_IDS = "Send up to 100 comma separated slot ids."
+    INVALID_WEEKDAYS = "Weekdays must be a list of days from 0 (Monday) to 6 (Sunday)."
+    INVALID_TIMES = "Times must be a list of start times in format HH:MM."
+    INVALID_TEMPLATE_DATES = "The end date must not be before the start date."
+    TEMPLATE_OVERLAPS = "Slots of this template overlap other slots at: {}"
+    SHARED_CACHE_REQUIRED = (
+        "The default cache is local to each process, seat holds, waiting rooms "
+        "and revoked tickets are not shared between workers."
+    )
 
 
 class HelpText:
@@ -34,6 +59,179 @@ class HelpText:
         "Enter slot's start date in format YYYY-MM-DD and start time in format HH:MM:SS"
     )
     AUTO_GENERATE = "This field is automatically generated"
+    WEEKDAYS = (
+        "Days of the week to repeat on, e.g. [0, 2, 4] for Monday, Wednesday and Friday"
+    )
+    TIMES = 'Start times of every day in format HH:MM, e.g. ["10:00", "13:30"]'
+    IS_HOT = "Send visitors of this slot through the waiting room"
+    ADMISSION_RATE = (
+        "Visitors admitted from the waiting room per second, "
+        "defaults to WAITING_ROOM_ADMIT_PER_SECOND"
+    )
+
+
+class Constraint:
+    """
+    Names of the database constraints
+    """
+
+    UNIQUE_BOOKED_SEAT = "unique_booked_slot_seat"
+    # SQLite reports the violated index by its columns only
+    UNIQUE_BOOKED_SEAT_SQLITE_ERROR = (
+        "UNIQUE constraint failed: slot_bookingseat.slot_id, "
+        "slot_bookingseat.cinema_seat_id"
+    )
+    UNIQUE_SEAT_CHANGE_VERSION = "unique_slot_seat_change_version"
+    NO_OVERLAPPING_SLOTS = "slot_no_overlapping_slots"
+    UNIQUE_SHOWTIME_GRID = "unique_showtime_grid_city_date"
+
+
+class Index:
+    """
+    Names of the database indexes
+    """
+
+    SLOT_CINEMA_TIME = "slot_cinema_time_idx"
+    SLOT_CINEMA_SHOW_DATE = "slot_cinema_show_date_idx"
+    SLOT_MOVIE_SHOW_DATE = "slot_movie_show_date_idx"
+
+
+class SeatMapConfig:
+    """
+    Tuning for the in-memory seat maps
+    """
+
+    # Maps further behind the slot's seat version are rebuilt instead of
+    # replaying the seat changes, the same bound applies to `since=`.
+    MAX_CATCH_UP_VERSIONS = 200
+    # Maps kept per process, the least recently used are dropped first
+    MAX_SEAT_MAPS = 500
+    # Rows per section of the seat map summaries
+    SECTION_ROWS = 10
+    COMPACT_FORMAT = "compact"
+    COMPACT_MEDIA_TYPE = "application/vnd.bookmyshow.seat-map+json"
+
+
+class SeatMapStreamConfig:
+    """
+    Tuning for the seat map event stream
+    """
+
+    QUEUE_SIZE = 100
+    KEEP_ALIVE_SECONDS = 15
+    # Re-sends the full map to pick up changes made by other workers
+    SNAPSHOT_SECONDS = 60
+
+
+class SeatHoldConfig:
+    """
+    Limits of the temporary seat holds
+    """
+
+    DEFAULT_MINUTES = 5
+    MAX_MINUTES = 15
+    # Hold changes remembered per slot for `since=` seat map requests
+    LOG_SIZE = 100
+
+
+class GroupCommitConfig:
+    """
+    Tuning for the per-slot booking queue
+    """
+
+    BATCH_SIZE = 50
+
+
+class AllocationConfig:
+    """
+    Tuning for the best-available seat allocation
+    """
+
+    MAX_PARTY_SIZE = 10
+    # Where the ideal row sits between the first and the last row
+    IDEAL_ROW_FRACTION = 2 / 3
+    # Blocks tried before giving up when others book them first
+    ATTEMPTS = 3
+
+
+class WaitingRoomConfig:
+    """
+    Tuning for the waiting room of hot slots
+    """
+
+    TOKEN_HEADER = "X-Queue-Token"
+    TOKEN_PARAM = "queue_token"
+    TOKEN_SALT = "slot.waiting_room"
+    # Queue tokens older than this are rejected
+    TOKEN_MAX_AGE_SECONDS = 6 * 60 * 60
+    # How long an admitted visitor may keep using the slot's endpoints
+    ADMISSION_SECONDS = 15 * 60
+    # How long a slot stays hot after crossing the request rate threshold
+    AUTO_HOT_SECONDS = 5 * 60
+    QUEUE_TIMEOUT = 24 * 60 * 60
+
+
+class CheckoutConfig:
+    """
+    Limits of the multi-slot checkout
+    """
+
+    MAX_SLOTS = 10
+
+
+class ShowtimeConfig:
+    """
+    Tuning of the showtime listings of movies and cinemas
+    """
+
+    MAX_DAYS = 14
+    # Listings may be served from shared caches for this long
+    CACHE_SECONDS = 5 * 60
+
+
+class ScheduleConfig:
+    """
+    Limits of the bulk schedule import and the slot generation of
+    schedule templates
+    """
+
+    MAX_ROWS = 20000
+    BATCH_SIZE = 1000
+
+
+class AvailabilitySummaryConfig:
+    """
+    Limits of the batch seat availability summary
+    """
+
+    MAX_SLOTS = 100
+
+
+class TicketConfig:
+    """
+    Tuning for the signed e-tickets
+    """
+
+    SALT = "slot.tickets"
+    # Truncated HMAC-SHA256, 128 bits
+    MAC_BYTES = 16
+    # How long a process trusts its copy of a slot's revoked bookings
+    REVOCATION_REFRESH_SECONDS = 5
+
+
+class OccupancyConfig:
+    """
+    Thresholds of the slot availability badges
+    """
+
+    FAST_FILLING_RATIO = 0.8
+    RECONCILE_BATCH_SIZE = 500
+
+
+class Availability(Enum):
+    AVAILABLE = "available"
+    FAST_FILLING = "fast_filling"
+    SOLD_OUT = "sold_out"
 
 
 class PurchaseParam(Enum):
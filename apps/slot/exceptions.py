@@ -0,0 +1,47 @@
+from rest_framework import exceptions, status
+
+from apps.slot import constants as slot_constants
+
+
+class SeatConflict(exceptions.APIException):
+    """
+    Raised when one or more requested seats already have an active booking.
+    The response lists the conflicting CinemaSeat ids so the client can
+    drop just those seats.
+    """
+
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = slot_constants.ErrorMessage.BOOKED_SEAT
+    default_code = "seat_conflict"
+
+    def __init__(self, seat_ids):
+        self.detail = {
+            "detail": exceptions.ErrorDetail(self.default_detail, self.default_code),
+            "seat_ids": sorted(seat_ids),
+        }
+
+
+class NoContiguousSeats(exceptions.APIException):
+    """
+    Raised when no block of adjacent available seats fits the party.
+    """
+
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = slot_constants.ErrorMessage.NO_CONTIGUOUS_SEATS
+    default_code = "no_contiguous_seats"
+
+
+class CartConflict(SeatConflict):
+    """
+    Raised when seats of a multi-slot checkout are already booked or held.
+    The response lists the conflicting CinemaSeat ids of every slot.
+    """
+
+    def __init__(self, seat_ids_by_slot):
+        self.detail = {
+            "detail": exceptions.ErrorDetail(self.default_detail, self.default_code),
+            "slots": [
+                {"slot_id": slot_id, "seat_ids": sorted(seat_ids)}
+                for slot_id, seat_ids in sorted(seat_ids_by_slot.items())
+            ],
+        }
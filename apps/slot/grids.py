@@ -0,0 +1,240 @@
+"""
+City-wide showtime grids.
+
+The home page of a city lists every movie, cinema and slot of a date.
+Instead of joining `Slot`, `Cinema` and `Location` per movie on every
+request, the grid of each `(city, show_date)` is stored as one
+`ShowtimeGrid` document:
+
+- Saving or deleting a slot rebuilds the grids of its city and show
+  date, before and after the change, once the transaction commits.
+- Slots created in bulk are refreshed by their creators through
+  `refresh_cinema_grids`.
+- The `rebuild_showtime_grids` command rebuilds every grid, for example
+  after renaming a movie or moving a cinema.
+
+Grids only describe the showtimes. Seat counts change with every
+booking and are served by the availability summary instead.
+"""
+
+import threading
+import weakref
+from collections import defaultdict
+from functools import partial
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.duration import duration_string
+
+from apps.cinema import models as cinema_models
+from apps.slot import models as slot_models
+
+
+def build_documents(city, slots):
+    """
+    Returns the grid document of every show date of `slots`, keyed by
+    date. `slots` come with their movie and cinema, ordered by show date,
+    movie name, cinema name and start time.
+    """
+
+    documents = {}
+    for show_date, day_slots in groupby(slots, key=lambda slot: slot.show_date):
+        movies = []
+        for movie, movie_slots in groupby(day_slots, key=lambda slot: slot.movie):
+            cinemas = []
+            for cinema, cinema_slots in groupby(
+                movie_slots, key=lambda slot: slot.cinema
+            ):
+                cinemas.append(
+                    {
+                        "id": cinema.id,
+                        "name": cinema.name,
+                        "slug": cinema.slug,
+                        "slots": [
+                            {
+                                "id": slot.id,
+                                "start_time": timezone.localtime(
+                                    slot.start_time, cinema.tzinfo
+                                ).isoformat(),
+                                "end_time": timezone.localtime(
+                                    slot.end_time, cinema.tzinfo
+                                ).isoformat(),
+                                "price": str(slot.price),
+                            }
+                            for slot in cinema_slots
+                        ],
+                    }
+                )
+            movies.append(
+                {
+                    "id": movie.id,
+                    "name": movie.name,
+                    "slug": movie.slug,
+                    "duration": duration_string(movie.duration),
+                    "cinemas": cinemas,
+                }
+            )
+        documents[show_date] = {
+            "city": city,
+            "date": show_date.isoformat(),
+            "movies": movies,
+        }
+    return documents
+
+
+def rebuild_grids(city, show_dates=None, from_date=None, to_date=None):
+    """
+    Rebuilds the grids of a city, for the given show dates or the dates
+    from `from_date` to `to_date`, with one slots query. Grids of dates
+    left without slots are deleted. Returns the number of grids stored.
+
+    Grids are upserted on their `(city, show_date)` key, so concurrent
+    rebuilds of the same dates don't collide on insert.
+    """
+
+    slots = slot_models.Slot.objects.filter(cinema__location__city=city)
+    grids = slot_models.ShowtimeGrid.objects.filter(city=city)
+    if show_dates is not None:
+        slots = slots.filter(show_date__in=show_dates)
+        grids = grids.filter(show_date__in=show_dates)
+    else:
+        if from_date is not None:
+            slots = slots.filter(show_date__gte=from_date)
+            grids = grids.filter(show_date__gte=from_date)
+        if to_date is not None:
+            slots = slots.filter(show_date__lte=to_date)
+            grids = grids.filter(show_date__lte=to_date)
+
+    documents = build_documents(
+        city,
+        slots.select_related("movie", "cinema")
+        .only(
+            "id",
+            "show_date",
+            "start_time",
+            "end_time",
+            "price",
+            "movie__id",
+            "movie__name",
+            "movie__slug",
+            "movie__duration",
+            "cinema__id",
+            "cinema__name",
+            "cinema__slug",
+            "cinema__timezone",
+        )
+        .order_by(
+            "show_date",
+            "movie__name",
+            "movie_id",
+            "cinema__name",
+            "cinema_id",
+            "start_time",
+        ),
+    )
+
+    with transaction.atomic():
+        grids.exclude(show_date__in=documents).delete()
+        slot_models.ShowtimeGrid.objects.bulk_create(
+            (
+                slot_models.ShowtimeGrid(
+                    city=city, show_date=show_date, document=document
+                )
+                for show_date, document in documents.items()
+            ),
+            update_conflicts=True,
+            unique_fields=["city", "show_date"],
+            update_fields=["document", "updated_at"],
+        )
+    return len(documents)
+
+
+def refresh_cinema_grids(keys):
+    """
+    Rebuilds the grids of `(cinema_id, show_date)` pairs, one rebuild
+    per city.
+    """
+
+    keys = set(keys)
+    cities = dict(
+        cinema_models.Cinema.objects.filter(
+            id__in={cinema_id for cinema_id, _ in keys}
+        ).values_list("id", "location__city")
+    )
+    show_dates = defaultdict(set)
+    for cinema_id, show_date in keys:
+        if cinema_id in cities:
+            show_dates[cities[cinema_id]].add(show_date)
+    for city, dates in show_dates.items():
+        rebuild_grids(city, show_dates=dates)
+
+
+# The refresh of deleted slots pending in the transaction of each thread
+_pending = threading.local()
+
+
+def refresh_deleted_grids(deleted):
+    """
+    Rebuilds the grids left by deleted slots, given as
+    `{cinema_id: (city, show_dates)}`, one rebuild per city.
+    """
+
+    # The transaction is over, later deletions register a new refresh
+    _pending.refresh = None
+    show_dates = defaultdict(set)
+    for city, dates in deleted.values():
+        if city is not None:
+            show_dates[city] |= dates
+    for city, dates in show_dates.items():
+        rebuild_grids(city, show_dates=dates)
+
+
+@receiver(pre_save, sender=slot_models.Slot)
+def remember_grid(sender, instance, **kwargs):
+    # The grid the slot leaves when its cinema or start time changes
+    instance._previous_grid = (
+        slot_models.Slot.objects.filter(id=instance.id)
+        .values_list("cinema_id", "show_date")
+        .first()
+        if instance.id
+        else None
+    )
+
+
+@receiver(post_save, sender=slot_models.Slot)
+def refresh_slot_grids(sender, instance, **kwargs):
+    keys = {(instance.cinema_id, instance.show_date)}
+    if getattr(instance, "_previous_grid", None):
+        keys.add(instance._previous_grid)
+    transaction.on_commit(partial(refresh_cinema_grids, keys))
+
+
+@receiver(pre_delete, sender=slot_models.Slot)
+def refresh_deleted_slot_grid(sender, instance, **kwargs):
+    # Slots deleted in one transaction, e.g. along with their cinema,
+    # share one refresh registered by the first of them. It is only
+    # weakly referenced: Django drops the callbacks of a rolled back
+    # transaction, the next deletion then registers a new refresh.
+    refresh = getattr(_pending, "refresh", None)
+    refresh = refresh and refresh()
+    registered = refresh is not None
+    if not registered:
+        refresh = partial(refresh_deleted_grids, {})
+    deleted = refresh.args[0]
+
+    if instance.cinema_id not in deleted:
+        # Looked up now, the cinema may be deleted along with the slot
+        city = (
+            cinema_models.Cinema.objects.filter(id=instance.cinema_id)
+            .values_list("location__city", flat=True)
+            .first()
+        )
+        deleted[instance.cinema_id] = (city, set())
+    deleted[instance.cinema_id][1].add(instance.show_date)
+
+    if not registered:
+        _pending.refresh = weakref.ref(refresh)
+        transaction.on_commit(refresh)
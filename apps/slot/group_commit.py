@@ -0,0 +1,196 @@
+"""
+Group commit of bookings per slot.
+
+When `BOOKING_GROUP_COMMIT` is enabled, booking requests for the same
+slot are queued and written in small batches instead of one transaction
+each. The first request to arrive becomes the leader: it takes up to
+`GroupCommitConfig.BATCH_SIZE` queued requests, validates them against a
+single snapshot of the booked seats and writes all accepted bookings with
+one `bulk_create` per table. Requests arriving meanwhile wait in the
+queue and form the next batch, whose leader is the oldest waiter.
+Only requests served concurrently by the same process are grouped, so
+it takes threaded workers to form batches.
+
+Every caller still gets its own booking or `SeatConflict`.
+"""
+
+import threading
+from collections import deque
+
+from django.db import IntegrityError, transaction
+
+from apps.slot import (
+    bookings,
+    constants as slot_constants,
+    exceptions as slot_exceptions,
+    models as slot_models,
+)
+
+
+class BookingRequest:
+    """
+    A queued booking request and, once its batch ran, its outcome.
+    """
+
+    __slots__ = ("user", "seat_ids", "booking", "error", "done", "leader", "wakeup")
+
+    def __init__(self, user, seat_ids):
+        self.user = user
+        self.seat_ids = seat_ids
+        self.booking = None
+        self.error = None
+        self.done = False
+        self.leader = False
+        self.wakeup = threading.Event()
+
+    def resolve(self, booking=None, error=None):
+        self.booking = booking
+        self.error = error
+        self.done = True
+        self.wakeup.set()
+
+
+class SlotQueue:
+    """
+    Pending booking requests of a single slot.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = deque()
+        self.draining = False
+
+    def enqueue(self, request):
+        with self.lock:
+            self.pending.append(request)
+            if not self.draining:
+                self.draining = True
+                request.leader = True
+                request.wakeup.set()
+
+    def drain_batch(self, slot):
+        with self.lock:
+            batch = [
+                self.pending.popleft()
+                for _ in range(
+                    min(len(self.pending), slot_constants.GroupCommitConfig.BATCH_SIZE)
+                )
+            ]
+
+        try:
+            commit_batch(slot, batch)
+        except Exception as error:
+            for request in batch:
+                if not request.done:
+                    request.resolve(error=error)
+        finally:
+            with self.lock:
+                if self.pending:
+                    self.pending[0].leader = True
+                    self.pending[0].wakeup.set()
+                else:
+                    self.draining = False
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def submit(slot, user, seat_ids):
+    """
+    Queues a booking request and blocks until its batch was committed.
+    Returns the booking or raises `SeatConflict`.
+    """
+
+    with _queues_lock:
+        queue = _queues.setdefault(slot.id, SlotQueue())
+
+    request = BookingRequest(user, seat_ids)
+    queue.enqueue(request)
+
+    while not request.done:
+        request.wakeup.wait()
+        request.wakeup.clear()
+        if request.leader:
+            request.leader = False
+            queue.drain_batch(slot)
+
+    if request.error is not None:
+        raise request.error
+    return request.booking
+
+
+def commit_batch(slot, batch):
+    """
+    Validates a batch against one snapshot of the slot's booked seats and
+    writes the accepted bookings with a single insert per table. No
+    request is resolved before the outcome of the batch is final.
+    """
+
+    requested_seat_ids = {seat_id for request in batch for seat_id in request.seat_ids}
+    accepted = []
+    rejected = []
+
+    try:
+        with transaction.atomic():
+            booked_seat_ids = set(
+                slot_models.BookingSeat.objects.filter(
+                    slot=slot,
+                    cinema_seat_id__in=requested_seat_ids,
+                    status=slot_constants.BookingStatus.BOOKED.value,
+                ).values_list("cinema_seat_id", flat=True)
+            )
+
+            for request in batch:
+                conflicts = booked_seat_ids.intersection(request.seat_ids)
+                if conflicts:
+                    rejected.append((request, conflicts))
+                else:
+                    booked_seat_ids.update(request.seat_ids)
+                    accepted.append(request)
+
+            created = slot_models.Booking.objects.bulk_create(
+                slot_models.Booking(
+                    user=request.user,
+                    slot=slot,
+                    status=slot_constants.BookingStatus.BOOKED.value,
+                )
+                for request in accepted
+            )
+            slot_models.BookingSeat.objects.bulk_create(
+                slot_models.BookingSeat(
+                    cinema_seat_id=seat_id, booking=booking, slot=slot
+                )
+                for booking, request in zip(created, accepted)
+                for seat_id in request.seat_ids
+            )
+            if accepted:
+                bookings.seats_booked(
+                    slot.id,
+                    [seat_id for request in accepted for seat_id in request.seat_ids],
+                )
+    except IntegrityError as error:
+        if not bookings.is_seat_conflict(error):
+            raise
+        # Another worker process booked one of the seats after the
+        # snapshot, fall back to committing the requests one by one. The
+        # rejected requests are retried too, the seats they lost to may
+        # not have been booked after all.
+        for request in batch:
+            commit_single(slot, request)
+        return
+
+    # Resolved only once the batch committed
+    for booking, request in zip(created, accepted):
+        request.resolve(booking=booking)
+    for request, conflicts in rejected:
+        request.resolve(error=slot_exceptions.SeatConflict(conflicts))
+
+
+def commit_single(slot, request):
+    try:
+        request.resolve(
+            booking=bookings.book_seats(slot, request.user, request.seat_ids)
+        )
+    except slot_exceptions.SeatConflict as error:
+        request.resolve(error=error)
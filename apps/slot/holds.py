@@ -0,0 +1,250 @@
+"""
+Temporary seat holds.
+
+A hold reserves seats of a slot for a user for a few minutes so that the
+seats can be confirmed into a booking, or released, without racing other
+users. Holds are kept in the default cache instead of `Booking` rows:
+
+- `seat-holds:<slot_id>` is the per-slot index and the source of truth
+  for conflicts. It maps every held seat to `(hold_id, user_id,
+  expires_at)` and carries a version, bumped on every change, with a
+  short log of the seats each version touched. It is only modified under
+  a cache lock.
+- `seat-hold:<hold_id>` stores the hold itself for confirm / release.
+- `seat-holds:slots` lists the slots that currently have holds so the
+  sweeper knows where to look.
+"""
+
+import secrets
+import time
+
+from django.core.cache import cache
+
+from apps.common import cache as common_cache
+from apps.slot import (
+    constants as slot_constants,
+    exceptions as slot_exceptions,
+    signals as slot_signals,
+)
+
+SLOTS_KEY = "seat-holds:slots"
+
+# Index entries outlive the longest hold so expiry is always observed
+# by `sweep_holds` before the cache drops the key.
+INDEX_TIMEOUT = (slot_constants.SeatHoldConfig.MAX_MINUTES + 60) * 60
+
+
+def _slot_key(slot_id):
+    return f"seat-holds:{slot_id}"
+
+
+def _hold_key(hold_id):
+    return f"seat-hold:{hold_id}"
+
+
+def _get_index(slot_id):
+    index = cache.get(_slot_key(slot_id))
+    if index is None:
+        # Starts at the current time in milliseconds so the version keeps
+        # increasing after an idle index was evicted. Stored right away so
+        # readers agree on it.
+        index = {"version": int(time.time() * 1000), "seats": {}, "log": []}
+        if not cache.add(_slot_key(slot_id), index, INDEX_TIMEOUT):
+            index = cache.get(_slot_key(slot_id), index)
+    return index
+
+
+def _set_index(slot_id, index, changed_seat_ids):
+    index["version"] += 1
+    index["log"] = index["log"][1 - slot_constants.SeatHoldConfig.LOG_SIZE :]
+    index["log"].append((index["version"], list(changed_seat_ids)))
+    cache.set(_slot_key(slot_id), index, INDEX_TIMEOUT)
+
+
+def _live(entries, now):
+    return {seat_id: entry for seat_id, entry in entries.items() if entry[2] > now}
+
+
+def held_seat_ids(slot_id, exclude_user_id=None):
+    """
+    Returns the ids of the seats currently held in a slot with a single
+    cache read, optionally ignoring the holds of one user.
+    """
+
+    return get_hold_state(slot_id, exclude_user_id)[1]
+
+
+def get_hold_state(slot_id, exclude_user_id=None):
+    """
+    Returns the hold version of a slot together with its held seat ids.
+    """
+
+    now = time.time()
+    index = _get_index(slot_id)
+    return index["version"], {
+        seat_id
+        for seat_id, (_, user_id, expires_at) in index["seats"].items()
+        if expires_at > now and user_id != exclude_user_id
+    }
+
+
+def held_seat_ids_many(slot_ids):
+    """
+    Returns the ids of the seats currently held in each of `slot_ids`
+    with a single cache read. Slots without an index hold no seats.
+    """
+
+    now = time.time()
+    indexes = cache.get_many([_slot_key(slot_id) for slot_id in slot_ids])
+    return {
+        slot_id: set(_live(index["seats"], now))
+        for slot_id in slot_ids
+        if (index := indexes.get(_slot_key(slot_id))) is not None
+    }
+
+
+def get_changed_seat_ids(slot_id, since_version):
+    """
+    Returns the ids of the seats whose hold changed after `since_version`,
+    or None when the log does not reach back that far.
+    """
+
+    index = _get_index(slot_id)
+    if since_version > index["version"]:
+        return None
+    if since_version < index["version"] and (
+        not index["log"] or index["log"][0][0] > since_version + 1
+    ):
+        return None
+
+    changed = {
+        seat_id
+        for version, seat_ids in index["log"]
+        if version > since_version
+        for seat_id in seat_ids
+    }
+    # Expired holds are only logged once swept, report them right away
+    now = time.time()
+    changed.update(
+        seat_id
+        for seat_id, (_, _, expires_at) in index["seats"].items()
+        if expires_at <= now
+    )
+    return changed
+
+
+def get_hold(hold_id):
+    """
+    Returns the hold, or None once it was released or has expired.
+    """
+
+    hold = cache.get(_hold_key(hold_id))
+    if hold is None or hold["expires_at"] <= time.time():
+        return None
+    return hold
+
+
+def place_hold(slot_id, user_id, seat_ids, minutes):
+    """
+    Holds the seats for `minutes` minutes.
+    Raises `SeatConflict` listing the seats already held by other users.
+    """
+
+    now = time.time()
+    hold = {
+        "id": secrets.token_urlsafe(12),
+        "slot_id": slot_id,
+        "user_id": user_id,
+        "seat_ids": list(seat_ids),
+        "expires_at": now + minutes * 60,
+    }
+
+    with common_cache.cache_lock(cache, _slot_key(slot_id)):
+        index = _get_index(slot_id)
+        entries = _live(index["seats"], now)
+        conflicts = [
+            seat_id
+            for seat_id in seat_ids
+            if seat_id in entries and entries[seat_id][1] != user_id
+        ]
+        if conflicts:
+            raise slot_exceptions.SeatConflict(conflicts)
+
+        changed = set(index["seats"]) - set(entries)
+        for seat_id in seat_ids:
+            entries[seat_id] = (hold["id"], user_id, hold["expires_at"])
+            changed.add(seat_id)
+        index["seats"] = entries
+        _set_index(slot_id, index, changed)
+
+    cache.set(_hold_key(hold["id"]), hold, minutes * 60)
+
+    if slot_id not in cache.get(SLOTS_KEY, set()):
+        with common_cache.cache_lock(cache, SLOTS_KEY):
+            slot_ids = cache.get(SLOTS_KEY, set())
+            slot_ids.add(slot_id)
+            cache.set(SLOTS_KEY, slot_ids, INDEX_TIMEOUT)
+
+    slot_signals.seat_holds_changed.send(
+        sender=None, slot_id=slot_id, seat_ids=hold["seat_ids"], held=True
+    )
+    return hold
+
+
+def release_hold(hold):
+    """
+    Frees the seats of a hold. Seats re-held since then by a newer hold
+    of the same user are left untouched.
+    """
+
+    slot_id = hold["slot_id"]
+    released = []
+    with common_cache.cache_lock(cache, _slot_key(slot_id)):
+        index = _get_index(slot_id)
+        for seat_id in hold["seat_ids"]:
+            entry = index["seats"].get(seat_id)
+            if entry is not None and entry[0] == hold["id"]:
+                del index["seats"][seat_id]
+                released.append(seat_id)
+        if released:
+            _set_index(slot_id, index, released)
+
+    cache.delete(_hold_key(hold["id"]))
+
+    if released:
+        slot_signals.seat_holds_changed.send(
+            sender=None, slot_id=slot_id, seat_ids=released, held=False
+        )
+
+
+def sweep_holds():
+    """
+    Releases every expired hold in one pass over the slots with holds.
+    Returns a mapping of slot id to the seat ids that were released.
+    """
+
+    now = time.time()
+    released = {}
+
+    for slot_id in cache.get(SLOTS_KEY, set()):
+        with common_cache.cache_lock(cache, _slot_key(slot_id)):
+            index = _get_index(slot_id)
+            live = _live(index["seats"], now)
+            if len(live) != len(index["seats"]):
+                released[slot_id] = sorted(set(index["seats"]) - set(live))
+                index["seats"] = live
+                _set_index(slot_id, index, released[slot_id])
+
+    with common_cache.cache_lock(cache, SLOTS_KEY):
+        slot_ids = {
+            slot_id
+            for slot_id in cache.get(SLOTS_KEY, set())
+            if _get_index(slot_id)["seats"]
+        }
+        cache.set(SLOTS_KEY, slot_ids, INDEX_TIMEOUT)
+
+    for slot_id, seat_ids in released.items():
+        slot_signals.seat_holds_changed.send(
+            sender=None, slot_id=slot_id, seat_ids=seat_ids, held=False
+        )
+    return released
@@ -0,0 +1,135 @@
+"""
+Helpers shared by the benchmark management commands.
+
+Benchmarks run against throw-away rows, either created inside a
+transaction which is rolled back at the end or, when several threads
+need to see them, committed and deleted afterwards.
+"""
+
+import contextlib
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from apps.cinema import models as cinema_models
+from apps.movie import models as movie_models
+from apps.slot import constants as slot_constants, models as slot_models
+
+User = get_user_model()
+
+
+@contextlib.contextmanager
+def rolled_back():
+    """
+    Runs the block in a transaction that is always rolled back.
+    """
+
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+@contextlib.contextmanager
+def committed_slot(rows, seats_per_row, name="Benchmark"):
+    """
+    Commits a throw-away slot and deletes it with its bookings afterwards.
+    """
+
+    slot = create_slot(rows, seats_per_row, name)
+    try:
+        yield slot
+    finally:
+        slot.cinema.location.delete()
+        slot.movie.delete()
+
+
+def create_slot(rows, seats_per_row, name="Benchmark"):
+    """
+    Creates a cinema of the given layout with one upcoming slot.
+    """
+
+    location = cinema_models.Location.objects.create(city=f"{name} city")
+    cinema = cinema_models.Cinema.objects.create(
+        name=f"{name} cinema",
+        location=location,
+        rows=rows,
+        seats_per_row=seats_per_row,
+    )
+    movie = movie_models.Movie.objects.create(
+        name=f"{name} movie",
+        description=name,
+        duration=timedelta(hours=2),
+        release_date=timezone.now().date() - timedelta(days=1),
+    )
+    return slot_models.Slot.objects.create(
+        cinema=cinema,
+        movie=movie,
+        start_time=timezone.now() + timedelta(days=1),
+        price=100,
+    )
+
+
+def create_user(name="benchmark"):
+    return User.objects.create(
+        name=name, email=f"{name}@benchmark.test", phone_number="9999999999"
+    )
+
+
+def create_users(count, name="benchmark"):
+    return User.objects.bulk_create(
+        User(
+            name=name,
+            email=f"{name}-{index}@benchmark.test",
+            phone_number=f"{index:010d}",
+        )
+        for index in range(count)
+    )
+
+
+def book_every(slot, user, step):
+    """
+    Books every `step`-th seat of the slot in a single booking.
+    """
+
+    booking = slot_models.Booking.objects.create(
+        user=user, slot=slot, status=slot_constants.BookingStatus.BOOKED.value
+    )
+    seat_ids = cinema_models.CinemaSeat.objects.filter(
+        cinema_id=slot.cinema_id
+    ).values_list("id", flat=True)
+    slot_models.BookingSeat.objects.bulk_create(
+        slot_models.BookingSeat(cinema_seat_id=seat_id, booking=booking, slot=slot)
+        for index, seat_id in enumerate(seat_ids)
+        if index % step == 0
+    )
+    return booking
+
+
+def measure(function, iterations):
+    """
+    Calls `function` repeatedly and returns the per-call timings in ms.
+    """
+
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def percentile(timings, fraction):
+    timings = sorted(timings)
+    return timings[min(len(timings) - 1, int(len(timings) * fraction))]
+
+
+def summary(label, timings):
+    return (
+        f"{label:<24} mean {statistics.mean(timings):8.3f} ms  "
+        f"median {statistics.median(timings):8.3f} ms  "
+        f"p99 {percentile(timings, 0.99):8.3f} ms"
+    )
@@ -0,0 +1,96 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from apps.cinema import models as cinema_models
+from apps.slot import exceptions as slot_exceptions, serializers as slot_serializers
+from apps.slot.management.commands import _benchmark
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    Fires concurrent bookings at one slot, once with a transaction per
+    request and once through the group commit queue.
+
+    Rows are committed so every client thread can see them, run it
+    against PostgreSQL: SQLite serializes writers and times out.
+    """
+
+    help = "Benchmark concurrent bookings: per-request path vs group commit."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=200)
+        parser.add_argument("--seats", type=int, default=2)
+        parser.add_argument("--rows", type=int, default=40)
+        parser.add_argument("--seats-per-row", type=int, default=60)
+
+    def handle(self, *args, **options):
+        users = _benchmark.create_users(options["clients"])
+        try:
+            for group_commit in (False, True):
+                with override_settings(BOOKING_GROUP_COMMIT=group_commit):
+                    self.run_mode(
+                        "group commit" if group_commit else "per request",
+                        users,
+                        options,
+                    )
+        finally:
+            User.objects.filter(id__in=[user.id for user in users]).delete()
+
+    def run_mode(self, label, users, options):
+        with _benchmark.committed_slot(
+            options["rows"], options["seats_per_row"]
+        ) as slot:
+            seat_ids = list(
+                cinema_models.CinemaSeat.objects.filter(
+                    cinema_id=slot.cinema_id
+                ).values_list("id", flat=True)
+            )
+            picker = random.Random(42)
+            requests = [
+                (user, picker.sample(seat_ids, options["seats"])) for user in users
+            ]
+            barrier = threading.Barrier(len(requests))
+
+            def book(request):
+                user, seats = request
+                context = {
+                    "view": SimpleNamespace(kwargs={"slot_id": slot.id}),
+                    "request": SimpleNamespace(user=user),
+                }
+                barrier.wait()
+                started = time.perf_counter()
+                try:
+                    serializer = slot_serializers.BookingSeatSerializer(
+                        data={"seat_ids": seats}, context=context
+                    )
+                    serializer.is_valid(raise_exception=True)
+                    serializer.save()
+                    booked = True
+                except slot_exceptions.SeatConflict:
+                    booked = False
+                finally:
+                    connection.close()
+                return (time.perf_counter() - started) * 1000, booked
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=len(requests)) as executor:
+                results = list(executor.map(book, requests))
+            elapsed = time.perf_counter() - started
+
+        timings = [timing for timing, _ in results]
+        booked = sum(1 for _, success in results if success)
+        self.stdout.write(
+            f"{label:<14} {len(results) / elapsed:8.1f} req/s  "
+            f"p99 {_benchmark.percentile(timings, 0.99):8.1f} ms  "
+            f"booked {booked}, conflicts {len(results) - booked}"
+        )
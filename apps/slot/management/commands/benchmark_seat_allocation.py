@@ -0,0 +1,51 @@
+import random
+
+from django.core.management.base import BaseCommand
+
+from apps.slot import allocation, seat_maps
+from apps.slot.management.commands import _benchmark
+
+
+class Command(BaseCommand):
+    """
+    Times the best-available allocator on a large auditorium at
+    increasing occupancy. Runs on in-memory seat maps only, the
+    database is not touched.
+    """
+
+    help = "Benchmark the best-available contiguous seat allocator."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=40)
+        parser.add_argument("--seats-per-row", type=int, default=60)
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rows, seats_per_row = options["rows"], options["seats_per_row"]
+        seats = [
+            (row * seats_per_row + seat + 1, row + 1, seat + 1)
+            for row in range(rows)
+            for seat in range(seats_per_row)
+        ]
+        seat_ids = [seat_id for seat_id, _, _ in seats]
+        randomizer = random.Random(options["seed"])
+
+        self.stdout.write(
+            f"{rows} x {seats_per_row} seats, {options['iterations']} iterations"
+        )
+        for occupancy in (0.5, 0.8, 0.95, 0.99):
+            booked = randomizer.sample(seat_ids, int(len(seat_ids) * occupancy))
+            seat_map = seat_maps.SeatMap(0, rows, seats_per_row, seats, booked)
+
+            for party_size in (2, 4, 8):
+                found = allocation.find_block(seat_map, party_size)
+                timings = _benchmark.measure(
+                    lambda: allocation.find_block(seat_map, party_size),
+                    options["iterations"],
+                )
+                label = f"{occupancy:.0%} booked, party {party_size}"
+                self.stdout.write(
+                    _benchmark.summary(label, timings)
+                    + ("" if found else "  (no block)")
+                )
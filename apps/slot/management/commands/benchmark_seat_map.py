@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Case, When
+
+from apps.cinema import models as cinema_models
+from apps.slot import (
+    constants as slot_constants,
+    models as slot_models,
+    seat_maps,
+    serializers as slot_serializers,
+)
+from apps.slot.management.commands import _benchmark
+
+
+class Command(BaseCommand):
+    """
+    Compares the queryset based seat availability path with the
+    in-memory seat map on a 500-seat auditorium.
+    """
+
+    help = "Benchmark seat availability: CinemaSeat queryset vs seat map."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=20)
+        parser.add_argument("--seats-per-row", type=int, default=25)
+        parser.add_argument("--iterations", type=int, default=200)
+
+    def handle(self, *args, **options):
+        with _benchmark.rolled_back():
+            slot = _benchmark.create_slot(options["rows"], options["seats_per_row"])
+            _benchmark.book_every(slot, _benchmark.create_user(), step=3)
+            slot = slot_models.Slot.objects.select_related("cinema").get(id=slot.id)
+
+            def queryset_path():
+                booked_seats = slot_models.BookingSeat.objects.filter(
+                    booking__slot_id=slot.id,
+                    booking__status=slot_constants.BookingStatus.BOOKED.value,
+                ).values_list("cinema_seat", flat=True)
+                queryset = (
+                    cinema_models.CinemaSeat.objects.filter(cinema_id_id__slot=slot.id)
+                    .annotate(
+                        available=Case(
+                            When(id__in=booked_seats, then=False), default=True
+                        )
+                    )
+                    .select_related("cinema_id")
+                )
+                return slot_serializers.SeatAvailabilitySerializer(
+                    queryset, many=True
+                ).data
+
+            def seat_map_path():
+                return list(seat_maps.get_seat_map(slot).seats())
+
+            def rebuild_path():
+                return list(seat_maps.rebuild_seat_map(slot).seats())
+
+            seats = options["rows"] * options["seats_per_row"]
+            self.stdout.write(f"{seats} seats, {options['iterations']} iterations")
+            for label, function in (
+                ("queryset + serializer", queryset_path),
+                ("seat map (warm)", seat_map_path),
+                ("seat map (rebuild)", rebuild_path),
+            ):
+                timings = _benchmark.measure(function, options["iterations"])
+                self.stdout.write(_benchmark.summary(label, timings))
+
+            seat_maps.discard_seat_map(slot.id)
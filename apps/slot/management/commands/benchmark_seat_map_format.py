@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from rest_framework import renderers
+
+from apps.slot import (
+    models as slot_models,
+    renderers as slot_renderers,
+    seat_maps,
+    views as slot_views,
+)
+from apps.slot.management.commands import _benchmark
+
+
+class Command(BaseCommand):
+    """
+    Compares the payload size and serialization time of the JSON seat
+    list with the compact seat map format on a 2000-seat auditorium.
+    """
+
+    help = "Benchmark seat map payloads: JSON seat list vs compact bitset."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=40)
+        parser.add_argument("--seats-per-row", type=int, default=50)
+        parser.add_argument("--iterations", type=int, default=200)
+
+    def handle(self, *args, **options):
+        with _benchmark.rolled_back():
+            slot = _benchmark.create_slot(options["rows"], options["seats_per_row"])
+            _benchmark.book_every(slot, _benchmark.create_user(), step=3)
+            slot = slot_models.Slot.objects.select_related(
+                "movie", "cinema__location"
+            ).get(id=slot.id)
+            seat_maps.get_seat_map(slot)
+
+            def json_path():
+                return renderers.JSONRenderer().render(
+                    slot_views.seat_map_data(slot, 0, set())
+                )
+
+            def compact_path():
+                return slot_renderers.CompactSeatMapRenderer().render(
+                    slot_views.seat_map_data(slot, 0, set(), compact=True)
+                )
+
+            seats = options["rows"] * options["seats_per_row"]
+            self.stdout.write(f"{seats} seats, {options['iterations']} iterations")
+            for label, function in (
+                ("JSON seat list", json_path),
+                ("compact bitset", compact_path),
+            ):
+                timings = _benchmark.measure(function, options["iterations"])
+                self.stdout.write(
+                    f"{_benchmark.summary(label, timings)}  "
+                    f"{len(function()):7d} bytes"
+                )
+
+            seat_maps.discard_seat_map(slot.id)
@@ -0,0 +1,54 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from apps.slot import tickets
+
+
+class Command(BaseCommand):
+    """
+    Measures gate scans per second on one core: signature check plus
+    the in-memory revocation lookup, no database involved.
+    """
+
+    help = "Benchmark e-ticket verification throughput."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tickets", type=int, default=10000)
+        parser.add_argument("--seats", type=int, default=4)
+        parser.add_argument("--revoked", type=int, default=500)
+
+    def handle(self, *args, **options):
+        slot_id = 0
+        issued = [
+            tickets.issue_ticket(
+                booking_id,
+                slot_id,
+                range(
+                    booking_id * options["seats"], (booking_id + 1) * options["seats"]
+                ),
+            )
+            for booking_id in range(1, options["tickets"] + 1)
+        ]
+        revoked = frozenset(range(1, options["revoked"] + 1))
+        cache.set(tickets._revocations_key(slot_id), revoked, None)
+
+        rejected = 0
+        started = time.perf_counter()
+        for ticket in issued:
+            try:
+                tickets.verify_ticket(ticket, slot_id)
+            except tickets.InvalidTicket:
+                rejected += 1
+        elapsed = time.perf_counter() - started
+
+        cache.delete(tickets._revocations_key(slot_id))
+        self.stdout.write(
+            f"{len(issued)} tickets of {options['seats']} seats, {rejected} revoked"
+        )
+        self.stdout.write(
+            f"{len(issued) / elapsed:,.0f} scans/s per core, "
+            f"{elapsed / len(issued) * 1e6:.1f} us per scan, "
+            f"ticket length {len(issued[-1])} chars"
+        )
@@ -0,0 +1,46 @@
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F, Q
+
+from apps.slot import models as slot_models, schedules
+
+
+class Command(BaseCommand):
+    """
+    Generates the slots of the schedule templates not generated up to
+    their end date yet, only the days not generated before.
+    """
+
+    help = "Create the slots of recurring schedule templates."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "template_ids", nargs="*", type=int, help="Templates to generate."
+        )
+        parser.add_argument(
+            "--until",
+            type=date.fromisoformat,
+            help="Last day to generate, YYYY-MM-DD, the template's end date by default.",
+        )
+
+    def handle(self, *args, **options):
+        templates = slot_models.ScheduleTemplate.objects.filter(
+            Q(generated_until__isnull=True) | Q(generated_until__lt=F("end_date"))
+        ).select_related("movie", "cinema")
+        if options["template_ids"]:
+            templates = templates.filter(id__in=options["template_ids"])
+
+        failed = False
+        for template in templates:
+            try:
+                slots = schedules.generate_slots(template, until=options["until"])
+            except ValidationError as error:
+                failed = True
+                self.stderr.write(f"{template}: {' '.join(error.messages)}")
+            else:
+                self.stdout.write(f"{template}: created {len(slots)} slots")
+
+        if failed:
+            raise CommandError("Some templates could not be generated")
@@ -0,0 +1,65 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from apps.slot import schedules, serializers as slot_serializers
+
+
+def format_errors(errors):
+    """
+    Flattens the nested error details of a serializer into one line.
+    """
+
+    if isinstance(errors, dict):
+        return "; ".join(
+            f"{field}: {format_errors(field_errors)}"
+            for field, field_errors in errors.items()
+        )
+    if isinstance(errors, list):
+        return "; ".join(map(format_errors, errors))
+    return str(errors)
+
+
+class Command(BaseCommand):
+    """
+    Imports a CSV or JSON schedule file, all slots or none.
+    """
+
+    help = "Create the slots of a CSV or JSON schedule file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=Path)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate the schedule without creating slots.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        try:
+            rows = schedules.read_schedule(
+                path.read_text(), "csv" if path.suffix.lower() == ".csv" else "json"
+            )
+        except (OSError, schedules.InvalidScheduleFile) as error:
+            raise CommandError(error)
+
+        serializer = slot_serializers.ScheduleImportSerializer(
+            data={"slots": rows, "dry_run": options["dry_run"]}
+        )
+        try:
+            serializer.is_valid(raise_exception=True)
+            created = serializer.save()
+        except ValidationError as error:
+            errors = dict(error.detail)
+            for number, row_errors in errors.pop("rows", {}).items():
+                self.stderr.write(f"Row {number}: {format_errors(row_errors)}")
+            if errors:
+                self.stderr.write(format_errors(errors))
+            raise CommandError("The schedule is invalid, no slot was created")
+
+        if options["dry_run"]:
+            self.stdout.write(f"{len(rows)} slots are valid")
+        else:
+            self.stdout.write(f"Created {len(created)} slots")
@@ -0,0 +1,80 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from functools import partial
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from apps.cinema import models as cinema_models
+from apps.slot import grids
+
+
+def rebuild_city(city, from_date=None, to_date=None):
+    return city, grids.rebuild_grids(city, from_date=from_date, to_date=to_date)
+
+
+def worker_pool(processes=None):
+    """
+    Returns a process pool whose workers set up Django before receiving
+    tasks, as workers started by spawn or forkserver don't inherit the
+    app registry of this process.
+    """
+
+    return ProcessPoolExecutor(processes, initializer=django.setup)
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the showtime grids of every city, one city per worker
+    process.
+    """
+
+    help = "Rebuild the city showtime grids from the slots."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--from",
+            dest="from_date",
+            type=date.fromisoformat,
+            help="First show date to rebuild, YYYY-MM-DD, today by default.",
+        )
+        parser.add_argument(
+            "--to",
+            dest="to_date",
+            type=date.fromisoformat,
+            help="Last show date to rebuild, YYYY-MM-DD, every later date by default.",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            help="Worker processes, one per CPU by default, 1 runs in this process.",
+        )
+
+    def handle(self, *args, **options):
+        cities = list(
+            cinema_models.Location.objects.order_by("city").values_list(
+                "city", flat=True
+            )
+        )
+        rebuild = partial(
+            rebuild_city,
+            from_date=options["from_date"] or timezone.localdate(),
+            to_date=options["to_date"],
+        )
+
+        if options["processes"] == 1:
+            results = map(rebuild, cities)
+        else:
+            # Closed before forking so that workers open their own
+            # connections instead of sharing these
+            connections.close_all()
+            with worker_pool(options["processes"]) as executor:
+                results = list(executor.map(rebuild, cities))
+
+        total = 0
+        for city, count in results:
+            total += count
+            self.stdout.write(f"{city}: {count} grids")
+        self.stdout.write(f"Rebuilt {total} grids of {len(cities)} cities")
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from apps.slot import constants as slot_constants, models as slot_models, occupancy
+
+
+class Command(BaseCommand):
+    """
+    Recounts the booked seats and capacity of every slot and repairs the
+    denormalized counters that drifted.
+    """
+
+    help = "Repair drifted slot occupancy counters."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=slot_constants.OccupancyConfig.RECONCILE_BATCH_SIZE,
+            help="Slots locked and recounted per transaction.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report drifted slots without repairing them.",
+        )
+
+    def handle(self, *args, **options):
+        slots = slot_models.Slot.objects.all()
+        drifted = occupancy.reconcile(
+            slots, options["batch_size"], dry_run=options["dry_run"]
+        )
+
+        action = "Found" if options["dry_run"] else "Repaired"
+        self.stdout.write(
+            f"{action} {len(drifted)} drifted slots out of {slots.count()}"
+        )
+        for slot_id in drifted:
+            self.stdout.write(f"  slot {slot_id}")
@@ -0,0 +1,42 @@
+import time
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.common import cache as common_cache
+from apps.slot import constants as slot_constants, holds
+
+
+class Command(BaseCommand):
+    """
+    Releases expired seat holds, once or every `--interval` seconds
+    when run as a background worker.
+    """
+
+    help = "Release expired seat holds."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Keep sweeping every N seconds instead of sweeping once.",
+        )
+
+    def handle(self, *args, **options):
+        interval = options["interval"]
+        # Holds are placed by the web workers, a cache of this process
+        # never has any
+        if common_cache.is_process_local(caches[DEFAULT_CACHE_ALIAS]):
+            raise CommandError(slot_constants.ErrorMessage.SHARED_CACHE_REQUIRED)
+
+        while True:
+            released = holds.sweep_holds()
+            self.stdout.write(
+                f"Released {sum(map(len, released.values()))} seats "
+                f"in {len(released)} slots"
+            )
+
+            if not interval:
+                return
+            time.sleep(interval)
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Number of booking seats without a booking listed when the copy fails
+MAX_LISTED_ORPHANS = 50
+
+
+def copy_slot_and_status(apps, schema_editor):
+    """
+    Fills the denormalized slot and status of existing booking seats
+    from their booking. Refuses booking seats without a booking.
+    """
+
+    Booking = apps.get_model("slot", "Booking")
+    BookingSeat = apps.get_model("slot", "BookingSeat")
+
+    # Seats without a booking have no slot to copy, they are left for a
+    # reviewed cleanup instead of being deleted here
+    orphans = list(
+        BookingSeat.objects.filter(booking__isnull=True)
+        .order_by("id")
+        .values_list("id", flat=True)[: MAX_LISTED_ORPHANS + 1]
+    )
+    if orphans:
+        more = ", ..." if len(orphans) > MAX_LISTED_ORPHANS else ""
+        raise RuntimeError(
+            "Cannot copy the slot of booking seats without a booking: "
+            f"{', '.join(map(str, orphans[:MAX_LISTED_ORPHANS]))}{more}\n"
+            "Attach them to their booking or delete them, then run the "
+            "migration again."
+        )
+
+    BookingSeat.objects.update(
+        slot_id=models.Subquery(
+            Booking.objects.filter(id=models.OuterRef("booking_id")).values(
+                "slot_id"
+            )[:1]
+        ),
+        status=models.Subquery(
+            Booking.objects.filter(id=models.OuterRef("booking_id")).values(
+                "status"
+            )[:1]
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("cinema", "0001_initial"),
+        ("slot", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bookingseat",
+            name="slot",
+            field=models.ForeignKey(
+                null=True,
+                help_text="This field is automatically generated",
+                on_delete=django.db.models.deletion.CASCADE,
+                to="slot.slot",
+            ),
+        ),
+        migrations.AddField(
+            model_name="bookingseat",
+            name="status",
+            field=models.CharField(
+                choices=[("B", "Booked"), ("C", "Cancelled")],
+                default="B",
+                help_text="This field is automatically generated",
+                max_length=1,
+            ),
+        ),
+        migrations.RunPython(copy_slot_and_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:46
+
+import logging
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+logger = logging.getLogger(__name__)
+
+
+def cancel_duplicate_bookings(apps, schema_editor):
+    """
+    Cancels the bookings that double booked a seat before the constraint
+    existed. Of the bookings sharing an active seat of a slot, the
+    earliest one is kept, a later one is cancelled as a whole.
+    """
+
+    Booking = apps.get_model("slot", "Booking")
+    BookingSeat = apps.get_model("slot", "BookingSeat")
+
+    booked = BookingSeat.objects.filter(status="B")
+    duplicates = (
+        booked.values("slot_id", "cinema_seat_id")
+        .annotate(count=models.Count("id"))
+        .filter(count__gt=1)
+        .values_list("slot_id", "cinema_seat_id")
+    )
+    duplicate_seats = models.Q()
+    for slot_id, cinema_seat_id in duplicates:
+        duplicate_seats |= models.Q(slot_id=slot_id, cinema_seat_id=cinema_seat_id)
+    if not duplicate_seats:
+        return
+
+    booking_ids = booked.filter(duplicate_seats).values("booking_id")
+    seats = defaultdict(set)
+    for booking_id, slot_id, cinema_seat_id in (
+        booked.filter(booking_id__in=booking_ids)
+        .order_by("booking__created_at", "booking_id")
+        .values_list("booking_id", "slot_id", "cinema_seat_id")
+    ):
+        seats[booking_id].add((slot_id, cinema_seat_id))
+
+    taken = set()
+    cancelled = []
+    for booking_id, booking_seats in seats.items():
+        if taken.isdisjoint(booking_seats):
+            taken |= booking_seats
+        else:
+            cancelled.append(booking_id)
+
+    Booking.objects.filter(id__in=cancelled).update(status="C")
+    BookingSeat.objects.filter(booking_id__in=cancelled).update(status="C")
+    logger.warning(
+        "Cancelled bookings that double booked a seat: %s",
+        ", ".join(map(str, cancelled)),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("cinema", "0001_initial"),
+        ("slot", "0003_bookingseat_slot_status"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="bookingseat",
+            name="slot",
+            field=models.ForeignKey(
+                help_text="This field is automatically generated",
+                on_delete=django.db.models.deletion.CASCADE,
+                to="slot.slot",
+            ),
+        ),
+        migrations.RunPython(cancel_duplicate_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="bookingseat",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("status", "B")),
+                fields=("slot", "cinema_seat"),
+                name="unique_booked_slot_seat",
+            ),
+        ),
+    ]
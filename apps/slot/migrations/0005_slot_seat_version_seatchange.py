@@ -0,0 +1,67 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("slot", "0004_bookingseat_unique_booked_slot_seat"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="slot",
+            name="seat_version",
+            field=models.PositiveBigIntegerField(
+                default=0, help_text="This field is automatically generated"
+            ),
+        ),
+        migrations.CreateModel(
+            name="SeatChange",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="Timestamp when the record was created.",
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True,
+                        help_text="Timestamp when the record was last updated.",
+                    ),
+                ),
+                ("version", models.PositiveBigIntegerField()),
+                ("seat_ids", models.JSONField()),
+                ("available", models.BooleanField()),
+                (
+                    "slot",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="seat_changes",
+                        to="slot.slot",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("slot", "version"),
+                        name="unique_slot_seat_change_version",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("slot", "0005_slot_seat_version_seatchange"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="slot",
+            name="admission_rate",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Visitors admitted from the waiting room per second, defaults to WAITING_ROOM_ADMIT_PER_SECOND",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="slot",
+            name="is_hot",
+            field=models.BooleanField(
+                default=False,
+                help_text="Send visitors of this slot through the waiting room",
+            ),
+        ),
+    ]
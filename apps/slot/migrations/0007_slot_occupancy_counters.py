@@ -0,0 +1,55 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:07
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Slot = apps.get_model("slot", "Slot")
+    BookingSeat = apps.get_model("slot", "BookingSeat")
+    CinemaSeat = apps.get_model("cinema", "CinemaSeat")
+
+    def count(queryset, field):
+        return Coalesce(
+            Subquery(
+                queryset.values(field).annotate(count=Count("id")).values("count"),
+                output_field=IntegerField(),
+            ),
+            0,
+        )
+
+    Slot.objects.update(
+        booked_count=count(
+            BookingSeat.objects.filter(slot_id=OuterRef("pk"), status="B"),
+            "slot_id",
+        ),
+        capacity=count(
+            CinemaSeat.objects.filter(cinema_id=OuterRef("cinema_id")), "cinema_id"
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("cinema", "0001_initial"),
+        ("slot", "0006_slot_admission_control"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="slot",
+            name="booked_count",
+            field=models.PositiveIntegerField(
+                default=0, help_text="This field is automatically generated"
+            ),
+        ),
+        migrations.AddField(
+            model_name="slot",
+            name="capacity",
+            field=models.PositiveIntegerField(
+                default=0, help_text="This field is automatically generated"
+            ),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
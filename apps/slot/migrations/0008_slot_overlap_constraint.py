@@ -0,0 +1,75 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:17
+
+from django.db import migrations, models
+
+# Slots of a cinema may not share any instant, bounds included, like the
+# check of `Slot.check_overlaps` which remains the fallback elsewhere.
+CONSTRAINT = "slot_no_overlapping_slots"
+# Number of overlapping slot pairs listed when the constraint can't be added
+MAX_LISTED_OVERLAPS = 50
+
+
+def check_overlaps(connection):
+    """
+    Refuses to add the constraint over slots that already overlap, with
+    the pairs to fix. Overlapping slots must be moved or deleted, from
+    the admin or the shell, before running the migration again.
+    """
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT a.cinema_id, a.id, b.id FROM slot_slot a JOIN slot_slot b "
+            "ON a.cinema_id = b.cinema_id AND a.id < b.id "
+            "AND tstzrange(a.start_time, a.end_time, '[]') "
+            "&& tstzrange(b.start_time, b.end_time, '[]') "
+            "ORDER BY a.cinema_id, a.id, b.id LIMIT %s",
+            [MAX_LISTED_OVERLAPS + 1],
+        )
+        overlaps = cursor.fetchall()
+    if not overlaps:
+        return
+
+    pairs = "\n".join(
+        f"  cinema {cinema_id}: slots {slot_id} and {other_id}"
+        for cinema_id, slot_id, other_id in overlaps[:MAX_LISTED_OVERLAPS]
+    )
+    more = "\n  ..." if len(overlaps) > MAX_LISTED_OVERLAPS else ""
+    raise RuntimeError(
+        f"Cannot add {CONSTRAINT}, these slots overlap:\n{pairs}{more}\n"
+        "Move or delete one slot of each pair and run the migration again."
+    )
+
+
+def add_overlap_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    check_overlaps(schema_editor.connection)
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    schema_editor.execute(
+        f"ALTER TABLE slot_slot ADD CONSTRAINT {CONSTRAINT} EXCLUDE USING gist "
+        "(cinema_id WITH =, tstzrange(start_time, end_time, '[]') WITH &&)"
+    )
+
+
+def remove_overlap_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"ALTER TABLE slot_slot DROP CONSTRAINT {CONSTRAINT}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("cinema", "0002_cinema_compact_layout"),
+        ("movie", "0002_movie_image"),
+        ("slot", "0007_slot_occupancy_counters"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="slot",
+            index=models.Index(
+                fields=["cinema", "start_time", "end_time"], name="slot_cinema_time_idx"
+            ),
+        ),
+        migrations.RunPython(add_overlap_constraint, remove_overlap_constraint),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("cinema", "0002_cinema_compact_layout"),
+        ("movie", "0002_movie_image"),
+        ("slot", "0008_slot_overlap_constraint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScheduleTemplate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="Timestamp when the record was created.",
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True,
+                        help_text="Timestamp when the record was last updated.",
+                    ),
+                ),
+                (
+                    "weekdays",
+                    models.JSONField(
+                        help_text="Days of the week to repeat on, e.g. [0, 2, 4] for Monday, Wednesday and Friday"
+                    ),
+                ),
+                (
+                    "times",
+                    models.JSONField(
+                        help_text='Start times of every day in format HH:MM, e.g. ["10:00", "13:30"]'
+                    ),
+                ),
+                ("start_date", models.DateField()),
+                ("end_date", models.DateField()),
+                ("price", models.DecimalField(decimal_places=2, max_digits=8)),
+                (
+                    "generated_until",
+                    models.DateField(
+                        blank=True,
+                        help_text="This field is automatically generated",
+                        null=True,
+                    ),
+                ),
+                (
+                    "cinema",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="cinema.cinema"
+                    ),
+                ),
+                (
+                    "movie",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="movie.movie"
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+    ]
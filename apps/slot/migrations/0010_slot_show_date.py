@@ -0,0 +1,78 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:32
+
+import zoneinfo
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def backfill_show_dates(apps, schema_editor):
+    """
+    Stores the local show date of existing slots, a batch of slots per
+    query ordered by id so that large tables are not loaded at once.
+    """
+
+    Slot = apps.get_model("slot", "Slot")
+    Cinema = apps.get_model("cinema", "Cinema")
+
+    timezones = {
+        cinema_id: zoneinfo.ZoneInfo(name)
+        for cinema_id, name in Cinema.objects.values_list("id", "timezone")
+    }
+    last_id = 0
+    while True:
+        slots = list(
+            Slot.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .only("id", "cinema_id", "start_time")[:BATCH_SIZE]
+        )
+        if not slots:
+            break
+        for slot in slots:
+            slot.show_date = slot.start_time.astimezone(
+                timezones[slot.cinema_id]
+            ).date()
+        Slot.objects.bulk_update(slots, ["show_date"])
+        last_id = slots[-1].id
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("cinema", "0003_cinema_timezone"),
+        ("slot", "0009_schedule_template"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="slot",
+            name="show_date",
+            field=models.DateField(
+                blank=True,
+                null=True,
+                help_text="This field is automatically generated",
+            ),
+        ),
+        migrations.RunPython(backfill_show_dates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="slot",
+            name="show_date",
+            field=models.DateField(
+                blank=True, help_text="This field is automatically generated"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="slot",
+            index=models.Index(
+                fields=["cinema", "show_date", "start_time"],
+                name="slot_cinema_show_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="slot",
+            index=models.Index(
+                fields=["movie", "show_date", "start_time"],
+                name="slot_movie_show_date_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("slot", "0010_slot_show_date"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ShowtimeGrid",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="Timestamp when the record was created.",
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True,
+                        help_text="Timestamp when the record was last updated.",
+                    ),
+                ),
+                ("city", models.CharField(max_length=100)),
+                ("show_date", models.DateField()),
+                ("document", models.JSONField()),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("city", "show_date"),
+                        name="unique_showtime_grid_city_date",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -1,9 +1,15 @@
+from datetime import datetime, time, timedelta
+
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
-from django.db import models as db_models
+from django.db import IntegrityError, connection, models as db_models, transaction
 from django.utils import timezone
 
-from apps.cinema import models as cinema_models
+from apps.cinema import (
+    constants as cinema_constants,
+    layouts,
+    models as cinema_models,
+)
 from apps.common import models as common_models
 from apps.movie import models as movie_models
 
@@ -12,6 +18,31 @@ from apps.slot import constants as slot_constants
 User = get_user_model()
 
 
+class SlotQuerySet(db_models.QuerySet):
+    """
+    QuerySet of Slot
+    """
+
+    def on_date(self, show_date):
+        return self.between(show_date, show_date)
+
+    def between(self, from_date, to_date):
+        """
+        Slots showing on local dates `from_date` to `to_date`, both
+        included. Slots already started are left out when a date may
+        still be today in the cinema's time zone. Plain comparisons on
+        `show_date` and `start_time`, so the show date indexes serve it.
+        """
+
+        if from_date == to_date:
+            queryset = self.filter(show_date=from_date)
+        else:
+            queryset = self.filter(show_date__range=(from_date, to_date))
+        if to_date >= timezone.localdate() - timedelta(days=1):
+            queryset = queryset.filter(start_time__gte=timezone.now())
+        return queryset
+
+
 class Slot(common_models.TimeStampModel):
     """
     Represents a showtime for a movie in a cinema.
@@ -26,40 +57,187 @@ class Slot(common_models.TimeStampModel):
         blank=True, help_text=slot_constants.HelpText.AUTO_GENERATE
     )
     price = db_models.DecimalField(max_digits=8, decimal_places=2)
+    # Local to the cinema's time zone, see `SlotQuerySet.on_date`
+    show_date = db_models.DateField(
+        blank=True, help_text=slot_constants.HelpText.AUTO_GENERATE
+    )
+    # Bumped by every booking or cancellation, see `SeatChange`
+    seat_version = db_models.PositiveBigIntegerField(
+        default=0, help_text=slot_constants.HelpText.AUTO_GENERATE
+    )
+    # Denormalized occupancy, kept in step by `apps.slot.bookings` and
+    # repaired by the `reconcile_slot_counts` command
+    booked_count = db_models.PositiveIntegerField(
+        default=0, help_text=slot_constants.HelpText.AUTO_GENERATE
+    )
+    capacity = db_models.PositiveIntegerField(
+        default=0, help_text=slot_constants.HelpText.AUTO_GENERATE
+    )
+    # Admission control, see `apps.slot.waiting_room`
+    is_hot = db_models.BooleanField(
+        default=False, help_text=slot_constants.HelpText.IS_HOT
+    )
+    admission_rate = db_models.PositiveIntegerField(
+        null=True, blank=True, help_text=slot_constants.HelpText.ADMISSION_RATE
+    )
+
+    objects = SlotQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            db_models.Index(
+                fields=["cinema", "start_time", "end_time"],
+                name=slot_constants.Index.SLOT_CINEMA_TIME,
+            ),
+            db_models.Index(
+                fields=["cinema", "show_date", "start_time"],
+                name=slot_constants.Index.SLOT_CINEMA_SHOW_DATE,
+            ),
+            db_models.Index(
+                fields=["movie", "show_date", "start_time"],
+                name=slot_constants.Index.SLOT_MOVIE_SHOW_DATE,
+            ),
+        ]
 
     def clean(self):
+        self.validate_schedule()
+        self.check_overlaps()
+
+    def validate_schedule(self):
         self.end_time = self.start_time + self.movie.duration
+        self.show_date = self.cinema.local_date(self.start_time)
 
         if self.start_time <= timezone.now():
             raise ValidationError(slot_constants.ErrorMessage.SLOT_PAST_SCHEDULE)
 
-        if self.start_time.date() < self.movie.release_date:
+        if self.show_date < self.movie.release_date:
             raise ValidationError(slot_constants.ErrorMessage.INVALID_SLOT_DATE)
 
-        overlapping_slots = Slot.objects.filter(
-            db_models.Q(
-                start_time__lte=self.start_time,
-                end_time__gte=self.start_time,
-                cinema=self.cinema,
-            )
-            | db_models.Q(
-                start_time__lte=self.end_time,
-                end_time__gte=self.end_time,
-                cinema=self.cinema,
-            )
+    def check_overlaps(self):
+        """
+        Rejects a slot sharing any instant, bounds included, with another
+        slot of the same cinema.
+        """
+
+        overlapping_slots = Slot.objects.exclude(pk=self.pk).filter(
+            cinema=self.cinema,
+            start_time__lte=self.end_time,
+            end_time__gte=self.start_time,
         )
 
         if overlapping_slots.exists():
             raise ValidationError(slot_constants.ErrorMessage.SLOT_OVERLAPS)
 
     def save(self, *args, **kwargs):
-        self.clean()
-        super().save(*args, **kwargs)
+        self.validate_schedule()
+        # PostgreSQL enforces this with the exclusion constraint of
+        # migration 0008, saving the query
+        if connection.vendor != "postgresql":
+            self.check_overlaps()
+        if self._state.adding:
+            self.capacity = layouts.get_capacities([self.cinema])[self.cinema_id]
+
+        try:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+        except IntegrityError as error:
+            if slot_constants.Constraint.NO_OVERLAPPING_SLOTS in str(error):
+                raise ValidationError(slot_constants.ErrorMessage.SLOT_OVERLAPS)
+            raise
 
     def __str__(self):
         return f"{self.movie.name}-{self.cinema.name}-{self.start_time}"
 
 
+class ScheduleTemplate(common_models.TimeStampModel):
+    """
+    A recurring schedule of a movie in a cinema.
+    - Repeats `times` on `weekdays` from `start_date` to `end_date`.
+    - Its slots are created by `apps.slot.schedules.generate_slots`, which
+      records in `generated_until` the last day done so that extending the
+      template only generates the new days.
+    """
+
+    cinema = db_models.ForeignKey(cinema_models.Cinema, on_delete=db_models.CASCADE)
+    movie = db_models.ForeignKey(movie_models.Movie, on_delete=db_models.CASCADE)
+    weekdays = db_models.JSONField(help_text=slot_constants.HelpText.WEEKDAYS)
+    times = db_models.JSONField(help_text=slot_constants.HelpText.TIMES)
+    start_date = db_models.DateField()
+    end_date = db_models.DateField()
+    price = db_models.DecimalField(max_digits=8, decimal_places=2)
+    generated_until = db_models.DateField(
+        null=True, blank=True, help_text=slot_constants.HelpText.AUTO_GENERATE
+    )
+
+    def clean(self):
+        if (
+            not isinstance(self.weekdays, list)
+            or not self.weekdays
+            or any(day not in range(7) for day in self.weekdays)
+        ):
+            raise ValidationError(
+                {"weekdays": slot_constants.ErrorMessage.INVALID_WEEKDAYS}
+            )
+
+        try:
+            if not self.start_times():
+                raise ValueError
+        except (TypeError, ValueError):
+            raise ValidationError({"times": slot_constants.ErrorMessage.INVALID_TIMES})
+
+        if self.end_date < self.start_date:
+            raise ValidationError(slot_constants.ErrorMessage.INVALID_TEMPLATE_DATES)
+
+        if self.movie_id and self.start_date < self.movie.release_date:
+            raise ValidationError(slot_constants.ErrorMessage.INVALID_SLOT_DATE)
+
+    def start_times(self):
+        return sorted({time.fromisoformat(start) for start in self.times})
+
+    def occurrences(self, start_date, end_date):
+        """
+        Yields the start time of every slot between two dates, both
+        included, in order. Times are read in the cinema's time zone.
+        """
+
+        tzinfo = self.cinema.tzinfo
+        start_times = self.start_times()
+        day = start_date
+        while day <= end_date:
+            if day.weekday() in self.weekdays:
+                for start in start_times:
+                    yield datetime.combine(day, start, tzinfo=tzinfo)
+            day += timedelta(days=1)
+
+    def __str__(self):
+        return f"{self.movie.name}-{self.cinema.name}-{self.start_date}"
+
+
+class ShowtimeGrid(common_models.TimeStampModel):
+    """
+    Read model of every showtime of a city on a local show date.
+    - `document` holds the movies showing, each with its cinemas and
+      their slots, ready to be served as is.
+    - Maintained by `apps.slot.grids` from the Slot signals, rebuilt in
+      full by the `rebuild_showtime_grids` command.
+    """
+
+    city = db_models.CharField(max_length=cinema_constants.MaxLength.LOCATION)
+    show_date = db_models.DateField()
+    document = db_models.JSONField()
+
+    class Meta:
+        constraints = [
+            db_models.UniqueConstraint(
+                fields=["city", "show_date"],
+                name=slot_constants.Constraint.UNIQUE_SHOWTIME_GRID,
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.city}-{self.show_date}"
+
+
 class Booking(common_models.TimeStampModel):
     """
     Represents a user's booking for a slot.
@@ -80,6 +258,8 @@ class BookingSeat(common_models.TimeStampModel):
     """
     Represents an individual seat under a booking.
     - Connects a booking to a specific cinema seat.
+    - Mirrors the booking's slot and status, a seat can only be
+      booked once per slot while its booking is active.
     """
 
     cinema_seat = db_models.ForeignKey(
@@ -88,6 +268,58 @@ class BookingSeat(common_models.TimeStampModel):
     booking = db_models.ForeignKey(
         Booking, on_delete=db_models.CASCADE, null=True, related_name="seats"
     )
+    # Copied from the booking so that the database can enforce a single
+    # active booking per seat of a slot.
+    slot = db_models.ForeignKey(
+        Slot,
+        on_delete=db_models.CASCADE,
+        help_text=slot_constants.HelpText.AUTO_GENERATE,
+    )
+    status = db_models.CharField(
+        max_length=1,
+        choices=Booking.SEAT_STATUS_CHOICES,
+        default=slot_constants.BookingStatus.BOOKED.value,
+        help_text=slot_constants.HelpText.AUTO_GENERATE,
+    )
+
+    class Meta:
+        constraints = [
+            db_models.UniqueConstraint(
+                fields=["slot", "cinema_seat"],
+                condition=db_models.Q(
+                    status=slot_constants.BookingStatus.BOOKED.value
+                ),
+                name=slot_constants.Constraint.UNIQUE_BOOKED_SEAT,
+            )
+        ]
 
     def __str__(self):
         return f"{self.cinema_seat}"
+
+
+class SeatChange(common_models.TimeStampModel):
+    """
+    Log of the seat changes of a slot.
+    - One row per booking or cancellation, numbered by the slot's
+      `seat_version` at the time of the change.
+    - Lets seat maps and polling clients catch up on the seats that
+      changed instead of reloading every seat.
+    """
+
+    slot = db_models.ForeignKey(
+        Slot, on_delete=db_models.CASCADE, related_name="seat_changes"
+    )
+    version = db_models.PositiveBigIntegerField()
+    seat_ids = db_models.JSONField()
+    available = db_models.BooleanField()
+
+    class Meta:
+        constraints = [
+            db_models.UniqueConstraint(
+                fields=["slot", "version"],
+                name=slot_constants.Constraint.UNIQUE_SEAT_CHANGE_VERSION,
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.slot_id}-{self.version}"
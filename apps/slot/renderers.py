@@ -0,0 +1,13 @@
+from rest_framework import renderers
+
+from apps.slot import constants as slot_constants
+
+
+class CompactSeatMapRenderer(renderers.JSONRenderer):
+    """
+    JSON renderer of the compact seat map, picked with `?format=compact`
+    or by accepting its media type.
+    """
+
+    media_type = slot_constants.SeatMapConfig.COMPACT_MEDIA_TYPE
+    format = slot_constants.SeatMapConfig.COMPACT_FORMAT
@@ -0,0 +1,285 @@
+"""
+Bulk schedule import.
+
+A schedule is a list of slots, `cinema_id`, `movie_id`, `start_time` and
+`price` each, read from a CSV or JSON file. Importing it costs a fixed
+number of queries whatever its size:
+
+- the movies, the cinemas with their capacities, and the existing slots
+  of those cinemas over the schedule's time span are loaded once,
+- past times, release dates and overlaps are checked in memory, overlaps
+  with a sorted sweep per cinema,
+- every slot is written with `bulk_create` in one transaction.
+
+Nothing is written when any row is invalid, the per-row errors are
+returned instead.
+
+Recurring schedules are stored as `ScheduleTemplate` rows and expanded
+by `generate_slots` the same way, batch by batch.
+"""
+
+import csv
+import io
+import json
+from collections import defaultdict
+from datetime import timedelta
+from functools import partial
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from apps.cinema import layouts, models as cinema_models
+from apps.movie import models as movie_models
+from apps.slot import (
+    constants as slot_constants,
+    grids,
+    models as slot_models,
+    showtimes,
+)
+
+
+class InvalidScheduleFile(Exception):
+    """
+    Raised when a schedule file can't be read.
+    """
+
+
+def read_schedule(content, file_format):
+    """
+    Returns the rows of a CSV or JSON schedule. A JSON schedule is a
+    list of rows, or an object with the list under `slots`.
+    """
+
+    try:
+        if file_format == "csv":
+            return list(csv.DictReader(io.StringIO(content)))
+        rows = json.loads(content)
+    except (csv.Error, ValueError):
+        raise InvalidScheduleFile(slot_constants.ErrorMessage.INVALID_SCHEDULE_FILE)
+
+    if isinstance(rows, dict):
+        rows = rows.get("slots")
+    if not isinstance(rows, list):
+        raise InvalidScheduleFile(slot_constants.ErrorMessage.INVALID_SCHEDULE_FILE)
+    return rows
+
+
+def import_schedule(rows, dry_run=False):
+    """
+    Validates and creates the slots of a schedule, all or nothing.
+
+    `rows` are validated data of `ScheduleRowSerializer`. Returns the
+    created slots and the error messages of every invalid row, keyed by
+    row number from 1. Nothing is created when there are errors or with
+    `dry_run`.
+    """
+
+    errors = defaultdict(list)
+    movies = movie_models.Movie.objects.only("id", "duration", "release_date").in_bulk(
+        {row["movie_id"] for row in rows}
+    )
+    cinemas = cinema_models.Cinema.objects.in_bulk({row["cinema_id"] for row in rows})
+    capacities = layouts.get_capacities(cinemas.values())
+
+    now = timezone.now()
+    slots = []
+    for index, row in enumerate(rows, start=1):
+        movie = movies.get(row["movie_id"])
+        cinema = cinemas.get(row["cinema_id"])
+        if cinema is None:
+            errors[index].append(slot_constants.ErrorMessage.CINEMA_NOT_EXIST)
+        if movie is None:
+            errors[index].append(slot_constants.ErrorMessage.MOVIE_NOT_EXIST)
+        if cinema is None or movie is None:
+            continue
+        if row["start_time"] <= now:
+            errors[index].append(slot_constants.ErrorMessage.SLOT_PAST_SCHEDULE)
+        show_date = cinema.local_date(row["start_time"])
+        if show_date < movie.release_date:
+            errors[index].append(slot_constants.ErrorMessage.INVALID_SLOT_DATE)
+
+        slots.append(
+            (
+                index,
+                slot_models.Slot(
+                    cinema_id=row["cinema_id"],
+                    movie_id=row["movie_id"],
+                    start_time=row["start_time"],
+                    end_time=row["start_time"] + movie.duration,
+                    show_date=show_date,
+                    price=row["price"],
+                    capacity=capacities.get(row["cinema_id"], 0),
+                ),
+            )
+        )
+
+    for index in find_overlaps(slots):
+        errors[index].append(slot_constants.ErrorMessage.SLOT_OVERLAPS)
+
+    if errors or dry_run:
+        return [], dict(sorted(errors.items()))
+
+    try:
+        with transaction.atomic():
+            created = slot_models.Slot.objects.bulk_create(
+                (slot for _, slot in slots),
+                batch_size=slot_constants.ScheduleConfig.BATCH_SIZE,
+            )
+            _refresh_after_commit(created)
+    except IntegrityError as error:
+        # Slots created meanwhile, caught by the exclusion constraint
+        if slot_constants.Constraint.NO_OVERLAPPING_SLOTS not in str(error):
+            raise
+        return [], {
+            index: [slot_constants.ErrorMessage.SLOT_OVERLAPS]
+            for index in sorted(find_overlaps(slots))
+        }
+    return created, {}
+
+
+def generate_slots(template, until=None):
+    """
+    Creates the slots of a schedule template from the day after its
+    `generated_until` up to `until`, its `end_date` by default, and
+    returns them. Rerunning it after extending the template only creates
+    the slots of the new days.
+
+    Occurrences are expanded lazily and written in batches of
+    `ScheduleConfig.BATCH_SIZE`, each checked in memory against the
+    existing slots with a single query. Past occurrences are skipped.
+    Raises `ValidationError` with the overlapping start times, nothing is
+    created then.
+    """
+
+    with transaction.atomic():
+        # Locked so that concurrent runs don't generate the same days
+        template.generated_until = (
+            slot_models.ScheduleTemplate.objects.select_for_update()
+            .values_list("generated_until", flat=True)
+            .get(id=template.id)
+        )
+        first_day = template.start_date
+        if template.generated_until is not None:
+            first_day = max(first_day, template.generated_until + timedelta(days=1))
+        last_day = min(until or template.end_date, template.end_date)
+        if first_day > last_day:
+            return []
+
+        movie = template.movie
+        if first_day < movie.release_date:
+            raise ValidationError(slot_constants.ErrorMessage.INVALID_SLOT_DATE)
+        capacity = layouts.get_capacities([template.cinema])[template.cinema_id]
+
+        now = timezone.now()
+        occurrences = (
+            start_time
+            for start_time in template.occurrences(first_day, last_day)
+            if start_time > now
+        )
+        created = []
+        while batch := list(
+            islice(occurrences, slot_constants.ScheduleConfig.BATCH_SIZE)
+        ):
+            slots = [
+                (
+                    start_time,
+                    slot_models.Slot(
+                        cinema_id=template.cinema_id,
+                        movie_id=template.movie_id,
+                        start_time=start_time,
+                        end_time=start_time + movie.duration,
+                        show_date=start_time.date(),
+                        price=template.price,
+                        capacity=capacity,
+                    ),
+                )
+                for start_time in batch
+            ]
+            overlapping = find_overlaps(slots)
+            if overlapping:
+                raise ValidationError(
+                    slot_constants.ErrorMessage.TEMPLATE_OVERLAPS.format(
+                        ", ".join(
+                            timezone.localtime(start_time).strftime("%Y-%m-%d %H:%M")
+                            for start_time in sorted(overlapping)
+                        )
+                    )
+                )
+
+            try:
+                # Savepoint so that a constraint failure can be reported
+                with transaction.atomic():
+                    created += slot_models.Slot.objects.bulk_create(
+                        slot for _, slot in slots
+                    )
+            except IntegrityError as error:
+                if slot_constants.Constraint.NO_OVERLAPPING_SLOTS not in str(error):
+                    raise
+                raise ValidationError(slot_constants.ErrorMessage.SLOT_OVERLAPS)
+
+        _refresh_after_commit(created)
+        template.generated_until = last_day
+        template.save(update_fields=["generated_until", "updated_at"])
+    return created
+
+
+def _refresh_after_commit(slots):
+    """
+    Refreshes the show dates and grids of slots created in bulk, as
+    `bulk_create` sends no `post_save`.
+    """
+
+    if not slots:
+        return
+    transaction.on_commit(
+        partial(
+            showtimes.invalidate_show_dates,
+            {slot.movie_id for slot in slots},
+            {slot.cinema_id for slot in slots},
+        )
+    )
+    transaction.on_commit(
+        partial(
+            grids.refresh_cinema_grids,
+            {(slot.cinema_id, slot.show_date) for slot in slots},
+        )
+    )
+
+
+def find_overlaps(slots):
+    """
+    Returns the keys, row numbers or start times, of the `(key, Slot)`
+    pairs overlapping an existing slot or another pair of the same
+    cinema, bounds included.
+
+    Loads the existing slots of the cinemas in a single query, then
+    sweeps the slots of every cinema sorted by start time.
+    """
+
+    if not slots:
+        return set()
+
+    intervals = defaultdict(list)
+    for cinema_id, start_time, end_time in slot_models.Slot.objects.filter(
+        cinema_id__in={slot.cinema_id for _, slot in slots},
+        start_time__lte=max(slot.end_time for _, slot in slots),
+        end_time__gte=min(slot.start_time for _, slot in slots),
+    ).values_list("cinema_id", "start_time", "end_time"):
+        intervals[cinema_id].append((start_time, end_time, None))
+    for index, slot in slots:
+        intervals[slot.cinema_id].append((slot.start_time, slot.end_time, index))
+
+    overlapping = set()
+    for cinema_intervals in intervals.values():
+        cinema_intervals.sort(key=lambda interval: interval[:2])
+        latest_end, latest_index = None, None
+        for start_time, end_time, index in cinema_intervals:
+            if latest_end is not None and start_time <= latest_end:
+                overlapping.update(
+                    row for row in (index, latest_index) if row is not None
+                )
+            if latest_end is None or end_time > latest_end:
+                latest_end, latest_index = end_time, index
+    return overlapping
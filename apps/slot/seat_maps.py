@@ -0,0 +1,372 @@
+"""
+In-memory seat state for slots.
+
+Every slot gets one `SeatMap` which stores the cinema layout once and a
+bitmap of booked seats indexed by `(row_number, seat_number)`. Maps are
+built from the database on first use and patched in place whenever a
+booking or a cancellation commits, so seat availability can be answered
+without loading `CinemaSeat` rows on every request.
+
+Each map remembers the slot's `seat_version` it reflects. Changes
+committed by other worker processes are replayed from `SeatChange` rows
+when a request sees a newer version on the slot.
+
+Maps are built and patched under a lock of their slot, the process lock
+only guards the cache itself. At most `SeatMapConfig.MAX_SEAT_MAPS` maps
+are kept, the least recently used are dropped first.
+"""
+
+import base64
+import threading
+from array import array
+from collections import OrderedDict
+
+from django.dispatch import receiver
+
+from apps.cinema import layouts
+from apps.slot import (
+    constants as slot_constants,
+    models as slot_models,
+    signals as slot_signals,
+)
+
+
+class SeatMap:
+    """
+    Compact seat state of a single slot.
+
+    Attributes:
+    -----------
+        slot_id: The slot this map belongs to.
+        rows: The number of seating rows of the cinema.
+        seats_per_row: The number of seats in each row.
+        seat_ids: CinemaSeat ids in row-major order, 0 where the
+            layout has no seat.
+        booked: Bitmap with one bit per seat index, set when booked.
+        version: The slot's `seat_version` the map reflects.
+    """
+
+    __slots__ = (
+        "slot_id",
+        "rows",
+        "seats_per_row",
+        "seat_ids",
+        "booked",
+        "version",
+        "_positions",
+        "_layout_mask",
+        "_seat_id_base",
+    )
+
+    def __init__(
+        self, slot_id, rows, seats_per_row, seats, booked_seat_ids=(), version=0
+    ):
+        self.slot_id = slot_id
+        self.rows = rows
+        self.seats_per_row = seats_per_row
+        self.seat_ids = array("q", [0]) * (rows * seats_per_row)
+        self.booked = bytearray((rows * seats_per_row + 7) // 8)
+        self.version = version
+        self._positions = {}
+
+        for seat_id, row_number, seat_number in seats:
+            if row_number > rows or seat_number > seats_per_row:
+                continue
+            position = self.index(row_number, seat_number)
+            self.seat_ids[position] = seat_id
+            self._positions[seat_id] = position
+
+        # Layout facts of the compact format, computed once per map
+        layout = bytearray(len(self.booked))
+        for position in self._positions.values():
+            layout[position >> 3] |= 1 << (position & 7)
+        self._layout_mask = int.from_bytes(layout, "little")
+        base = self.seat_ids[0] if self.seat_ids else 0
+        self._seat_id_base = (
+            base
+            if base
+            and all(seat_id == base + i for i, seat_id in enumerate(self.seat_ids))
+            else None
+        )
+
+        self.mark(booked_seat_ids, available=False)
+
+    def index(self, row_number, seat_number):
+        return (row_number - 1) * self.seats_per_row + (seat_number - 1)
+
+    def is_booked(self, position):
+        return bool(self.booked[position >> 3] & (1 << (position & 7)))
+
+    def is_available(self, row_number, seat_number):
+        return not self.is_booked(self.index(row_number, seat_number))
+
+    def mark(self, seat_ids, available):
+        """
+        Flips the bits of the given CinemaSeat ids.
+        Ids that are not part of this layout are ignored.
+        """
+
+        for seat_id in seat_ids:
+            position = self._positions.get(seat_id)
+            if position is None:
+                continue
+            if available:
+                self.booked[position >> 3] &= ~(1 << (position & 7))
+            else:
+                self.booked[position >> 3] |= 1 << (position & 7)
+
+    def free_runs(self, row_number, held_seat_ids=frozenset()):
+        """
+        Yields `(seat_number, length)` for every run of adjacent
+        available seats in a row.
+        """
+
+        start = self.index(row_number, 1)
+        run_start = None
+        for offset in range(self.seats_per_row + 1):
+            position = start + offset
+            free = (
+                offset < self.seats_per_row
+                and self.seat_ids[position]
+                and not self.is_booked(position)
+                and self.seat_ids[position] not in held_seat_ids
+            )
+            if free and run_start is None:
+                run_start = offset
+            elif not free and run_start is not None:
+                yield run_start + 1, offset - run_start
+                run_start = None
+
+    def seat(self, seat_id, held_seat_ids=frozenset()):
+        """
+        Returns a single seat in the shape of `SeatAvailabilitySerializer`,
+        or None when the seat is not part of this layout.
+        """
+
+        position = self._positions.get(seat_id)
+        if position is None:
+            return None
+        return self._seat(position, seat_id, held_seat_ids)
+
+    def seats(self, held_seat_ids=frozenset(), from_row=1, to_row=None):
+        """
+        Yields every seat of the layout, or of rows `from_row` to `to_row`,
+        in the shape of `SeatAvailabilitySerializer`, held seats are
+        unavailable.
+        """
+
+        for position in range(*self._span(from_row, to_row)):
+            seat_id = self.seat_ids[position]
+            if seat_id:
+                yield self._seat(position, seat_id, held_seat_ids)
+
+    def compact(self, held_seat_ids=frozenset(), from_row=1, to_row=None):
+        """
+        Returns the availability of every seat, or of rows `from_row` to
+        `to_row`, as a base64 bitset with one bit per position counted
+        from the first seat of `from_row`, least significant bit first,
+        set when the seat is available.
+
+        Seat ids come as `seat_id_base` when they follow the layout in
+        row-major order, a seat's id then being `seat_id_base + position`,
+        otherwise as the row-major `seat_ids` list with 0 for gaps.
+        """
+
+        start, end = self._span(from_row, to_row)
+        available = (self._available(held_seat_ids) >> start) & ((1 << end - start) - 1)
+
+        data = {
+            "available": base64.b64encode(
+                available.to_bytes((end - start + 7) // 8, "little")
+            ).decode()
+        }
+        if self._seat_id_base is not None:
+            data["seat_id_base"] = self._seat_id_base + start
+        else:
+            data["seat_ids"] = self.seat_ids[start:end].tolist()
+        return data
+
+    def sections(self, held_seat_ids=frozenset()):
+        """
+        Returns the seat counts of every block of
+        `SeatMapConfig.SECTION_ROWS` rows, so clients can pick the rows
+        to load.
+        """
+
+        available = self._available(held_seat_ids)
+        section_rows = slot_constants.SeatMapConfig.SECTION_ROWS
+        summaries = []
+        for from_row in range(1, self.rows + 1, section_rows):
+            to_row = min(from_row + section_rows - 1, self.rows)
+            start, end = self._span(from_row, to_row)
+            mask = (1 << end - start) - 1
+            summaries.append(
+                {
+                    "from_row": from_row,
+                    "to_row": to_row,
+                    "total": ((self._layout_mask >> start) & mask).bit_count(),
+                    "available": ((available >> start) & mask).bit_count(),
+                }
+            )
+        return summaries
+
+    def _span(self, from_row, to_row):
+        return self.index(from_row, 1), (to_row or self.rows) * self.seats_per_row
+
+    def _available(self, held_seat_ids):
+        available = self._layout_mask & ~int.from_bytes(self.booked, "little")
+        for seat_id in held_seat_ids:
+            position = self._positions.get(seat_id)
+            if position is not None:
+                available &= ~(1 << position)
+        return available
+
+    def _seat(self, position, seat_id, held_seat_ids):
+        return {
+            "id": seat_id,
+            "row_number": position // self.seats_per_row + 1,
+            "seat_number": position % self.seats_per_row + 1,
+            "available": not self.is_booked(position) and seat_id not in held_seat_ids,
+        }
+
+
+# Seat maps and their slot locks by slot id, least recently used first
+_seat_maps = OrderedDict()
+_slot_locks = {}
+_lock = threading.Lock()
+
+
+def _slot_lock(slot_id):
+    with _lock:
+        return _slot_locks.setdefault(slot_id, threading.Lock())
+
+
+def _cached_seat_map(slot_id):
+    with _lock:
+        seat_map = _seat_maps.get(slot_id)
+        if seat_map is not None:
+            _seat_maps.move_to_end(slot_id)
+        return seat_map
+
+
+def _store_seat_map(seat_map):
+    with _lock:
+        _seat_maps[seat_map.slot_id] = seat_map
+        _seat_maps.move_to_end(seat_map.slot_id)
+        while len(_seat_maps) > slot_constants.SeatMapConfig.MAX_SEAT_MAPS:
+            slot_id, _ = _seat_maps.popitem(last=False)
+            _slot_locks.pop(slot_id, None)
+    return seat_map
+
+
+def build_seat_map(slot):
+    """
+    Loads the seat map of a slot from the database.
+    Costs three narrow queries: the seat version, the cinema layout and
+    the booked seat ids. Compact cinemas skip the layout query.
+    """
+
+    # Read first: a change committed meanwhile is replayed on catch-up,
+    # which is harmless as replaying changes in order is idempotent.
+    version = slot_models.Slot.objects.values_list("seat_version", flat=True).get(
+        id=slot.id
+    )
+    seats = layouts.get_seats([slot.cinema])[slot.cinema_id]
+
+    booked_seat_ids = slot_models.BookingSeat.objects.filter(
+        slot_id=slot.id,
+        status=slot_constants.BookingStatus.BOOKED.value,
+    ).values_list("cinema_seat_id", flat=True)
+
+    return SeatMap(
+        slot.id,
+        slot.cinema.rows,
+        slot.cinema.seats_per_row,
+        seats,
+        booked_seat_ids,
+        version,
+    )
+
+
+def get_seat_map(slot):
+    """
+    Returns the cached seat map of a slot, building it on first use.
+
+    A map behind `slot.seat_version` replays the missing `SeatChange`
+    rows, so bookings committed by other worker processes are picked up
+    as soon as the caller loads the slot.
+    """
+
+    with _slot_lock(slot.id):
+        seat_map = _cached_seat_map(slot.id)
+        if (
+            seat_map is None
+            or slot.seat_version - seat_map.version
+            > slot_constants.SeatMapConfig.MAX_CATCH_UP_VERSIONS
+            or seat_map.version < slot.seat_version
+            and not catch_up(seat_map, slot.seat_version)
+        ):
+            # Built under the slot lock so that a commit landing during
+            # the build is applied to the new map instead of being lost.
+            seat_map = _store_seat_map(build_seat_map(slot))
+        return seat_map
+
+
+def catch_up(seat_map, version):
+    """
+    Replays the seat changes between the map's version and `version`.
+    Returns False when some change is missing.
+    """
+
+    changes = list(
+        slot_models.SeatChange.objects.filter(
+            slot_id=seat_map.slot_id,
+            version__gt=seat_map.version,
+            version__lte=version,
+        )
+        .order_by("version")
+        .values_list("version", "seat_ids", "available")
+    )
+    if len(changes) != version - seat_map.version:
+        return False
+
+    for change_version, seat_ids, available in changes:
+        seat_map.mark(seat_ids, available)
+        seat_map.version = change_version
+    return True
+
+
+def rebuild_seat_map(slot):
+    """
+    Consistency path: replaces the cached map with a fresh one
+    loaded from the database.
+    """
+
+    with _slot_lock(slot.id):
+        return _store_seat_map(build_seat_map(slot))
+
+
+def discard_seat_map(slot_id=None):
+    """
+    Drops the cached map of a slot, or every map when no id is given.
+    """
+
+    with _lock:
+        if slot_id is None:
+            _seat_maps.clear()
+            _slot_locks.clear()
+        else:
+            _seat_maps.pop(slot_id, None)
+            _slot_locks.pop(slot_id, None)
+
+
+@receiver(slot_signals.seats_changed)
+def update_seat_map(sender, slot_id, seat_ids, available, version, **kwargs):
+    if _cached_seat_map(slot_id) is None:
+        return
+    with _slot_lock(slot_id):
+        seat_map = _cached_seat_map(slot_id)
+        # Out of order changes are left to `catch_up`
+        if seat_map is not None and version == seat_map.version + 1:
+            seat_map.mark(seat_ids, available)
+            seat_map.version = version
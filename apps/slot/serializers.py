@@ -1,9 +1,26 @@
+from datetime import datetime, timezone as dt_timezone
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 
-from apps.slot import models as slot_models, constants as slot_constants
-from apps.cinema import models as cinema_models
+from apps.slot import (
+    allocation,
+    bookings,
+    exceptions as slot_exceptions,
+    group_commit,
+    holds,
+    models as slot_models,
+    occupancy,
+    schedules,
+    constants as slot_constants,
+    tickets,
+    waiting_room,
+)
+from apps.cinema import layouts, models as cinema_models
 
 
 class SeatAvailabilitySerializer(serializers.ModelSerializer):
@@ -26,46 +43,87 @@ class SeatAvailabilitySerializer(serializers.ModelSerializer):
         ]
 
 
-class BookingSeatSerializer(serializers.ModelSerializer):
+def get_upcoming_slot(slot_id, queryset=slot_models.Slot.objects):
     """
-    Serializer for creating a seat booking.
-    - Validates seat IDs, slot existence, and booking conflicts.
-    - Creates Booking and BookingSeat entries on success.
+    Returns the slot once it is known to be upcoming.
     """
 
-    seat_ids = serializers.ListField(child=serializers.IntegerField(), write_only=True)
+    try:
+        slot = queryset.get(id=slot_id)
+    except slot_models.Slot.DoesNotExist:
+        raise NotFound(slot_constants.ErrorMessage.SLOT_NOT_FOUND)
 
-    def validate(self, attrs):
-        slot_id = self.context["view"].kwargs.get("slot_id")
-        seat_ids = attrs.get("seat_ids")
+    if slot.start_time < timezone.now():
+        raise PermissionDenied(slot_constants.ErrorMessage.PAST_BOOKING_BOOKED)
 
-        try:
-            slot = slot_models.Slot.objects.get(id=slot_id)
-        except slot_models.Slot.DoesNotExist:
-            raise NotFound(slot_constants.ErrorMessage.SLOT_NOT_FOUND)
+    return slot
+
+
+def get_bookable_slot(slot_id, seat_ids):
+    """
+    Returns the slot and its requested CinemaSeats once the slot is known
+    to be upcoming and every seat id belongs to its cinema.
 
-        valid_seats = cinema_models.CinemaSeat.objects.filter(id__in=seat_ids).filter(
-            cinema_id=slot.cinema
+    The slot comes with its movie, cinema and location, so the booking
+    response can be built from these objects without further queries.
+    Seats of compact cinemas come from the layout without any query.
+    """
+
+    slot = get_upcoming_slot(
+        slot_id, slot_models.Slot.objects.select_related("movie", "cinema__location")
+    )
+
+    layout = layouts.get_layout(slot.cinema)
+    if layout is None:
+        seats = list(
+            cinema_models.CinemaSeat.objects.filter(
+                id__in=seat_ids,
+                cinema_id=slot.cinema_id,
+                row_number__lte=slot.cinema.rows,
+                seat_number__lte=slot.cinema.seats_per_row,
+            )
+            .only("id", "row_number", "seat_number")
+            .order_by("row_number", "seat_number")
+        )
+    else:
+        seats = sorted(
+            {layout.seat(seat_id) for seat_id in seat_ids} - {None},
+            key=lambda seat: (seat.row_number, seat.seat_number),
         )
 
-        if valid_seats.count() != len(seat_ids):
-            raise ValidationError(slot_constants.ErrorMessage.INVALID_SEAT)
+    if len(seats) != len(seat_ids):
+        raise ValidationError(slot_constants.ErrorMessage.INVALID_SEAT)
 
-        booked_seats = slot_models.BookingSeat.objects.filter(
-            booking__slot_id=slot_id,
-            cinema_seat__in=seat_ids,
-            booking__status=slot_constants.BookingStatus.BOOKED.value,
+    return slot, seats
+
+
+class BookingSeatSerializer(serializers.ModelSerializer):
+    """
+    Serializer for creating a seat booking.
+    - Validates seat IDs, slot existence and seats held by other users.
+    - Creates Booking and BookingSeat entries in one transaction, booking
+      conflicts are detected by the database on insert. With
+      `BOOKING_GROUP_COMMIT` the insert is batched per slot instead.
+    """
+
+    seat_ids = serializers.ListField(
+        child=serializers.IntegerField(), min_length=1, write_only=True
+    )
+
+    def validate(self, attrs):
+        slot, seats = get_bookable_slot(
+            self.context["view"].kwargs.get("slot_id"), attrs.get("seat_ids")
         )
 
-        if booked_seats:
-            raise ValidationError(
-                    slot_constants.ErrorMessage.BOOKED_SEAT,
-            )
+        held_seats = holds.held_seat_ids(
+            slot.id, exclude_user_id=self.context["request"].user.id
+        ).intersection(attrs["seat_ids"])
 
-        if slot.start_time < timezone.now():
-            raise PermissionDenied(slot_constants.ErrorMessage.PAST_BOOKING_BOOKED)
+        if held_seats:
+            raise slot_exceptions.SeatConflict(held_seats)
 
         attrs["slot"] = slot
+        attrs["seats"] = seats
         return super().validate(attrs)
 
     class Meta:
@@ -74,20 +132,254 @@ class BookingSeatSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         slot = validated_data["slot"]
-        booking = slot_models.Booking.objects.create(
-            user=self.context["request"].user,
-            slot=slot,
-            status=slot_constants.BookingStatus.BOOKED.value,
+        user = self.context["request"].user
+
+        if settings.BOOKING_GROUP_COMMIT:
+            return group_commit.submit(slot, user, validated_data["seat_ids"])
+
+        return bookings.book_seats(slot, user, validated_data["seat_ids"])
+
+
+class BestAvailableSerializer(serializers.Serializer):
+    """
+    Serializer for booking the best block of adjacent seats.
+    - Validates party size, row range and slot existence.
+    - Picks the block from the slot's seat map and books it through
+      the regular booking path.
+    """
+
+    party_size = serializers.IntegerField(
+        min_value=1, max_value=slot_constants.AllocationConfig.MAX_PARTY_SIZE
+    )
+    from_row = serializers.IntegerField(min_value=1, default=1)
+    to_row = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, attrs):
+        if attrs.get("to_row") and attrs["from_row"] > attrs["to_row"]:
+            raise ValidationError(slot_constants.ErrorMessage.INVALID_ROW_RANGE)
+
+        attrs["slot"] = get_upcoming_slot(
+            self.context["view"].kwargs.get("slot_id"),
+            slot_models.Slot.objects.select_related("movie", "cinema__location"),
         )
+        return attrs
 
-        seat_ids = validated_data["seat_ids"]
-        booking_seats = [
-            slot_models.BookingSeat(cinema_seat_id=seat_id, booking=booking)
-            for seat_id in seat_ids
-        ]
+    def create(self, validated_data):
+        return allocation.book_best_available(
+            validated_data["slot"],
+            self.context["request"].user,
+            validated_data["party_size"],
+            validated_data["from_row"],
+            validated_data.get("to_row"),
+        )
 
-        slot_models.BookingSeat.objects.bulk_create(booking_seats)
-        return booking
+
+class CheckoutItemSerializer(serializers.Serializer):
+    slot_id = serializers.IntegerField()
+    seat_ids = serializers.ListField(
+        child=serializers.IntegerField(), min_length=1, write_only=True
+    )
+    # Needed for slots that are in the waiting room
+    queue_token = serializers.CharField(required=False, write_only=True)
+
+
+class CheckoutSerializer(serializers.Serializer):
+    """
+    Serializer for booking seats of several slots at once.
+    - Validates all slots and all seats with one query each, and the
+      holds and waiting room of every slot from the cache.
+    - Books every slot in one transaction with bulk inserts, all or
+      nothing.
+    """
+
+    items = CheckoutItemSerializer(
+        many=True,
+        min_length=1,
+        max_length=slot_constants.CheckoutConfig.MAX_SLOTS,
+    )
+
+    def validate_items(self, items):
+        slot_ids = [item["slot_id"] for item in items]
+        if len(set(slot_ids)) != len(slot_ids):
+            raise ValidationError(slot_constants.ErrorMessage.DUPLICATE_CART_SLOT)
+        return items
+
+    def validate(self, attrs):
+        user = self.context["request"].user
+        items = attrs["items"]
+
+        slots = slot_models.Slot.objects.select_related(
+            "movie", "cinema__location"
+        ).in_bulk([item["slot_id"] for item in items])
+        if len(slots) != len(items):
+            raise NotFound(slot_constants.ErrorMessage.SLOT_NOT_FOUND)
+        if any(slot.start_time < timezone.now() for slot in slots.values()):
+            raise PermissionDenied(slot_constants.ErrorMessage.PAST_BOOKING_BOOKED)
+
+        seats = {}
+        seat_mode_ids = set()
+        for item in items:
+            layout = layouts.get_layout(slots[item["slot_id"]].cinema)
+            if layout is None:
+                seat_mode_ids.update(item["seat_ids"])
+                continue
+            for seat_id in item["seat_ids"]:
+                seat = layout.seat(seat_id)
+                if seat is not None:
+                    seats[seat_id] = seat
+        if seat_mode_ids:
+            seats.update(
+                cinema_models.CinemaSeat.objects.only(
+                    "id", "row_number", "seat_number", "cinema_id"
+                ).in_bulk(seat_mode_ids)
+            )
+
+        conflicts = {}
+        attrs["seat_ids_by_slot"] = {}
+        attrs["seats"] = {}
+        for item in items:
+            slot = slots[item["slot_id"]]
+            seat_ids = item["seat_ids"]
+            if len(set(seat_ids)) != len(seat_ids) or any(
+                seat_id not in seats
+                or seats[seat_id].cinema_id_id != slot.cinema_id
+                or seats[seat_id].row_number > slot.cinema.rows
+                or seats[seat_id].seat_number > slot.cinema.seats_per_row
+                for seat_id in seat_ids
+            ):
+                raise ValidationError(slot_constants.ErrorMessage.INVALID_SEAT)
+
+            waiting_room.check_admission(slot.id, item.get("queue_token"))
+
+            held_seats = holds.held_seat_ids(
+                slot.id, exclude_user_id=user.id
+            ).intersection(seat_ids)
+            if held_seats:
+                conflicts[slot.id] = held_seats
+
+            attrs["seat_ids_by_slot"][slot] = seat_ids
+            attrs["seats"][slot.id] = sorted(
+                (seats[seat_id] for seat_id in seat_ids),
+                key=lambda seat: (seat.row_number, seat.seat_number),
+            )
+
+        if conflicts:
+            raise slot_exceptions.CartConflict(conflicts)
+
+        return attrs
+
+    def create(self, validated_data):
+        return bookings.book_cart(
+            self.context["request"].user, validated_data["seat_ids_by_slot"]
+        )
+
+
+class TicketVerifySerializer(serializers.Serializer):
+    """
+    Serializer for verifying an e-ticket at the gate.
+    - Checks the ticket signature and its revocation without querying
+      the database, optionally for a given slot.
+    """
+
+    ticket = serializers.CharField(write_only=True)
+    slot_id = serializers.IntegerField(required=False)
+    booking_id = serializers.IntegerField(read_only=True)
+    seat_ids = serializers.ListField(child=serializers.IntegerField(), read_only=True)
+
+    def validate(self, attrs):
+        try:
+            return tickets.verify_ticket(attrs["ticket"], attrs.get("slot_id"))
+        except tickets.InvalidTicket as error:
+            raise ValidationError({"ticket": str(error)})
+
+
+class ScheduleRowSerializer(serializers.Serializer):
+    """
+    Serializer for one slot of a bulk schedule import.
+    """
+
+    cinema_id = serializers.IntegerField()
+    movie_id = serializers.IntegerField()
+    start_time = serializers.DateTimeField()
+    price = serializers.DecimalField(max_digits=8, decimal_places=2)
+
+
+class ScheduleImportSerializer(serializers.Serializer):
+    """
+    Serializer for a bulk schedule import.
+    - Takes the slots as a JSON list, or a CSV / JSON schedule `file`.
+    - Row errors are reported under `rows`, keyed by row number from 1.
+    - Creates every slot at once, see `apps.slot.schedules`.
+    """
+
+    slots = serializers.ListField(child=serializers.DictField(), required=False)
+    file = serializers.FileField(required=False, write_only=True)
+    dry_run = serializers.BooleanField(default=False, write_only=True)
+
+    def validate(self, attrs):
+        if "file" in attrs:
+            upload = attrs.pop("file")
+            try:
+                attrs["slots"] = schedules.read_schedule(
+                    upload.read().decode(),
+                    "csv" if upload.name.lower().endswith(".csv") else "json",
+                )
+            except (schedules.InvalidScheduleFile, UnicodeDecodeError):
+                raise ValidationError(
+                    {"file": slot_constants.ErrorMessage.INVALID_SCHEDULE_FILE}
+                )
+
+        rows = attrs.get("slots")
+        if not rows or len(rows) > slot_constants.ScheduleConfig.MAX_ROWS:
+            raise ValidationError(
+                {"slots": slot_constants.ErrorMessage.INVALID_SCHEDULE_FILE}
+            )
+
+        serializer = ScheduleRowSerializer(data=rows, many=True)
+        if not serializer.is_valid():
+            errors = serializer.errors
+            if isinstance(errors, list):
+                errors = dict(enumerate(errors))
+            raise ValidationError(
+                {
+                    "rows": {
+                        index + 1: row_errors
+                        for index, row_errors in errors.items()
+                        if row_errors
+                    }
+                }
+            )
+        attrs["slots"] = serializer.validated_data
+        return attrs
+
+    def create(self, validated_data):
+        created, errors = schedules.import_schedule(
+            validated_data["slots"], dry_run=validated_data["dry_run"]
+        )
+        if errors:
+            raise ValidationError({"rows": errors})
+        return created
+
+
+class AvailabilitySummarySerializer(serializers.Serializer):
+    """
+    Serializer for the query of the batch availability summary.
+    - `ids` is a comma separated list of slot ids, duplicates are ignored.
+    - `bitmap` adds the per seat bitmap of every slot.
+    """
+
+    ids = serializers.CharField()
+    bitmap = serializers.BooleanField(default=False)
+
+    def validate_ids(self, value):
+        try:
+            slot_ids = list(dict.fromkeys(int(slot_id) for slot_id in value.split(",")))
+        except ValueError:
+            raise ValidationError(slot_constants.ErrorMessage.INVALID_SLOT_IDS)
+
+        if len(slot_ids) > slot_constants.AvailabilitySummaryConfig.MAX_SLOTS:
+            raise ValidationError(slot_constants.ErrorMessage.INVALID_SLOT_IDS)
+        return slot_ids
 
 
 class BookingCancelSerializer(serializers.Serializer):
@@ -119,17 +411,82 @@ class BookingCancelSerializer(serializers.Serializer):
 
     def create(self, validated_data):
         booking = validated_data["booking"]
-        booking.status = slot_constants.BookingStatus.CANCELLED.value
-        booking.save()
+        cancelled = slot_constants.BookingStatus.CANCELLED.value
+
+        with transaction.atomic():
+            # Only one of concurrent cancellations flips the status, the
+            # others must not release the seats a second time
+            if not slot_models.Booking.objects.filter(
+                pk=booking.pk, status=slot_constants.BookingStatus.BOOKED.value
+            ).update(status=cancelled):
+                booking.status = cancelled
+                return booking
+            booking.status = cancelled
+            seat_ids = list(booking.seats.values_list("cinema_seat_id", flat=True))
+            booking.seats.update(status=cancelled)
+            bookings.seats_released(booking.slot_id, seat_ids)
+            transaction.on_commit(
+                partial(tickets.revoke_ticket, booking.slot_id, booking.id)
+            )
+
         return booking
 
 
+class SeatHoldSerializer(serializers.Serializer):
+    """
+    Serializer for holding seats of a slot for a few minutes.
+    - Validates seat IDs and slot existence.
+    - Places the hold in the cache, conflicting holds are rejected.
+    """
+
+    id = serializers.CharField(read_only=True)
+    slot_id = serializers.IntegerField(read_only=True)
+    seat_ids = serializers.ListField(child=serializers.IntegerField(), min_length=1)
+    minutes = serializers.IntegerField(
+        min_value=1,
+        max_value=slot_constants.SeatHoldConfig.MAX_MINUTES,
+        default=slot_constants.SeatHoldConfig.DEFAULT_MINUTES,
+        write_only=True,
+    )
+    expires_at = serializers.SerializerMethodField()
+
+    def get_expires_at(self, obj):
+        return datetime.fromtimestamp(obj["expires_at"], tz=dt_timezone.utc)
+
+    def validate(self, attrs):
+        slot, _ = get_bookable_slot(
+            self.context["view"].kwargs.get("slot_id"), attrs["seat_ids"]
+        )
+
+        booked_seats = slot_models.BookingSeat.objects.filter(
+            slot=slot,
+            cinema_seat_id__in=attrs["seat_ids"],
+            status=slot_constants.BookingStatus.BOOKED.value,
+        ).values_list("cinema_seat_id", flat=True)
+
+        if booked_seats:
+            raise slot_exceptions.SeatConflict(booked_seats)
+
+        attrs["slot"] = slot
+        return attrs
+
+    def create(self, validated_data):
+        return holds.place_hold(
+            validated_data["slot"].id,
+            self.context["request"].user.id,
+            validated_data["seat_ids"],
+            validated_data["minutes"],
+        )
+
+
 class SlotSerializer(serializers.ModelSerializer):
     """
     Serializer for Slot Model.
     Converts slot model instances to/from JSON.
     """
 
+    availability = serializers.SerializerMethodField()
+
     class Meta:
         model = slot_models.Slot
         fields = [
@@ -137,4 +494,10 @@ class SlotSerializer(serializers.ModelSerializer):
             "start_time",
             "end_time",
             "price",
+            "booked_count",
+            "capacity",
+            "availability",
         ]
+
+    def get_availability(self, slot):
+        return occupancy.availability(slot)
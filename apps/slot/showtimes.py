@@ -0,0 +1,211 @@
+"""
+Showtime listings of a movie or a cinema.
+
+`?date=` lists the slots of one local show date. `?from=&to=` lists a
+strip of dates in one response, grouped by date, from the same two
+queries: the movies or cinemas showing, and one prefetch of their slots.
+
+The calendar of upcoming show dates of a movie or cinema is cached per
+movie or cinema:
+
+- `show-dates-generation:<field>:<id>` is bumped whenever a slot of the
+  movie or cinema is saved, deleted or created in bulk.
+- `show-dates:<field>:<id>:<generation>:<city>` holds the dates, so a
+  bump invalidates the dates of every city at once.
+"""
+
+import copy
+from datetime import datetime, timedelta
+from functools import partial
+from itertools import groupby
+from urllib.parse import quote
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from rest_framework import exceptions, generics
+from rest_framework.response import Response
+
+from apps.slot import constants as slot_constants, models as slot_models
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise exceptions.ValidationError(
+            slot_constants.ErrorMessage.INVALID_DATE_FORMAT
+        )
+
+
+def parse_show_dates(query_params):
+    """
+    Returns the `(from_date, to_date)` of a listing, a single day for
+    `date`.
+    """
+
+    if query_params.get("date"):
+        show_date = parse_date(query_params["date"])
+        return show_date, show_date
+
+    if not query_params.get("from") and not query_params.get("to"):
+        raise exceptions.ValidationError(
+            slot_constants.ErrorMessage.DATE_PARAM_REQUIRED
+        )
+    if not query_params.get("from") or not query_params.get("to"):
+        raise exceptions.ValidationError(slot_constants.ErrorMessage.INVALID_DATE_RANGE)
+
+    from_date, to_date = parse_date(query_params["from"]), parse_date(
+        query_params["to"]
+    )
+    if not 0 <= (to_date - from_date).days < slot_constants.ShowtimeConfig.MAX_DAYS:
+        raise exceptions.ValidationError(slot_constants.ErrorMessage.INVALID_DATE_RANGE)
+    return from_date, to_date
+
+
+class ShowtimeListMixin:
+    """
+    List view of the movies, or cinemas, showing on a date or a range of
+    dates. `get_queryset` returns them with their slots, ordered by start
+    time, prefetched to `slots`.
+
+    A range is returned as one entry per date, the movies or cinemas of
+    that date under `group_key` with the slots of that date only.
+    """
+
+    group_key = None
+
+    def get_show_dates(self):
+        if not hasattr(self, "_show_dates"):
+            self._show_dates = parse_show_dates(self.request.query_params)
+        return self._show_dates
+
+    def list(self, request, *args, **kwargs):
+        from_date, to_date = self.get_show_dates()
+        if request.query_params.get("date"):
+            response = super().list(request, *args, **kwargs)
+        else:
+            response = Response(self.group_by_date(from_date, to_date))
+
+        patch_cache_control(
+            response, public=True, max_age=slot_constants.ShowtimeConfig.CACHE_SECONDS
+        )
+        return response
+
+    def group_by_date(self, from_date, to_date):
+        days = {
+            from_date + timedelta(days=offset): []
+            for offset in range((to_date - from_date).days + 1)
+        }
+        for instance in self.get_queryset():
+            for show_date, slots in groupby(
+                instance.slots, key=lambda slot: slot.show_date
+            ):
+                # A shallow copy per date, carrying that date's slots
+                day_instance = copy.copy(instance)
+                day_instance.slots = list(slots)
+                days[show_date].append(day_instance)
+
+        return [
+            {
+                "date": show_date.isoformat(),
+                self.group_key: self.get_serializer(instances, many=True).data,
+            }
+            for show_date, instances in days.items()
+        ]
+
+
+def _generation_key(field, object_id):
+    return f"show-dates-generation:{field}:{object_id}"
+
+
+def get_show_dates(field, object_id, city=None):
+    """
+    Returns the distinct local show dates of the upcoming slots of a
+    movie or cinema, `field` being `movie_id` or `cinema_id`, optionally
+    of the cinemas of a city only.
+
+    A cache miss costs one `DISTINCT` query served by the show date
+    indexes.
+    """
+
+    city = (city or "").lower().strip()
+    generation = cache.get_or_set(_generation_key(field, object_id), 0, None)
+    key = f"show-dates:{field}:{object_id}:{generation}:{quote(city)}"
+
+    dates = cache.get(key)
+    if dates is None:
+        queryset = slot_models.Slot.objects.filter(
+            **{field: object_id},
+            # Bounds the index scan, dates before can't be upcoming
+            show_date__gte=timezone.localdate() - timedelta(days=1),
+            start_time__gte=timezone.now(),
+        )
+        if city:
+            queryset = queryset.filter(cinema__location__city=city)
+        dates = [
+            show_date.isoformat()
+            for show_date in queryset.order_by("show_date")
+            .values_list("show_date", flat=True)
+            .distinct()
+        ]
+        cache.set(key, dates, slot_constants.ShowtimeConfig.CACHE_SECONDS)
+    return dates
+
+
+def invalidate_show_dates(movie_ids=(), cinema_ids=()):
+    """
+    Drops the cached show dates of movies and cinemas.
+    """
+
+    for field, object_ids in (("movie_id", movie_ids), ("cinema_id", cinema_ids)):
+        for object_id in set(object_ids):
+            try:
+                cache.incr(_generation_key(field, object_id))
+            except ValueError:
+                # Nothing was cached under this generation
+                pass
+
+
+@receiver(post_save, sender=slot_models.Slot)
+@receiver(post_delete, sender=slot_models.Slot)
+def invalidate_slot_show_dates(sender, instance, **kwargs):
+    # After the commit, so that a read in between can't cache the old dates
+    transaction.on_commit(
+        partial(invalidate_show_dates, [instance.movie_id], [instance.cinema_id])
+    )
+
+
+class ShowDatesView(generics.GenericAPIView):
+    """
+    Upcoming show dates of a movie or cinema, for calendars to grey out
+    the days without shows. `lookup_url_kwarg` names both the URL
+    argument and the `Slot` field, `?city=` keeps the dates of a city
+    when `city_filter` is set.
+
+    Cached, see `get_show_dates`, the movie or cinema is only looked up
+    when it has no upcoming dates.
+    """
+
+    model = None
+    city_filter = False
+    not_found_message = None
+
+    def get(self, request, *args, **kwargs):
+        object_id = kwargs[self.lookup_url_kwarg]
+        dates = get_show_dates(
+            self.lookup_url_kwarg,
+            object_id,
+            request.query_params.get("city") if self.city_filter else None,
+        )
+        if not dates and not self.model.objects.filter(id=object_id).exists():
+            raise exceptions.NotFound(self.not_found_message)
+
+        response = Response({"dates": dates})
+        patch_cache_control(
+            response, public=True, max_age=slot_constants.ShowtimeConfig.CACHE_SECONDS
+        )
+        return response
@@ -0,0 +1,11 @@
+from django.dispatch import Signal
+
+# Sent once a booking or cancellation has been committed.
+# Arguments: slot_id, seat_ids (CinemaSeat ids), available (False when
+# the seats were booked, True when they were released) and version, the
+# slot's `seat_version` after the change.
+seats_changed = Signal()
+
+# Sent when seats are held or their hold is released / expires.
+# Arguments: slot_id, seat_ids and held.
+seat_holds_changed = Signal()
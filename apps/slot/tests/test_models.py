@@ -0,0 +1,234 @@
+from datetime import timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+
+from ddf import G
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.cinema import models as cinema_models
+from apps.movie import models as movie_models
+from apps.slot import constants as slot_constants, models as slot_models, schedules
+
+
+class SlotModelTests(TestCase):
+    """
+    Tests for the Slot model
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cinema = G(cinema_models.Cinema, rows=1, seats_per_row=1)
+        cls.movie = G(
+            movie_models.Movie,
+            duration=timedelta(hours=2),
+            release_date=timezone.now().date() - timedelta(days=1),
+        )
+        cls.start_time = timezone.now() + timedelta(days=1)
+        cls.slot = G(
+            slot_models.Slot,
+            cinema=cls.cinema,
+            movie=cls.movie,
+            start_time=cls.start_time,
+            price=100,
+        )
+
+    def create_slot(self, start_time, cinema=None):
+        return slot_models.Slot.objects.create(
+            cinema=cinema or self.cinema,
+            movie=self.movie,
+            start_time=start_time,
+            price=100,
+        )
+
+    def test_overlapping_slots_are_rejected(self):
+        """
+        Ensure slots starting, ending, lying within or containing another
+        slot of the same cinema are rejected, the bounds included.
+        """
+        for offset in (-1, 1, 2):
+            with self.subTest(offset=offset):
+                with self.assertRaisesMessage(
+                    ValidationError, slot_constants.ErrorMessage.SLOT_OVERLAPS
+                ):
+                    self.create_slot(self.start_time + timedelta(hours=offset))
+
+        long_movie = G(
+            movie_models.Movie,
+            duration=timedelta(hours=6),
+            release_date=self.movie.release_date,
+        )
+        with self.assertRaisesMessage(
+            ValidationError, slot_constants.ErrorMessage.SLOT_OVERLAPS
+        ):
+            slot_models.Slot.objects.create(
+                cinema=self.cinema,
+                movie=long_movie,
+                start_time=self.start_time - timedelta(hours=3),
+                price=100,
+            )
+
+    def test_separate_slots_are_accepted(self):
+        """
+        Ensure later slots and slots of other cinemas are accepted, and a
+        slot can be saved again without overlapping itself.
+        """
+        self.create_slot(self.start_time + timedelta(hours=2, minutes=1))
+        self.create_slot(
+            self.start_time, cinema=G(cinema_models.Cinema, rows=1, seats_per_row=1)
+        )
+
+        self.slot.price = 120
+        self.slot.save()
+
+    def test_show_date_is_local_to_the_cinema(self):
+        """
+        Ensure the show date follows the cinema's time zone.
+        """
+        cinema = G(
+            cinema_models.Cinema, rows=1, seats_per_row=1, timezone="America/New_York"
+        )
+        start_time = timezone.localtime(self.start_time, cinema.tzinfo).replace(
+            hour=23, minute=0
+        )
+        slot = self.create_slot(start_time, cinema=cinema)
+        self.assertEqual(slot.show_date, start_time.date())
+        self.assertNotEqual(
+            slot.show_date, start_time.astimezone(dt_timezone.utc).date()
+        )
+        self.assertEqual(
+            list(
+                slot_models.Slot.objects.filter(cinema=cinema).on_date(slot.show_date)
+            ),
+            [slot],
+        )
+
+    def test_date_listings_use_show_date_indexes(self):
+        """
+        Ensure slots of a date are found through the show date indexes
+        instead of scanning every slot of the cinema or movie.
+        """
+        show_date = self.slot.show_date
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                # Tables this small are cheaper to scan otherwise
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+            for queryset, index in (
+                (
+                    slot_models.Slot.objects.filter(cinema=self.cinema),
+                    slot_constants.Index.SLOT_CINEMA_SHOW_DATE,
+                ),
+                (
+                    slot_models.Slot.objects.filter(movie=self.movie),
+                    slot_constants.Index.SLOT_MOVIE_SHOW_DATE,
+                ),
+            ):
+                with self.subTest(index=index):
+                    self.assertIn(index, queryset.on_date(show_date).explain())
+
+
+class ScheduleTemplateTests(TestCase):
+    """
+    Tests for recurring schedule templates
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cinema = G(cinema_models.Cinema, rows=2, seats_per_row=2)
+        cls.movie = G(
+            movie_models.Movie,
+            duration=timedelta(hours=2),
+            release_date=timezone.now().date() - timedelta(days=1),
+        )
+        cls.start_date = timezone.localdate() + timedelta(days=1)
+
+    def create_template(self, days, **fields):
+        template = self.template(days, **fields)
+        template.save()
+        return template
+
+    def template(self, days, **fields):
+        return slot_models.ScheduleTemplate(
+            **{
+                "cinema": self.cinema,
+                "movie": self.movie,
+                "weekdays": list(range(7)),
+                "times": ["10:00", "13:30", "17:00"],
+                "start_date": self.start_date,
+                "end_date": self.start_date + timedelta(days=days - 1),
+                "price": 150,
+                **fields,
+            }
+        )
+
+    def test_generate_slots_in_batches_and_incrementally(self):
+        """
+        Ensure slots are created in batches, and extending the template
+        only generates the new days.
+        """
+        template = self.create_template(days=7)
+
+        with mock.patch.object(slot_constants.ScheduleConfig, "BATCH_SIZE", 10):
+            # Lock, capacity, then per batch the existing slots and the
+            # insert with its savepoint (3 x 4), the update and the
+            # transaction savepoint (2)
+            with self.assertNumQueries(17):
+                slots = schedules.generate_slots(template)
+        self.assertEqual(len(slots), 21)
+        self.assertEqual(template.generated_until, template.end_date)
+
+        slot = slot_models.Slot.objects.earliest("start_time")
+        self.assertEqual(
+            timezone.localtime(slot.start_time).strftime("%Y-%m-%d %H:%M"),
+            f"{self.start_date} 10:00",
+        )
+        self.assertEqual(
+            (slot.end_time - slot.start_time, slot.capacity), (self.movie.duration, 4)
+        )
+
+        self.assertEqual(schedules.generate_slots(template), [])
+        template.end_date += timedelta(days=2)
+        template.save()
+        self.assertEqual(len(schedules.generate_slots(template)), 6)
+        self.assertEqual(slot_models.Slot.objects.count(), 27)
+
+    def test_generate_slots_rejects_overlaps(self):
+        """
+        Ensure a template overlapping existing slots creates nothing and
+        reports the overlapping times.
+        """
+        schedules.generate_slots(self.create_template(days=3))
+        template = self.create_template(days=3, times=["09:00", "11:00"])
+
+        with self.assertRaisesMessage(
+            ValidationError, f"{self.start_date} 09:00, {self.start_date} 11:00"
+        ):
+            schedules.generate_slots(template)
+        template.refresh_from_db()
+        self.assertIsNone(template.generated_until)
+        self.assertEqual(slot_models.Slot.objects.count(), 9)
+
+    def test_template_validation_and_command(self):
+        """
+        Ensure invalid rules are rejected and the command only generates
+        pending templates.
+        """
+        for fields in ({"weekdays": [7]}, {"times": ["25:00"]}, {"times": []}):
+            with self.subTest(fields=fields):
+                with self.assertRaises(ValidationError):
+                    self.template(days=1, **fields).full_clean()
+
+        done = self.create_template(days=1, times=["09:00"])
+        schedules.generate_slots(done)
+        self.create_template(
+            days=2, times=["20:00"], weekdays=[self.start_date.weekday()]
+        )
+
+        out = StringIO()
+        call_command("generate_slots", stdout=out)
+        self.assertEqual(out.getvalue().count("created 1 slots"), 1)
+        self.assertEqual(slot_models.Slot.objects.count(), 2)
@@ -0,0 +1,133 @@
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from ddf import G
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.cinema import models as cinema_models
+from apps.movie import models as movie_models
+from apps.slot import (
+    bookings,
+    exceptions as slot_exceptions,
+    group_commit,
+    models as slot_models,
+    serializers as slot_serializers,
+)
+
+User = get_user_model()
+
+
+class BookingSerializerTests(APITestCase):
+    """
+    Tests for the booking serializers
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.location = G(cinema_models.Location, city="testcity")
+        cls.cinema = G(
+            cinema_models.Cinema,
+            name="Test Cinema",
+            location=cls.location,
+            rows=2,
+            seats_per_row=3,
+        )
+        cls.movie = G(
+            movie_models.Movie,
+            name="Test Movie",
+            duration=timedelta(hours=2),
+            release_date=timezone.now().date() - timedelta(days=1),
+        )
+        cls.slot = G(
+            slot_models.Slot,
+            cinema=cls.cinema,
+            movie=cls.movie,
+            start_time=timezone.now() + timedelta(days=2),
+            price=100.00,
+        )
+        cls.user = G(User, email="test@gmail.com", phone_number="1234567890")
+        cls.other_user = G(User, email="other@gmail.com", phone_number="1234567891")
+        cls.seat_ids = list(
+            cinema_models.CinemaSeat.objects.filter(cinema_id=cls.cinema)
+            .order_by("row_number", "seat_number")
+            .values_list("id", flat=True)
+        )
+
+    def get_serializer(self, seat_ids, user=None):
+        return slot_serializers.BookingSeatSerializer(
+            data={"seat_ids": seat_ids},
+            context={
+                "view": SimpleNamespace(kwargs={"slot_id": self.slot.id}),
+                "request": SimpleNamespace(user=user or self.user),
+            },
+        )
+
+    @override_settings(BOOKING_GROUP_COMMIT=True)
+    def test_booking_through_group_commit(self):
+        """
+        Ensure the serializer books through the queue when enabled.
+        """
+        serializer = self.get_serializer(self.seat_ids[:2])
+        serializer.is_valid(raise_exception=True)
+        booking = serializer.save()
+
+        self.assertEqual(booking.slot, self.slot)
+        self.assertEqual(
+            sorted(booking.seats.values_list("cinema_seat_id", flat=True)),
+            self.seat_ids[:2],
+        )
+
+    def test_group_commit_batch_resolves_each_request(self):
+        """
+        Ensure a batch is validated against one snapshot: the later of two
+        overlapping requests conflicts, the others are booked together.
+        """
+        requests = [
+            group_commit.BookingRequest(self.user, self.seat_ids[:2]),
+            group_commit.BookingRequest(self.other_user, self.seat_ids[1:3]),
+            group_commit.BookingRequest(self.other_user, self.seat_ids[3:4]),
+        ]
+
+        # Snapshot, one insert per table and the seat version bump
+        with self.assertNumQueries(8):
+            group_commit.commit_batch(self.slot, requests)
+
+        self.assertIsNotNone(requests[0].booking)
+        self.assertIsInstance(requests[1].error, slot_exceptions.SeatConflict)
+        self.assertEqual(requests[1].error.detail["seat_ids"], [self.seat_ids[1]])
+        self.assertIsNotNone(requests[2].booking)
+        self.assertEqual(
+            slot_models.BookingSeat.objects.filter(slot=self.slot).count(), 3
+        )
+
+    def test_group_commit_fallback_retries_rejected_requests(self):
+        """
+        Ensure a request rejected in favour of another of its batch is
+        retried when the batch falls back to one commit per request.
+        """
+        bookings.book_seats(self.slot, self.other_user, self.seat_ids[:1])
+        requests = [
+            group_commit.BookingRequest(self.user, self.seat_ids[:2]),
+            group_commit.BookingRequest(self.other_user, self.seat_ids[1:3]),
+        ]
+
+        # The seat booked above is missed by the snapshot, as if booked
+        # by another process right after it
+        seat_filter = slot_models.BookingSeat.objects.filter
+        stale = [slot_models.BookingSeat.objects.none()]
+        with mock.patch.object(
+            slot_models.BookingSeat.objects,
+            "filter",
+            side_effect=lambda *args, **kwargs: (
+                stale.pop() if stale else seat_filter(*args, **kwargs)
+            ),
+        ):
+            group_commit.commit_batch(self.slot, requests)
+
+        self.assertIsInstance(requests[0].error, slot_exceptions.SeatConflict)
+        self.assertEqual(requests[0].error.detail["seat_ids"], [self.seat_ids[0]])
+        self.assertIsNotNone(requests[1].booking)
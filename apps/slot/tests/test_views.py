@@ -0,0 +1,1325 @@
+import asyncio
+import base64
+import json
+import multiprocessing
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial
+from io import StringIO
+from itertools import pairwise
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from ddf import G
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, transaction
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.cinema import constants as cinema_constants, models as cinema_models
+from apps.common import cache as common_cache, constants as common_constants
+from apps.movie import models as movie_models
+from apps.slot import (
+    bookings,
+    checks as slot_checks,
+    constants as slot_constants,
+    grids,
+    holds,
+    models as slot_models,
+    occupancy,
+    seat_maps,
+    serializers as slot_serializer,
+    signals as slot_signals,
+    tickets,
+    waiting_room,
+)
+from apps.slot.management.commands import rebuild_showtime_grids
+
+User = get_user_model()
+
+
+class SlotViewTests(APITestCase):
+    """
+    Tests for Slot Views
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.location = G(cinema_models.Location, city="testcity")
+        cls.cinema = G(
+            cinema_models.Cinema,
+            name="Test Cinema",
+            location=cls.location,
+            rows=2,
+            seats_per_row=3,
+        )
+        cls.movie = G(
+            movie_models.Movie,
+            name="Test Movie",
+            duration=timedelta(hours=2),
+            release_date=timezone.now().date() - timedelta(days=1),
+        )
+        cls.slot = G(
+            slot_models.Slot,
+            cinema=cls.cinema,
+            movie=cls.movie,
+            start_time=timezone.now() + timedelta(days=2),
+            price=100.00,
+        )
+        cls.user = G(User, email="test@gmail.com", phone_number="1234567890")
+        cls.other_user = G(User, email="other@gmail.com", phone_number="1234567891")
+        cls.staff = G(
+            User, email="staff@gmail.com", phone_number="1234567892", is_staff=True
+        )
+        cls.seats = list(
+            cinema_models.CinemaSeat.objects.filter(cinema_id=cls.cinema).order_by(
+                "row_number", "seat_number"
+            )
+        )
+
+    def setUp(self):
+        seat_maps.discard_seat_map()
+        tickets.discard_revocations()
+        cache.clear()
+        waiting_room.set_slot_state(self.slot.id, False, None)
+
+    def book(self, seats, user=None, **extra):
+        self.client.force_authenticate(user=user or self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                reverse("booking_seat", args=[self.slot.id]),
+                {"seat_ids": [seat.id for seat in seats]},
+                format="json",
+                **extra,
+            )
+
+    def get_seats(self):
+        response = self.client.get(reverse("available_seats", args=[self.slot.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {seat["id"]: seat["available"] for seat in response.data["seats"]}
+
+    def test_seat_availability(self):
+        """
+        Ensure every seat of the layout is returned as available
+        along with the cinema details.
+        """
+        response = self.client.get(reverse("available_seats", args=[self.slot.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["cinema"], self.cinema.name)
+        self.assertEqual(response.data["rows"], 2)
+        self.assertEqual(len(response.data["seats"]), 6)
+        self.assertEqual(
+            response.data["seats"][4],
+            {
+                "id": self.seats[4].id,
+                "row_number": 2,
+                "seat_number": 2,
+                "available": True,
+            },
+        )
+
+    def test_seat_availability_unknown_slot(self):
+        """
+        Ensure an unknown slot returns 404 NOT FOUND.
+        """
+        response = self.client.get(reverse("available_seats", args=[0]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_seat_map_follows_bookings_and_cancellations(self):
+        """
+        Ensure the cached seat map is patched on booking and cancellation
+        and answers without querying CinemaSeat.
+        """
+        self.get_seats()
+
+        response = self.book(self.seats[:2])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(1):
+            availability = self.get_seats()
+        self.assertFalse(availability[self.seats[0].id])
+        self.assertFalse(availability[self.seats[1].id])
+        self.assertTrue(availability[self.seats[2].id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                reverse("booking_cancel", args=[response.data["booking"]])
+            )
+        self.assertTrue(all(self.get_seats().values()))
+
+    def test_seat_map_rebuild_matches_database(self):
+        """
+        Ensure a rebuilt map reflects bookings made behind its back.
+        """
+        slot = slot_models.Slot.objects.select_related("cinema").get(id=self.slot.id)
+        self.assertTrue(seat_maps.get_seat_map(slot).is_available(1, 1))
+
+        booking = G(slot_models.Booking, user=self.user, slot=self.slot, status="B")
+        G(
+            slot_models.BookingSeat,
+            booking=booking,
+            slot=self.slot,
+            cinema_seat=self.seats[0],
+        )
+
+        self.assertTrue(seat_maps.get_seat_map(slot).is_available(1, 1))
+        self.assertFalse(seat_maps.rebuild_seat_map(slot).is_available(1, 1))
+
+    def test_seat_maps_are_bounded_and_locked_per_slot(self):
+        """
+        Ensure the least recently used map is dropped past the limit, and
+        a map being built doesn't hold up the maps of other slots.
+        """
+        later_slot = G(
+            slot_models.Slot,
+            cinema=self.cinema,
+            movie=self.movie,
+            start_time=self.slot.start_time + timedelta(days=1),
+            price=150.00,
+        )
+        slot, later_slot = (
+            slot_models.Slot.objects.select_related("cinema")
+            .filter(id__in=[self.slot.id, later_slot.id])
+            .order_by("start_time")
+        )
+
+        with seat_maps._slot_lock(slot.id):
+            # Would wait forever behind a process-wide build lock
+            seat_maps.get_seat_map(later_slot)
+
+        with mock.patch.object(slot_constants.SeatMapConfig, "MAX_SEAT_MAPS", 1):
+            seat_maps.get_seat_map(slot)
+            with self.assertNumQueries(3):
+                seat_maps.get_seat_map(later_slot)
+            with self.assertNumQueries(0):
+                seat_maps.get_seat_map(later_slot)
+
+    def test_seat_map_catches_up_on_seat_version(self):
+        """
+        Ensure a map replays bookings committed by another worker, whose
+        seats_changed signal never reached this process.
+        """
+        self.get_seats()
+        bookings.book_seats(self.slot, self.other_user, [self.seats[0].id])
+
+        with self.assertNumQueries(2):
+            availability = self.get_seats()
+        self.assertFalse(availability[self.seats[0].id])
+
+    def test_seat_availability_not_modified(self):
+        """
+        Ensure a poll with the current ETag returns 304 NOT MODIFIED
+        after the slot query alone.
+        """
+        url = reverse("available_seats", args=[self.slot.id])
+        etag = self.client.get(url)["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+        self.book(self.seats[:1])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_seat_availability_since_version(self):
+        """
+        Ensure `since` returns only the seats booked or held after that
+        version, and the full map for an unknown version.
+        """
+        url = reverse("available_seats", args=[self.slot.id])
+        version = self.client.get(url).data["version"]
+
+        self.book(self.seats[:2])
+        self.hold(self.seats[3:4], user=self.other_user)
+
+        response = self.client.get(url, {"since": version})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(seat["id"], seat["available"]) for seat in response.data["seats"]],
+            [(seat.id, False) for seat in (*self.seats[:2], self.seats[3])],
+        )
+        self.assertEqual(response["ETag"], f'"{response.data["version"]}"')
+
+        response = self.client.get(url, {"since": response.data["version"]})
+        self.assertEqual(response.data["seats"], [])
+
+        response = self.client.get(url, {"since": "99.0"})
+        self.assertEqual(len(response.data["seats"]), 6)
+
+        response = self.client.get(url, {"since": "latest"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_seat_availability_compact_format(self):
+        """
+        Ensure the compact format encodes availability as a bitset and
+        is negotiated by query param or Accept header.
+        """
+        self.book(self.seats[:2])
+        self.hold(self.seats[3:4], user=self.other_user)
+        url = reverse("available_seats", args=[self.slot.id])
+
+        response = self.client.get(url, {"format": "compact"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response["Content-Type"], slot_constants.SeatMapConfig.COMPACT_MEDIA_TYPE
+        )
+        self.assertNotIn("seats", response.data)
+        self.assertEqual(response.data["seat_id_base"], self.seats[0].id)
+        # Seats 3, 5 and 6 available: 0b110100
+        self.assertEqual(base64.b64decode(response.data["available"]), b"\x34")
+
+        etag = response["ETag"]
+        response = self.client.get(
+            url,
+            HTTP_ACCEPT=slot_constants.SeatMapConfig.COMPACT_MEDIA_TYPE,
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(len(response.data["seats"]), 6)
+
+    def test_seat_availability_row_range(self):
+        """
+        Ensure `rows` returns only the seats of that row range together
+        with the section counts of the whole map.
+        """
+        self.book(self.seats[3:4])
+        url = reverse("available_seats", args=[self.slot.id])
+
+        response = self.client.get(url, {"rows": "2-2"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(seat["id"], seat["available"]) for seat in response.data["seats"]],
+            [(seat.id, seat != self.seats[3]) for seat in self.seats[3:]],
+        )
+        self.assertEqual(
+            response.data["sections"],
+            [{"from_row": 1, "to_row": 2, "total": 6, "available": 5}],
+        )
+
+        response = self.client.get(url, {"rows": "2-2", "format": "compact"})
+        self.assertEqual(response.data["seat_id_base"], self.seats[3].id)
+        self.assertEqual(base64.b64decode(response.data["available"]), b"\x06")
+
+        for rows in ("2-1", "1-3", "2"):
+            response = self.client.get(url, {"rows": rows})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_booking_conflict_returns_conflicting_seats(self):
+        """
+        Ensure booking an already booked seat returns 409 CONFLICT
+        listing only the conflicting seat ids.
+        """
+        self.book(self.seats[:2])
+
+        response = self.book(self.seats[1:3])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["seat_ids"], [self.seats[1].id])
+        self.assertEqual(slot_models.Booking.objects.filter(slot=self.slot).count(), 1)
+
+    def test_booking_query_budget(self):
+        """
+        Ensure booking costs the same queries for any number of seats:
+        slot, seats, booking, booking seats, seat version (3) and the
+        test transaction's savepoint (2).
+        """
+        for seats in (self.seats[:1], self.seats[1:5]):
+            with self.assertNumQueries(9):
+                response = self.book(seats)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data["cinema_location"], "testcity")
+            self.assertEqual(
+                response.data["seats"],
+                [{"row": seat.row_number, "seat": seat.seat_number} for seat in seats],
+            )
+
+    def test_compact_cinema_booking_skips_seat_query(self):
+        """
+        Ensure seats of a compact cinema are validated and rendered from
+        its layout, saving the CinemaSeat query.
+        """
+        cinema = G(
+            cinema_models.Cinema,
+            location=self.location,
+            rows=2,
+            seats_per_row=3,
+            layout_mode=cinema_constants.LayoutMode.COMPACT.value,
+        )
+        slot = G(
+            slot_models.Slot,
+            cinema=cinema,
+            movie=self.movie,
+            start_time=self.slot.start_time,
+            price=100.00,
+        )
+        seats = list(
+            cinema_models.CinemaSeat.objects.filter(cinema_id=cinema).order_by("id")
+        )
+        self.client.force_authenticate(user=self.user)
+        url = reverse("booking_seat", args=[slot.id])
+
+        with self.assertNumQueries(8):
+            response = self.client.post(
+                url, {"seat_ids": [seats[4].id, seats[1].id]}, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["seats"], [{"row": 1, "seat": 2}, {"row": 2, "seat": 2}]
+        )
+
+        response = self.client.post(
+            url, {"seat_ids": [self.seats[0].id]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def book_best(self, **data):
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                reverse("booking_best_available", args=[self.slot.id]),
+                data,
+                format="json",
+            )
+
+    def test_best_available_books_adjacent_seats(self):
+        """
+        Ensure the best block prefers the back row and skips booked and
+        held seats, falling back to another row when the block breaks.
+        """
+        response = self.book_best(party_size=2)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["seats"], [{"row": 2, "seat": 2}, {"row": 2, "seat": 3}]
+        )
+
+        self.hold(self.seats[1:2], user=self.other_user)
+        response = self.book_best(party_size=2)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        response = self.book_best(party_size=1, from_row=1, to_row=1)
+        self.assertEqual(response.data["seats"], [{"row": 1, "seat": 1}])
+
+    def test_best_available_invalid_row_range(self):
+        """
+        Ensure a row range ending before it starts is rejected.
+        """
+        response = self.book_best(party_size=2, from_row=2, to_row=1)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_other_integrity_errors_are_not_seat_conflicts(self):
+        """
+        Ensure only the booked seat constraint is reported as a conflict,
+        e.g. a seat deleted meanwhile is not.
+        """
+        error = IntegrityError("FOREIGN KEY constraint failed")
+        with mock.patch.object(
+            slot_models.BookingSeat.objects, "bulk_create", side_effect=error
+        ):
+            with self.assertRaises(IntegrityError):
+                bookings.book_seats(self.slot, self.user, [self.seats[0].id])
+            with self.assertRaises(IntegrityError):
+                bookings.book_cart(self.user, {self.slot: [self.seats[0].id]})
+
+    def test_bookings_and_holds_need_seats(self):
+        """
+        Ensure an empty seat list is rejected before anything is written.
+        """
+        self.assertEqual(self.book([]).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.hold([]).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(slot_models.Booking.objects.exists())
+        self.assertFalse(slot_models.SeatChange.objects.exists())
+
+    def test_cancelled_seats_can_be_booked_again(self):
+        """
+        Ensure the uniqueness guarantee ignores cancelled bookings.
+        """
+        response = self.book(self.seats[:1])
+        self.client.patch(reverse("booking_cancel", args=[response.data["booking"]]))
+
+        response = self.book(self.seats[:1])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_idempotent_booking_replays_first_response(self):
+        """
+        Ensure a retried booking with the same Idempotency-Key replays
+        the first response without booking again.
+        """
+        headers = {"Idempotency-Key": "retry-1"}
+        response = self.book(self.seats[:2], headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            replay = self.book(self.seats[:2], headers=headers)
+        self.assertEqual(replay.status_code, status.HTTP_200_OK)
+        self.assertEqual(replay.data, response.data)
+        self.assertEqual(replay["Idempotent-Replayed"], "true")
+        self.assertEqual(slot_models.Booking.objects.filter(slot=self.slot).count(), 1)
+
+        response = self.book(self.seats[2:3], headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+        # Keys are scoped per user
+        response = self.book(self.seats[2:3], user=self.other_user, headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_idempotent_cancellation_replays_first_response(self):
+        """
+        Ensure a retried cancellation succeeds again instead of reporting
+        the booking as already cancelled.
+        """
+        booking_id = self.book(self.seats[:1]).data["booking"]
+        for _ in range(2):
+            response = self.client.patch(
+                reverse("booking_cancel", args=[booking_id]),
+                headers={"Idempotency-Key": "cancel-1"},
+            )
+            self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_idempotent_duplicate_waits_for_first_request(self):
+        """
+        Ensure a duplicate of a request still in flight waits for it and
+        gives up with 409 CONFLICT instead of running in parallel.
+        """
+        cache.add(f"lock:idempotency:{self.user.pk}:in-flight", 1)
+        with mock.patch.object(
+            common_constants.IdempotencyConfig, "WAIT_SECONDS", 0.05
+        ):
+            response = self.book(
+                self.seats[:1], headers={"Idempotency-Key": "in-flight"}
+            )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(slot_models.Booking.objects.exists())
+
+    def checkout(self, items):
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                reverse("checkout"),
+                {
+                    "items": [
+                        {"slot_id": slot.id, "seat_ids": [seat.id for seat in seats]}
+                        for slot, seats in items
+                    ]
+                },
+                format="json",
+            )
+
+    def test_checkout_books_several_slots_with_bulk_queries(self):
+        """
+        Ensure a cart of several slots is booked with the same number of
+        queries whatever the number of seats.
+        """
+        later_slot = G(
+            slot_models.Slot,
+            cinema=self.cinema,
+            movie=self.movie,
+            start_time=self.slot.start_time + timedelta(days=1),
+            price=150.00,
+        )
+
+        for seats in (self.seats[:1], self.seats[1:5]):
+            # Slots, seats, one insert per table, locking and bumping the
+            # seat versions, the SeatChange insert and the test savepoint
+            with self.assertNumQueries(9):
+                response = self.checkout([(self.slot, seats), (later_slot, seats)])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(
+                [booking["slot_price"] for booking in response.data["bookings"]],
+                [100, 150],
+            )
+
+        self.assertEqual(
+            slot_models.BookingSeat.objects.filter(slot=later_slot).count(), 5
+        )
+
+    def test_checkout_is_all_or_nothing(self):
+        """
+        Ensure a conflict in one slot books nothing and reports the
+        conflicting seats per slot.
+        """
+        later_slot = G(
+            slot_models.Slot,
+            cinema=self.cinema,
+            movie=self.movie,
+            start_time=self.slot.start_time + timedelta(days=1),
+            price=150.00,
+        )
+        bookings.book_seats(later_slot, self.other_user, [self.seats[1].id])
+
+        response = self.checkout(
+            [(self.slot, self.seats[:2]), (later_slot, self.seats[:2])]
+        )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            response.data["slots"],
+            [{"slot_id": later_slot.id, "seat_ids": [self.seats[1].id]}],
+        )
+        self.assertFalse(slot_models.Booking.objects.filter(user=self.user).exists())
+
+        response = self.checkout([(self.slot, self.seats[:1])] * 2)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_occupancy_counters_follow_bookings(self):
+        """
+        Ensure the booked count moves with bookings, cancellations and
+        checkouts, and drives the availability badge.
+        """
+        self.assertEqual(self.slot.capacity, 6)
+
+        booking_id = self.book(self.seats[:2]).data["booking"]
+        self.checkout([(self.slot, self.seats[2:5])])
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.booked_count, 5)
+        self.assertEqual(
+            occupancy.availability(self.slot),
+            slot_constants.Availability.FAST_FILLING.value,
+        )
+
+        self.client.patch(reverse("booking_cancel", args=[booking_id]))
+        self.book(self.seats[:1] + self.seats[5:])
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.booked_count, 5)
+
+        self.book(self.seats[1:2])
+        self.slot.refresh_from_db()
+        self.assertEqual(
+            occupancy.availability(self.slot),
+            slot_constants.Availability.SOLD_OUT.value,
+        )
+
+    def test_concurrent_cancellations_release_seats_once(self):
+        """
+        Ensure a cancellation that lost the race to another one leaves the
+        seats and counters alone.
+        """
+        booking_id = self.book(self.seats[:2]).data["booking"]
+        first, second = (
+            slot_models.Booking.objects.get(id=booking_id) for _ in range(2)
+        )
+
+        for booking in (first, second):
+            with self.captureOnCommitCallbacks(execute=True):
+                slot_serializer.BookingCancelSerializer().create({"booking": booking})
+
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.booked_count, 0)
+        self.assertEqual(self.slot.seat_version, 2)
+        self.assertEqual(second.status, slot_constants.BookingStatus.CANCELLED.value)
+
+    def test_availability_summary_uses_constant_queries(self):
+        """
+        Ensure the batch summary reports counts and bitmaps of many slots
+        with the same number of queries as for one.
+        """
+        later_slot = G(
+            slot_models.Slot,
+            cinema=self.cinema,
+            movie=self.movie,
+            start_time=self.slot.start_time + timedelta(days=1),
+            price=150.00,
+        )
+        self.book(self.seats[:2])
+        self.hold(self.seats[5:], user=self.other_user)
+        url = reverse("availability_summary")
+
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                url, {"ids": f"{later_slot.id},{self.slot.id},0", "bitmap": "true"}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["slots"],
+            [
+                {
+                    "slot_id": later_slot.id,
+                    "total": 6,
+                    "booked": 0,
+                    "held": 0,
+                    "free": 6,
+                    "availability": "available",
+                    "bitmap": "Pw==",
+                },
+                {
+                    "slot_id": self.slot.id,
+                    "total": 6,
+                    "booked": 2,
+                    "held": 1,
+                    "free": 3,
+                    "availability": "available",
+                    "bitmap": "HA==",
+                },
+            ],
+        )
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {"ids": self.slot.id})
+        self.assertNotIn("bitmap", response.data["slots"][0])
+
+        response = self.client.get(url, {"ids": "1,a"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_reconcile_slot_counts_repairs_drift(self):
+        """
+        Ensure the reconcile command reports drifted counters and repairs
+        them unless run dry.
+        """
+        self.book(self.seats[:2])
+        slot_models.Slot.objects.filter(id=self.slot.id).update(
+            booked_count=7, capacity=0
+        )
+
+        out = StringIO()
+        call_command("reconcile_slot_counts", "--dry-run", stdout=out)
+        self.assertIn("Found 1 drifted slots", out.getvalue())
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.booked_count, 7)
+
+        call_command("reconcile_slot_counts", "--batch-size", "1", stdout=StringIO())
+        self.slot.refresh_from_db()
+        self.assertEqual((self.slot.booked_count, self.slot.capacity), (2, 6))
+
+    def import_schedule(self, data, format="json"):
+        self.client.force_authenticate(user=self.staff)
+        return self.client.post(reverse("schedule_import"), data, format=format)
+
+    def schedule_row(self, hours, **row):
+        return {
+            "cinema_id": self.cinema.id,
+            "movie_id": self.movie.id,
+            "start_time": (self.slot.start_time + timedelta(hours=hours)).isoformat(),
+            "price": "120.00",
+            **row,
+        }
+
+    def test_schedule_import_creates_slots_in_fixed_queries(self):
+        """
+        Ensure a schedule is created with the same queries whatever its
+        size.
+        """
+        for hours in ((3, 6), (9, 12, 15, 18)):
+            # Movies, cinemas, capacities, existing slots, the insert and
+            # the test savepoint (2)
+            with self.assertNumQueries(7):
+                response = self.import_schedule(
+                    {"slots": [self.schedule_row(hour) for hour in hours]}
+                )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(response.data["created"], len(hours))
+
+        slot = slot_models.Slot.objects.get(id=response.data["slot_ids"][0])
+        self.assertEqual(slot.end_time, slot.start_time + self.movie.duration)
+        self.assertEqual(slot.capacity, 6)
+
+        csv_file = SimpleUploadedFile(
+            "week.csv",
+            (
+                "cinema_id,movie_id,start_time,price\n"
+                f"{self.cinema.id},{self.movie.id},"
+                f"{self.schedule_row(21)['start_time']},99.50\n"
+            ).encode(),
+        )
+        response = self.import_schedule({"file": csv_file}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 1)
+
+    def test_schedule_import_reports_row_errors(self):
+        """
+        Ensure every invalid row is reported and nothing is created.
+        """
+        response = self.import_schedule(
+            {
+                "slots": [
+                    self.schedule_row(3),
+                    self.schedule_row(1),
+                    self.schedule_row(4),
+                    self.schedule_row(-24 * 3),
+                    self.schedule_row(9, movie_id=0),
+                ]
+            }
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        overlaps = [slot_constants.ErrorMessage.SLOT_OVERLAPS]
+        self.assertEqual(
+            response.data["rows"],
+            {
+                1: overlaps,
+                2: overlaps,
+                3: overlaps,
+                4: [slot_constants.ErrorMessage.SLOT_PAST_SCHEDULE],
+                5: [slot_constants.ErrorMessage.MOVIE_NOT_EXIST],
+            },
+        )
+        self.assertEqual(slot_models.Slot.objects.count(), 1)
+
+        response = self.import_schedule({"slots": [{"cinema_id": "x"}]})
+        self.assertEqual(list(response.data["rows"]), [1])
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(
+            reverse("schedule_import"), {"slots": []}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_import_schedule_command_reports_each_row(self):
+        """
+        Ensure the command reports the errors of every invalid row under
+        its own number.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name) / "schedule.json"
+        path.write_text(
+            json.dumps(
+                {
+                    "slots": [
+                        self.schedule_row(3),
+                        self.schedule_row(-24 * 3),
+                        {"cinema_id": "x"},
+                    ]
+                }
+            )
+        )
+
+        err = StringIO()
+        with self.assertRaises(CommandError):
+            call_command("import_schedule", path, stderr=err)
+        lines = err.getvalue().splitlines()
+        self.assertEqual([line.split(":")[0] for line in lines], ["Row 3"])
+        self.assertIn("cinema_id:", lines[0])
+
+        path.write_text(json.dumps([self.schedule_row(-24 * 3)]))
+        err = StringIO()
+        with self.assertRaises(CommandError):
+            call_command("import_schedule", path, stderr=err)
+        self.assertEqual(
+            err.getvalue().strip(),
+            f"Row 1: {slot_constants.ErrorMessage.SLOT_PAST_SCHEDULE}",
+        )
+
+        path.write_text(json.dumps([]))
+        err = StringIO()
+        with self.assertRaises(CommandError):
+            call_command("import_schedule", path, stderr=err)
+        self.assertTrue(err.getvalue().startswith("slots: "))
+
+    def get_grid(self, show_date):
+        response = self.client.get(
+            reverse("showtime_grid"), {"city": "TestCity", "date": show_date}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_showtime_grid_follows_slot_changes(self):
+        """
+        Ensure the grid of a city and date is served in one query and
+        rebuilt when a slot is saved, moved or deleted.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            self.slot.save()
+        show_date = self.slot.show_date
+
+        with self.assertNumQueries(1):
+            grid = self.get_grid(show_date)
+        (movie,) = grid["movies"]
+        self.assertEqual((movie["id"], movie["duration"]), (self.movie.id, "02:00:00"))
+        (cinema,) = movie["cinemas"]
+        self.assertEqual(cinema["id"], self.cinema.id)
+        self.assertEqual([slot["id"] for slot in cinema["slots"]], [self.slot.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.slot.start_time += timedelta(days=1)
+            self.slot.save()
+        self.assertEqual(self.get_grid(show_date)["movies"], [])
+        self.assertEqual(len(self.get_grid(self.slot.show_date)["movies"]), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.slot.delete()
+        self.assertEqual(self.get_grid(self.slot.show_date)["movies"], [])
+        self.assertFalse(slot_models.ShowtimeGrid.objects.exists())
+
+    def test_deleted_slots_refresh_their_grids_once(self):
+        """
+        Ensure slots deleted together look up their city and rebuild its
+        grids once, however many slots and dates, also after a rolled
+        back deletion.
+        """
+        slots = [self.slot] + [
+            G(
+                slot_models.Slot,
+                cinema=self.cinema,
+                movie=self.movie,
+                start_time=self.slot.start_time + timedelta(days=days),
+                price=150.00,
+            )
+            for days in (1, 2)
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            for slot in slots:
+                slot.save()
+        self.assertEqual(slot_models.ShowtimeGrid.objects.count(), 3)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            slot_models.Slot.objects.filter(id=self.slot.id).delete()
+            raise IntegrityError
+        self.assertEqual(slot_models.ShowtimeGrid.objects.count(), 3)
+
+        with mock.patch.object(
+            grids, "rebuild_grids", wraps=grids.rebuild_grids
+        ) as rebuild_grids, self.captureOnCommitCallbacks(execute=True) as callbacks:
+            slot_models.Slot.objects.filter(id__in=[slot.id for slot in slots]).delete()
+        self.assertEqual(
+            [getattr(callback, "func", None) for callback in callbacks].count(
+                grids.refresh_deleted_grids
+            ),
+            1,
+        )
+        rebuild_grids.assert_called_once_with(
+            self.location.city, show_dates={slot.show_date for slot in slots}
+        )
+        self.assertFalse(slot_models.ShowtimeGrid.objects.exists())
+
+    def test_concurrent_grid_rebuilds_upsert_their_grids(self):
+        """
+        Ensure a grid stored by another rebuild while this one writes is
+        updated instead of colliding on its key.
+        """
+        self.slot.save()
+        show_date = self.slot.show_date
+        manager = slot_models.ShowtimeGrid.objects
+        bulk_create = manager.bulk_create
+
+        def bulk_create_after_other_rebuild(*args, **kwargs):
+            manager.create(city=self.location.city, show_date=show_date, document={})
+            return bulk_create(*args, **kwargs)
+
+        with mock.patch.object(manager, "bulk_create", bulk_create_after_other_rebuild):
+            self.assertEqual(grids.rebuild_grids(self.location.city, [show_date]), 1)
+        (grid,) = manager.all()
+        self.assertEqual(grid.document["movies"][0]["id"], self.movie.id)
+
+    def test_rebuild_showtime_grids_command(self):
+        """
+        Ensure the command rebuilds the grids of every city, including
+        slots created in bulk.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.import_schedule({"slots": [self.schedule_row(3)]})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        grid = self.get_grid(self.slot.show_date)
+        self.assertEqual(len(grid["movies"][0]["cinemas"][0]["slots"]), 2)
+
+        slot_models.ShowtimeGrid.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_showtime_grids", "--processes", "1", stdout=out)
+        self.assertIn("Rebuilt 1 grids of 1 cities", out.getvalue())
+        self.assertEqual(self.get_grid(self.slot.show_date), grid)
+
+        response = self.client.get(reverse("showtime_grid"), {"date": "2026-01-01"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_grid_workers_set_up_django_when_spawned(self):
+        """
+        Ensure rebuild workers can run grid tasks when started by spawn
+        rather than forked from a set up process.
+        """
+        get_context = multiprocessing.get_context
+        with mock.patch.object(
+            multiprocessing,
+            "get_context",
+            lambda method=None: get_context(method or "spawn"),
+        ):
+            with rebuild_showtime_grids.worker_pool(1) as pool:
+                documents = pool.submit(grids.build_documents, "testcity", [])
+                self.assertEqual(documents.result(timeout=60), {})
+
+    def verify(self, ticket, **data):
+        return self.client.post(
+            reverse("ticket_verify"), {"ticket": ticket, **data}, format="json"
+        )
+
+    def test_ticket_verifies_without_database(self):
+        """
+        Ensure a booking's ticket verifies without queries and a tampered
+        ticket or a ticket for another slot is rejected.
+        """
+        ticket = self.book(self.seats[:2]).data["ticket"]
+        self.assertEqual(self.verify(ticket).status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            response = self.verify(ticket, slot_id=self.slot.id)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["seat_ids"], [self.seats[0].id, self.seats[1].id]
+        )
+
+        booking_id, rest = ticket.split(".", 1)
+        forged = f"{int(booking_id) + 1}.{rest}"
+        for response in (
+            self.verify(forged),
+            self.verify(ticket, slot_id=self.slot.id + 1),
+            self.verify("not-a-ticket"),
+            self.verify(tickets.issue_ticket(1, self.slot.id, [])),
+        ):
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cancelled_booking_ticket_is_revoked(self):
+        """
+        Ensure the ticket of a cancelled booking is rejected, also when
+        its revocation set is locked by another worker.
+        """
+        response = self.book(self.seats[:1])
+        self.assertEqual(
+            self.verify(response.data["ticket"]).status_code, status.HTTP_200_OK
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                reverse("booking_cancel", args=[response.data["booking"]])
+            )
+
+        response = self.verify(response.data["ticket"])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data["ticket"], [slot_constants.ErrorMessage.REVOKED_TICKET]
+        )
+
+        ticket = self.book(self.seats[:1]).data["ticket"]
+        cache.add(f"lock:{tickets._revocations_key(self.slot.id)}", "other", 60)
+        with mock.patch.object(
+            common_cache, "cache_lock", partial(common_cache.cache_lock, wait=0)
+        ), self.assertLogs(tickets.logger, "WARNING"):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.patch(
+                    reverse("booking_cancel", args=[ticket.split(".")[0]])
+                )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        tickets.discard_revocations()
+        response = self.verify(ticket)
+        self.assertEqual(
+            response.data["ticket"], [slot_constants.ErrorMessage.REVOKED_TICKET]
+        )
+
+    def join_queue(self):
+        response = self.client.post(reverse("slot_queue", args=[self.slot.id]))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data
+
+    @override_settings(WAITING_ROOM_ADMIT_PER_SECOND=1)
+    def test_hot_slot_requires_admitted_queue_token(self):
+        """
+        Ensure a hot slot is only served to visitors admitted from the
+        queue, and the queue is served without touching the database.
+        """
+        url = reverse("available_seats", args=[self.slot.id])
+        slot_models.Slot.objects.filter(id=self.slot.id).update(is_hot=True)
+        waiting_room.set_slot_state(self.slot.id, True, None)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        with self.assertNumQueries(0):
+            first = self.join_queue()
+            second = self.join_queue()
+            position = self.client.get(
+                reverse("slot_queue", args=[self.slot.id]),
+                headers={"X-Queue-Token": second["token"]},
+            ).data
+        self.assertTrue(first["admitted"])
+        self.assertEqual(
+            (position["position"], position["ahead"], position["admitted"]),
+            (2, 1, False),
+        )
+
+        response = self.client.get(url, headers={"X-Queue-Token": first["token"]})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(url, {"queue_token": second["token"]})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "1")
+
+        response = self.book(self.seats[:1], headers={"X-Queue-Token": "forged"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(WAITING_ROOM_ADMIT_PER_SECOND=1)
+    def test_late_visitors_are_admitted_from_a_moving_head(self):
+        """
+        Ensure visitors joining long after the queue opened are admitted
+        for a full admission, and a burst after an idle period is still
+        let in at the admission rate.
+        """
+        url = reverse("available_seats", args=[self.slot.id])
+        waiting_room.set_slot_state(self.slot.id, True, None)
+        opened = 1000.0
+        with mock.patch.object(waiting_room.time, "time", return_value=opened):
+            self.join_queue()
+
+        later = opened + slot_constants.WaitingRoomConfig.ADMISSION_SECONDS + 60
+        with mock.patch.object(waiting_room.time, "time", return_value=later):
+            late = self.join_queue()
+            burst = self.join_queue()
+            response = self.client.get(url, {"queue_token": late["token"]})
+        self.assertEqual((late["admitted"], late["expired"]), (True, False))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            (burst["admitted"], burst["ahead"], burst["eta_seconds"]), (False, 1, 1)
+        )
+
+        expiry = later + slot_constants.WaitingRoomConfig.ADMISSION_SECONDS + 1
+        with mock.patch.object(waiting_room.time, "time", return_value=expiry):
+            response = self.client.get(url, {"queue_token": late["token"]})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_concurrent_joins_get_distinct_admissions(self):
+        """
+        Ensure visitors joining at once are admitted an interval apart,
+        each in their own turn, without waiting on each other.
+        """
+        waiting_room.set_slot_state(self.slot.id, True, None)
+        with ThreadPoolExecutor(8) as executor:
+            tokens = list(executor.map(waiting_room.join, [self.slot.id] * 40))
+
+        payloads = [
+            signing.loads(token, salt=slot_constants.WaitingRoomConfig.TOKEN_SALT)
+            for token in tokens
+        ]
+        self.assertEqual(
+            sorted(payload["position"] for payload in payloads), list(range(1, 41))
+        )
+        admissions = sorted(payload["admitted_at"] for payload in payloads)
+        interval = round(1000 / waiting_room.get_admission_rate(self.slot.id))
+        self.assertTrue(
+            all(
+                round((later - earlier) * 1000) >= interval
+                for earlier, later in pairwise(admissions)
+            )
+        )
+
+    @override_settings(WAITING_ROOM_HOT_REQUESTS_PER_SECOND=2)
+    def test_slot_turns_hot_above_request_rate(self):
+        """
+        Ensure a slot is sent through the waiting room once its request
+        rate crosses the threshold.
+        """
+        url = reverse("available_seats", args=[self.slot.id])
+        with mock.patch.object(waiting_room.time, "time", return_value=1000.0):
+            statuses = [self.client.get(url).status_code for _ in range(3)]
+        self.assertEqual(
+            statuses,
+            [
+                status.HTTP_200_OK,
+                status.HTTP_200_OK,
+                status.HTTP_429_TOO_MANY_REQUESTS,
+            ],
+        )
+
+    def hold(self, seats, user=None):
+        self.client.force_authenticate(user=user or self.user)
+        return self.client.post(
+            reverse("seat_hold", args=[self.slot.id]),
+            {"seat_ids": [seat.id for seat in seats], "minutes": 2},
+            format="json",
+        )
+
+    def test_cache_lock_is_released_by_its_owner_only(self):
+        """
+        Ensure a holder that outlived its lock leaves the next owner's
+        lock alone, and a busy lock answers 503 with Retry-After.
+        """
+        with common_cache.cache_lock(cache, "test", timeout=60):
+            # Expired meanwhile and taken by another worker
+            cache.delete("lock:test")
+            cache.add("lock:test", "other", 60)
+        self.assertEqual(cache.get("lock:test"), "other")
+
+        cache.add(f"lock:{holds._slot_key(self.slot.id)}", "other", 60)
+        with mock.patch.object(
+            common_cache, "cache_lock", partial(common_cache.cache_lock, wait=0)
+        ):
+            response = self.hold(self.seats[:1])
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response["Retry-After"], "5")
+
+    def test_held_seats_are_unavailable_to_others(self):
+        """
+        Ensure held seats show as unavailable and cannot be booked
+        or held by another user.
+        """
+        response = self.hold(self.seats[:2])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            response.data["seat_ids"], [self.seats[0].id, self.seats[1].id]
+        )
+
+        availability = self.get_seats()
+        self.assertFalse(availability[self.seats[0].id])
+        self.assertTrue(availability[self.seats[2].id])
+
+        response = self.book(self.seats[1:3], user=self.other_user)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["seat_ids"], [self.seats[1].id])
+
+        response = self.hold(self.seats[1:3], user=self.other_user)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_confirm_hold_books_seats(self):
+        """
+        Ensure confirming a hold books its seats and frees the hold.
+        """
+        hold_id = self.hold(self.seats[:2]).data["id"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("seat_hold_confirm", args=[self.slot.id, hold_id])
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["seats"]), 2)
+        self.assertEqual(holds.held_seat_ids(self.slot.id), set())
+
+        response = self.client.post(
+            reverse("seat_hold_confirm", args=[self.slot.id, hold_id])
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_release_hold(self):
+        """
+        Ensure a released hold frees its seats.
+        """
+        hold_id = self.hold(self.seats[:2]).data["id"]
+
+        response = self.client.delete(
+            reverse("seat_hold_release", args=[self.slot.id, hold_id])
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertTrue(all(self.get_seats().values()))
+
+    def test_sweeper_releases_expired_holds(self):
+        """
+        Ensure the sweeper releases holds once they expire.
+        """
+        self.hold(self.seats[:2])
+        self.assertEqual(holds.sweep_holds(), {})
+
+        with mock.patch.object(holds.time, "time", return_value=time.time() + 180):
+            self.assertEqual(
+                holds.sweep_holds(),
+                {self.slot.id: [self.seats[0].id, self.seats[1].id]},
+            )
+        self.assertEqual(holds.held_seat_ids(self.slot.id), set())
+
+    def test_holds_require_a_shared_cache(self):
+        """
+        Ensure deploys and the sweeper refuse a cache local to each process.
+        """
+        with override_settings(DEBUG=False):
+            self.assertEqual(
+                [error.id for error in slot_checks.check_shared_cache(None)],
+                ["slot.E001"],
+            )
+        with override_settings(DEBUG=True):
+            self.assertEqual(slot_checks.check_shared_cache(None), [])
+        with self.assertRaises(CommandError):
+            call_command("sweep_seat_holds", stdout=StringIO())
+
+        with override_settings(
+            DEBUG=False,
+            CACHES={
+                "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+            },
+        ):
+            self.assertEqual(slot_checks.check_shared_cache(None), [])
+            call_command("sweep_seat_holds", stdout=StringIO())
+
+    async def read_event(self, events):
+        event = await asyncio.wait_for(anext(events), timeout=1)
+        name, data = event.decode().strip().split("\n")
+        return name.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+    async def test_seat_map_stream(self):
+        """
+        Ensure the stream sends the full map once, then seat deltas
+        for bookings, cancellations and holds.
+        """
+        response = await self.async_client.get(
+            reverse("seat_map_stream", args=[self.slot.id])
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        events = aiter(response.streaming_content)
+
+        name, data = await self.read_event(events)
+        self.assertEqual(name, "snapshot")
+        self.assertEqual(len(data["seats"]), 6)
+
+        await sync_to_async(slot_signals.seats_changed.send)(
+            sender=None,
+            slot_id=self.slot.id,
+            seat_ids=[self.seats[1].id, self.seats[0].id],
+            available=False,
+            version=1,
+        )
+        self.assertEqual(
+            await self.read_event(events),
+            (
+                "seats",
+                {"seat_ids": [self.seats[0].id, self.seats[1].id], "available": False},
+            ),
+        )
+
+        hold = await sync_to_async(holds.place_hold)(
+            self.slot.id, self.user.id, [self.seats[2].id], 2
+        )
+        self.assertEqual(
+            await self.read_event(events),
+            ("seats", {"seat_ids": [self.seats[2].id], "available": False}),
+        )
+
+        await sync_to_async(holds.release_hold)(hold)
+        self.assertEqual(
+            await self.read_event(events),
+            ("seats", {"seat_ids": [self.seats[2].id], "available": True}),
+        )
+        await events.aclose()
+
+    @override_settings(WAITING_ROOM_ADMIT_PER_SECOND=1)
+    async def test_seat_map_stream_of_hot_slot_requires_queue_token(self):
+        """
+        Ensure a hot slot's seat map is only streamed to visitors admitted
+        from the queue.
+        """
+        await sync_to_async(waiting_room.set_slot_state)(self.slot.id, True, None)
+        url = reverse("seat_map_stream", args=[self.slot.id])
+
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        first = await sync_to_async(waiting_room.join)(self.slot.id)
+        second = await sync_to_async(waiting_room.join)(self.slot.id)
+        response = await self.async_client.get(url, {"queue_token": second})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "1")
+
+        response = await self.async_client.get(url, {"queue_token": first})
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        events = aiter(response.streaming_content)
+        self.assertEqual((await self.read_event(events))[0], "snapshot")
+        await events.aclose()
+
+    async def test_seat_map_stream_unknown_slot(self):
+        """
+        Ensure streaming an unknown slot returns 404 NOT FOUND.
+        """
+        response = await self.async_client.get(reverse("seat_map_stream", args=[0]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,179 @@
+"""
+Signed e-tickets.
+
+A ticket is a compact token naming the booking, its slot, its seats and
+its status, followed by an HMAC of those fields:
+
+    <booking_id>.<slot_id>.<seat ids in base 36, "-" separated>.<status>.<mac>
+
+Gates verify tickets without touching the database. Cancelled bookings
+are rejected through a per-slot revocation set, kept in the cache and
+copied into process memory for `TicketConfig.REVOCATION_REFRESH_SECONDS`;
+only a set evicted from the cache is reloaded from `Booking`. The cache
+must be shared by every worker, which the `slot.E001` deploy check
+enforces, or a cancellation would only be seen by the worker handling it.
+"""
+
+import base64
+import hmac
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+from django.utils.crypto import salted_hmac
+
+from apps.common import cache as common_cache
+from apps.slot import constants as slot_constants, models as slot_models
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidTicket(Exception):
+    """
+    Raised when a ticket is malformed, forged or revoked.
+    """
+
+
+def _mac(payload):
+    digest = salted_hmac(
+        slot_constants.TicketConfig.SALT, payload, algorithm="sha256"
+    ).digest()
+    return (
+        base64.urlsafe_b64encode(digest[: slot_constants.TicketConfig.MAC_BYTES])
+        .rstrip(b"=")
+        .decode()
+    )
+
+
+def _to_base36(number):
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    encoded = ""
+    while True:
+        number, remainder = divmod(number, 36)
+        encoded = digits[remainder] + encoded
+        if not number:
+            return encoded
+
+
+def issue_ticket(booking_id, slot_id, seat_ids):
+    """
+    Returns the ticket of a booked booking.
+    """
+
+    seats = "-".join(_to_base36(seat_id) for seat_id in sorted(seat_ids))
+    payload = (
+        f"{booking_id}.{slot_id}.{seats}.{slot_constants.BookingStatus.BOOKED.value}"
+    )
+    return f"{payload}.{_mac(payload)}"
+
+
+def verify_ticket(ticket, slot_id=None):
+    """
+    Returns `{"booking_id", "slot_id", "seat_ids"}` of a valid ticket.
+
+    Raises `InvalidTicket` when the ticket is malformed, forged, for
+    another slot than `slot_id`, or its booking was cancelled.
+    """
+
+    payload, _, mac = ticket.rpartition(".")
+    if not hmac.compare_digest(_mac(payload).encode(), mac.encode()):
+        raise InvalidTicket(slot_constants.ErrorMessage.INVALID_TICKET)
+
+    try:
+        booking_id, ticket_slot_id, seats, status = payload.split(".")
+        booking_id, ticket_slot_id = int(booking_id), int(ticket_slot_id)
+        # Tickets of bookings without seats have an empty seat segment
+        seat_ids = [int(seat, 36) for seat in seats.split("-")]
+    except ValueError:
+        raise InvalidTicket(slot_constants.ErrorMessage.INVALID_TICKET)
+
+    if status != slot_constants.BookingStatus.BOOKED.value or (
+        slot_id is not None and ticket_slot_id != slot_id
+    ):
+        raise InvalidTicket(slot_constants.ErrorMessage.INVALID_TICKET)
+
+    if booking_id in get_revoked_booking_ids(ticket_slot_id):
+        raise InvalidTicket(slot_constants.ErrorMessage.REVOKED_TICKET)
+
+    return {
+        "booking_id": booking_id,
+        "slot_id": ticket_slot_id,
+        "seat_ids": seat_ids,
+    }
+
+
+def _revocations_key(slot_id):
+    return f"ticket-revocations:{slot_id}"
+
+
+_revocations = {}
+_lock = threading.Lock()
+
+
+def get_revoked_booking_ids(slot_id):
+    """
+    Returns the cancelled booking ids of a slot from process memory,
+    refreshed from the cache every `REVOCATION_REFRESH_SECONDS`.
+    """
+
+    now = time.monotonic()
+    entry = _revocations.get(slot_id)
+    if entry is not None and entry[0] > now:
+        return entry[1]
+
+    revoked = cache.get(_revocations_key(slot_id))
+    if revoked is None:
+        # Evicted, or never loaded since the cache was emptied
+        revoked = frozenset(
+            slot_models.Booking.objects.filter(
+                slot_id=slot_id,
+                status=slot_constants.BookingStatus.CANCELLED.value,
+            ).values_list("id", flat=True)
+        )
+        cache.set(_revocations_key(slot_id), revoked, None)
+
+    with _lock:
+        _revocations[slot_id] = (
+            now + slot_constants.TicketConfig.REVOCATION_REFRESH_SECONDS,
+            revoked,
+        )
+    return revoked
+
+
+def discard_revocations(slot_id=None):
+    """
+    Drops the in-memory revocation set of a slot, or every set when no id
+    is given. The next verification reads the set from the cache.
+    """
+
+    with _lock:
+        if slot_id is None:
+            _revocations.clear()
+        else:
+            _revocations.pop(slot_id, None)
+
+
+def revoke_ticket(slot_id, booking_id):
+    """
+    Adds a cancelled booking to the revocation set of its slot. Runs
+    after the cancellation committed: when the set is too busy to lock,
+    it is dropped instead and reloaded from `Booking` on the next read.
+    """
+
+    key = _revocations_key(slot_id)
+    try:
+        with common_cache.cache_lock(cache, key):
+            # Forces a fresh read of the shared set
+            discard_revocations(slot_id)
+            revoked = get_revoked_booking_ids(slot_id)
+            cache.set(key, revoked | {booking_id}, None)
+    except common_cache.CacheLockTimeout:
+        logger.warning(
+            "Revocations of slot %s are locked, dropped to revoke booking %s",
+            slot_id,
+            booking_id,
+        )
+        cache.delete(key)
+
+    discard_revocations(slot_id)
@@ -3,11 +3,31 @@ from django.urls import path
 from apps.slot import views as slot_views
 
 urlpatterns = [
+    path(
+        "grid/",
+        slot_views.ShowtimeGridView.as_view(),
+        name="showtime_grid",
+    ),
+    path(
+        "availability/",
+        slot_views.AvailabilitySummaryView.as_view(),
+        name="availability_summary",
+    ),
     path(
         "<int:slot_id>/seats/",
         slot_views.SeatAvailabilityView.as_view(),
         name="available_seats",
     ),
+    path(
+        "<int:slot_id>/seats/stream/",
+        slot_views.SeatMapStreamView.as_view(),
+        name="seat_map_stream",
+    ),
+    path(
+        "<int:slot_id>/queue/",
+        slot_views.SlotQueueView.as_view(),
+        name="slot_queue",
+    ),
     path(
         "<int:slot_id>/bookings/",
         slot_views.BookingViewSet.as_view(
@@ -17,6 +37,57 @@ urlpatterns = [
         ),
         name="booking_seat",
     ),
+    path(
+        "<int:slot_id>/bookings/best/",
+        slot_views.BookingViewSet.as_view(
+            {
+                "post": "best_available",
+            }
+        ),
+        name="booking_best_available",
+    ),
+    path(
+        "<int:slot_id>/holds/",
+        slot_views.SeatHoldViewSet.as_view(
+            {
+                "post": "create",
+            }
+        ),
+        name="seat_hold",
+    ),
+    path(
+        "<int:slot_id>/holds/<str:hold_id>/",
+        slot_views.SeatHoldViewSet.as_view(
+            {
+                "delete": "destroy",
+            }
+        ),
+        name="seat_hold_release",
+    ),
+    path(
+        "<int:slot_id>/holds/<str:hold_id>/confirm/",
+        slot_views.SeatHoldViewSet.as_view(
+            {
+                "post": "confirm",
+            }
+        ),
+        name="seat_hold_confirm",
+    ),
+    path(
+        "schedule/",
+        slot_views.ScheduleImportView.as_view(),
+        name="schedule_import",
+    ),
+    path(
+        "checkout/",
+        slot_views.CheckoutView.as_view(),
+        name="checkout",
+    ),
+    path(
+        "tickets/verify/",
+        slot_views.TicketVerifyView.as_view(),
+        name="ticket_verify",
+    ),
     path(
         "bookings/<int:booking_id>/",
         slot_views.BookingViewSet.as_view(
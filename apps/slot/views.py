@@ -1,121 +1,586 @@
-from django.db.models import Case, When
-from django.utils import timezone
-from rest_framework import exceptions, generics, permissions, response, status, viewsets
+import asyncio
+import json
+import math
 
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+from django.views import View
+from rest_framework import exceptions, generics, permissions, response, status, viewsets
+from rest_framework.settings import api_settings
 
 from apps.cinema import models as cinema_models
+from apps.common import idempotency
 from apps.slot import (
+    broadcast,
     constants as slot_constants,
+    holds,
     models as slot_models,
+    occupancy,
+    renderers as slot_renderers,
+    seat_maps,
     serializers as slot_serializer,
+    showtimes,
+    tickets,
+    waiting_room,
 )
 
 
-class SeatAvailabilityView(generics.ListAPIView):
-    """
-    View for finding the seat availaibility
+class SeatAvailabilityView(generics.RetrieveAPIView):
     """
+    View for finding the seat availaibility.
+    Seats are answered from the slot's in-memory seat map, seats held
+    by users are reported as unavailable.
 
-    serializer_class = slot_serializer.SeatAvailabilitySerializer
+    Responses carry the seat map version as `ETag` and in `version`:
+    - `If-None-Match` with the current version is answered with a 304
+      right after loading the slot.
+    - `?since=<version>` returns only the seats that changed since then,
+      or the full map when the changes are no longer known.
 
-    def get_queryset(self):
-        slot_id = self.kwargs["slot_id"]
+    `?format=compact`, or accepting `SeatMapConfig.COMPACT_MEDIA_TYPE`,
+    replaces the seat list by a base64 availability bitset (see
+    `SeatMap.compact`). Compact responses ignore `since`.
 
-        slot = slot_models.Slot.objects.filter(id=slot_id)
+    `?rows=<from>-<to>` limits the seats to that row range and adds the
+    per section seat counts of the whole map, so large venues are loaded
+    one visible slice at a time.
+    """
+
+    permission_classes = [waiting_room.AdmittedFromQueue]
+    renderer_classes = [
+        *api_settings.DEFAULT_RENDERER_CLASSES,
+        slot_renderers.CompactSeatMapRenderer,
+    ]
+    serializer_class = slot_serializer.SeatAvailabilitySerializer
+    queryset = slot_models.Slot.objects.select_related("movie", "cinema__location")
+    lookup_url_kwarg = "slot_id"
 
-        if not slot.exists():
+    def get_object(self):
+        try:
+            slot = self.get_queryset().get(id=self.kwargs["slot_id"])
+        except slot_models.Slot.DoesNotExist:
             raise exceptions.NotFound(slot_constants.ErrorMessage.SLOT_NOT_FOUND)
 
-        if slot[0].start_time < timezone.now():
+        if slot.start_time < timezone.now():
             raise exceptions.PermissionDenied(
                 slot_constants.ErrorMessage.PAST_SLOT_SEATS
             )
 
-        booked_seats = slot_models.BookingSeat.objects.filter(
-            booking__slot_id=slot_id,
-            booking__status=slot_constants.BookingStatus.BOOKED.value,
-        ).values_list("cinema_seat", flat=True)
+        return slot
+
+    def retrieve(self, request, *args, **kwargs):
+        slot = self.get_object()
+        hold_version, held_seat_ids = holds.get_hold_state(slot.id)
+        compact = (
+            request.accepted_renderer.format
+            == slot_constants.SeatMapConfig.COMPACT_FORMAT
+        )
+        version = f"{slot.seat_version}.{hold_version}"
+        etag = quote_etag(f"{version}.compact" if compact else version)
+        headers = {"ETag": etag, "Vary": "Accept"}
 
-        queryset = (
-            cinema_models.CinemaSeat.objects.filter(cinema_id_id__slot=slot_id)
-            .annotate(
-                available=Case(When(id__in=booked_seats, then=False), default=True)
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match and (
+            etag in parse_etags(if_none_match) or if_none_match.strip() == "*"
+        ):
+            return response.Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers=headers
             )
-            .select_related("cinema_id")
+
+        row_range = None
+        if "rows" in request.query_params:
+            row_range = parse_row_range(request.query_params["rows"], slot.cinema.rows)
+
+        data = None
+        if "since" in request.query_params and not compact:
+            data = seat_changes_data(
+                slot,
+                parse_version(request.query_params["since"]),
+                hold_version,
+                held_seat_ids,
+                row_range,
+            )
+        if data is None:
+            data = seat_map_data(slot, hold_version, held_seat_ids, compact, row_range)
+
+        return response.Response(data, headers=headers)
+
+
+def parse_version(value):
+    """
+    Splits a seat map version into its seat and hold versions.
+    """
+
+    try:
+        seat_version, hold_version = map(int, value.strip('"').split("."))
+    except ValueError:
+        raise exceptions.ValidationError(
+            {"since": slot_constants.ErrorMessage.INVALID_SEAT_VERSION}
         )
+    return seat_version, hold_version
 
-        return queryset
 
-    def list(self, request, *args, **kwargs):
-        slot_id = self.kwargs["slot_id"]
-        seats_queryset = self.get_queryset()
-        seats_data = self.get_serializer(seats_queryset, many=True).data
+def parse_row_range(value, rows):
+    """
+    Parses a `<from>-<to>` row range within the cinema's rows.
+    """
+
+    try:
+        from_row, to_row = map(int, value.split("-"))
+    except ValueError:
+        from_row = to_row = 0
+    if not 1 <= from_row <= to_row <= rows:
+        raise exceptions.ValidationError(
+            {"rows": slot_constants.ErrorMessage.INVALID_ROWS_PARAM}
+        )
+    return from_row, to_row
+
+
+def seat_changes_data(slot, since, hold_version, held_seat_ids, row_range=None):
+    """
+    Seats of a slot whose availability may have changed since the
+    version `since`, or None when the gap can't be covered.
+    """
+
+    seat_since, hold_since = since
+    if (
+        not 0
+        <= slot.seat_version - seat_since
+        <= slot_constants.SeatMapConfig.MAX_CATCH_UP_VERSIONS
+    ):
+        return None
+
+    changes = list(
+        slot_models.SeatChange.objects.filter(
+            slot_id=slot.id, version__gt=seat_since, version__lte=slot.seat_version
+        ).values_list("seat_ids", flat=True)
+    )
+    changed_hold_seat_ids = holds.get_changed_seat_ids(slot.id, hold_since)
+    if len(changes) != slot.seat_version - seat_since or changed_hold_seat_ids is None:
+        return None
 
-        slot = slot_models.Slot.objects.select_related("movie").get(id=slot_id)
+    seat_map = seat_maps.get_seat_map(slot)
+    changed_seat_ids = changed_hold_seat_ids.union(*changes)
+    seats = (
+        seat_map.seat(seat_id, held_seat_ids) for seat_id in sorted(changed_seat_ids)
+    )
 
-        cinema_name = seats_queryset[0].cinema_id.name
-        cinema_location = seats_queryset[0].cinema_id.location.city
-        cinema_rows = seats_queryset[0].cinema_id.rows
-        cinema_seats_per_row = seats_queryset[0].cinema_id.seats_per_row
+    from_row, to_row = row_range or (1, slot.cinema.rows)
 
+    return {
+        "version": f"{slot.seat_version}.{hold_version}",
+        "seats": [
+            seat
+            for seat in seats
+            if seat is not None and from_row <= seat["row_number"] <= to_row
+        ],
+    }
+
+
+def seat_map_data(
+    slot, hold_version=None, held_seat_ids=None, compact=False, row_range=None
+):
+    """
+    Seat map of a slot: cinema details plus every seat with its
+    availability, read from the in-memory seat map and the holds.
+    `compact` replaces the seats by `SeatMap.compact`, `row_range`
+    limits them to `(from_row, to_row)` and adds the section counts.
+    """
+
+    seat_map = seat_maps.get_seat_map(slot)
+    if held_seat_ids is None:
+        hold_version, held_seat_ids = holds.get_hold_state(slot.id)
+
+    data = {
+        "version": f"{slot.seat_version}.{hold_version}",
+        "cinema": slot.cinema.name,
+        "location": slot.cinema.location.city,
+        "rows": slot.cinema.rows,
+        "seats_per_row": slot.cinema.seats_per_row,
+        "movie": slot.movie.name,
+        "slot_price": slot.price,
+        "slot_start_time": slot.start_time.astimezone(),
+    }
+    from_row, to_row = row_range or (1, None)
+    if compact:
+        data.update(seat_map.compact(held_seat_ids, from_row, to_row))
+    else:
+        data["seats"] = list(seat_map.seats(held_seat_ids, from_row, to_row))
+    if row_range is not None:
+        data["row_range"] = list(row_range)
+        data["sections"] = seat_map.sections(held_seat_ids)
+    return data
+
+
+class SeatMapStreamView(View):
+    """
+    Server-Sent Events stream of a slot's seat map.
+
+    Sends the full map once as a `snapshot` event, then a `seats` event
+    with `seat_ids` and `available` for every change. Needs an ASGI server
+    (`BookMyShow.asgi`), under WSGI the stream would hold a worker.
+
+    Hot slots are gated by the waiting room like `SeatAvailabilityView`,
+    the token goes in `?queue_token=` as EventSource can't send headers.
+    """
+
+    async def get(self, request, slot_id):
+        config = slot_constants.WaitingRoomConfig
+        token = request.headers.get(config.TOKEN_HEADER) or request.GET.get(
+            config.TOKEN_PARAM
+        )
+        seat_view = SeatAvailabilityView(kwargs={"slot_id": slot_id})
+        try:
+            await sync_to_async(waiting_room.check_admission)(slot_id, token)
+            slot = await sync_to_async(seat_view.get_object)()
+        except exceptions.APIException as error:
+            error_response = JsonResponse(
+                {"detail": error.detail}, status=error.status_code
+            )
+            if getattr(error, "wait", None):
+                error_response["Retry-After"] = str(math.ceil(error.wait))
+            return error_response
+
+        # Subscribed before the snapshot is read so no change is missed
+        subscription = broadcast.subscribe(slot.id)
+        return StreamingHttpResponse(
+            self.events(slot, subscription),
+            content_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    async def events(self, slot, subscription):
+        config = slot_constants.SeatMapStreamConfig
+        try:
+            yield self.event("snapshot", await sync_to_async(seat_map_data)(slot))
+            loop = asyncio.get_running_loop()
+            snapshot_at = loop.time()
+
+            while True:
+                try:
+                    change = await asyncio.wait_for(
+                        subscription.get(), timeout=config.KEEP_ALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    change = None
+
+                if (
+                    subscription.overflowed
+                    or loop.time() - snapshot_at > config.SNAPSHOT_SECONDS
+                ):
+                    subscription.reset()
+                    snapshot_at = loop.time()
+                    # Picks up bookings committed by other workers
+                    await sync_to_async(slot.refresh_from_db)(fields=["seat_version"])
+                    yield self.event(
+                        "snapshot", await sync_to_async(seat_map_data)(slot)
+                    )
+                elif change is not None:
+                    yield self.event("seats", change)
+                else:
+                    yield ": keep-alive\n\n"
+        finally:
+            broadcast.unsubscribe(subscription)
+
+    @staticmethod
+    def event(name, data):
+        return f"event: {name}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+class AvailabilitySummaryView(generics.GenericAPIView):
+    """
+    Seat counts of many slots in one call, for showtime listings:
+    `?ids=1,2,3` returns total, booked, held and free seats per slot, and
+    `&bitmap=true` a base64 seat bitmap (see `occupancy.availability_summary`).
+
+    Costs one query, or three with bitmaps, however many slots are asked.
+    """
+
+    serializer_class = slot_serializer.AvailabilitySummarySerializer
+
+    def get(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
         return response.Response(
             {
-                "cinema": cinema_name,
-                "location": cinema_location,
-                "rows": cinema_rows,
-                "seats_per_row": cinema_seats_per_row,
-                "movie": slot.movie.name,
-                "slot_price": slot.price,
-                "slot_start_time": slot.start_time.astimezone(),
-                "seats": seats_data,
+                "slots": occupancy.availability_summary(
+                    serializer.validated_data["ids"],
+                    serializer.validated_data["bitmap"],
+                )
             }
         )
 
 
+class ShowtimeGridView(generics.GenericAPIView):
+    """
+    Every showtime of a city on a local date for the home page:
+    `?city=delhi&date=2026-10-19` returns the movies showing, each with
+    its cinemas and slots.
+
+    Served as is from the precomputed `ShowtimeGrid` with one query, see
+    `apps.slot.grids`.
+    """
+
+    def get(self, request, *args, **kwargs):
+        city = request.query_params.get("city", "").lower().strip()
+        if not city:
+            raise exceptions.ValidationError(
+                slot_constants.ErrorMessage.CITY_PARAM_REQUIRED
+            )
+        if not request.query_params.get("date"):
+            raise exceptions.ValidationError(
+                slot_constants.ErrorMessage.DATE_PARAM_REQUIRED
+            )
+        show_date = showtimes.parse_date(request.query_params["date"])
+
+        document = (
+            slot_models.ShowtimeGrid.objects.filter(city=city, show_date=show_date)
+            .values_list("document", flat=True)
+            .first()
+        )
+        if document is None:
+            document = {"city": city, "date": show_date.isoformat(), "movies": []}
+
+        grid_response = response.Response(document)
+        patch_cache_control(
+            grid_response,
+            public=True,
+            max_age=slot_constants.ShowtimeConfig.CACHE_SECONDS,
+        )
+        return grid_response
+
+
+class ScheduleImportView(generics.GenericAPIView):
+    """
+    Creates many slots at once from a JSON list or a CSV / JSON file,
+    for staff users.
+
+    Costs a fixed number of queries whatever the schedule size, see
+    `apps.slot.schedules`. Invalid schedules are answered with a 400
+    listing the errors of every row, and nothing is created.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+    serializer_class = slot_serializer.ScheduleImportSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        created = serializer.save()
+
+        return response.Response(
+            {"created": len(created), "slot_ids": [slot.id for slot in created]},
+            status=(
+                status.HTTP_200_OK
+                if serializer.validated_data["dry_run"]
+                else status.HTTP_201_CREATED
+            ),
+        )
+
+
+class SlotQueueView(generics.GenericAPIView):
+    """
+    Waiting room of a slot.
+
+    POST joins the queue and returns a queue token, GET reports the
+    position, visitors ahead and ETA of the token sent in `X-Queue-Token`.
+    Never touches the database, not even to authenticate.
+    """
+
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request, slot_id):
+        token = waiting_room.join(slot_id)
+        return response.Response(
+            {"token": token, **waiting_room.get_position(slot_id, token)},
+            status=status.HTTP_201_CREATED,
+        )
+
+    def get(self, request, slot_id):
+        token = waiting_room.get_token(request)
+        if token is None:
+            raise exceptions.ValidationError(
+                {
+                    slot_constants.WaitingRoomConfig.TOKEN_PARAM: (
+                        slot_constants.ErrorMessage.INVALID_QUEUE_TOKEN
+                    )
+                }
+            )
+        return response.Response(waiting_room.get_position(slot_id, token))
+
+
+class TicketVerifyView(generics.GenericAPIView):
+    """
+    Verifies an e-ticket at the gate.
+
+    Answers from the ticket signature and the in-memory revocation set,
+    without authenticating or querying the database.
+    """
+
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    serializer_class = slot_serializer.TicketVerifySerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return response.Response(serializer.validated_data)
+
+
+def booking_response(booking, seats=None):
+    """
+    Response returned once seats have been booked.
+
+    Built from the slot cached on the booking and the CinemaSeats loaded
+    during validation, see `BookingViewSet` for the query budget. Without
+    `seats` they are read back from the booking.
+    """
+
+    slot = booking.slot
+
+    if seats is None:
+        seats = cinema_models.CinemaSeat.objects.filter(
+            bookingseat__booking=booking
+        ).order_by("row_number", "seat_number")
+
+    seats = list(seats)
+
+    return response.Response(
+        {
+            "booking": booking.id,
+            "ticket": tickets.issue_ticket(
+                booking.id, slot.id, [seat.id for seat in seats]
+            ),
+            "cinema_name": slot.cinema.name,
+            "cinema_location": slot.cinema.location.city,
+            "movie_name": slot.movie.name,
+            "slot_time": slot.start_time,
+            "slot_price": slot.price,
+            "seats": [
+                {"row": seat.row_number, "seat": seat.seat_number} for seat in seats
+            ],
+        }
+    )
+
+
 class BookingViewSet(viewsets.ModelViewSet):
-    permission_classes = [permissions.IsAuthenticated]
+    """
+    Books and cancels seats.
+
+    Booking N seats costs a fixed number of queries whatever N is: the
+    slot with its movie, cinema and location, the requested CinemaSeats,
+    the Booking insert, one BookingSeat bulk insert, and the seat version
+    bump with its SeatChange row (3 queries). The response is built from
+    the objects loaded during validation.
+
+    Bookings and cancellations accept an `Idempotency-Key` header, retries
+    replay the first response. Bookings of hot slots need an admitted
+    queue token.
+    """
+
+    permission_classes = [permissions.IsAuthenticated, waiting_room.AdmittedFromQueue]
 
     def get_serializer_class(self):
         if self.request.method == "PATCH":
             return slot_serializer.BookingCancelSerializer
+        elif self.action == "best_available":
+            return slot_serializer.BestAvailableSerializer
         elif self.request.method == "POST":
             return slot_serializer.BookingSeatSerializer
 
+    @idempotency.idempotent
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         booking = serializer.save()
+        return booking_response(booking, serializer.validated_data.get("seats"))
 
-        slot_id = self.kwargs["slot_id"]
-        slot = slot_models.Slot.objects.select_related("movie", "cinema").get(
-            id=slot_id
-        )
+    def best_available(self, request, *args, **kwargs):
+        return self.create(request, *args, **kwargs)
 
-        booked_seats = slot_models.BookingSeat.objects.select_related(
-            "cinema_seat"
-        ).filter(booking=booking)
+    @idempotency.idempotent
+    def partial_update(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return response.Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class CheckoutView(generics.GenericAPIView):
+    """
+    Books seats of several slots at once, all or nothing.
+
+    Costs the same queries for any number of slots and seats: the slots,
+    the seats, one insert per table and the seat version bump of all the
+    slots (3 queries). Accepts an `Idempotency-Key` header.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = slot_serializer.CheckoutSerializer
+
+    @idempotency.idempotent
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        created = serializer.save()
+        seats = serializer.validated_data["seats"]
 
         return response.Response(
             {
-                "booking": booking.id,
-                "cinema_name": slot.cinema.name,
-                "cinema_location": slot.cinema.location.city,
-                "movie_name": slot.movie.name,
-                "slot_time": slot.start_time,
-                "slot_price": slot.price,
-                "seats": [
-                    {
-                        "row": seat.cinema_seat.row_number,
-                        "seat": seat.cinema_seat.seat_number,
-                    }
-                    for seat in booked_seats
-                ],
+                "bookings": [
+                    booking_response(booking, seats[booking.slot_id]).data
+                    for booking in created
+                ]
             }
         )
 
-    def partial_update(self, request, *args, **kwargs):
+
+class SeatHoldViewSet(viewsets.GenericViewSet):
+    """
+    Holds seats of a slot for a few minutes, then confirms them
+    into a booking or releases them.
+    """
+
+    permission_classes = [permissions.IsAuthenticated, waiting_room.AdmittedFromQueue]
+    serializer_class = slot_serializer.SeatHoldSerializer
+
+    def get_hold(self):
+        hold = holds.get_hold(self.kwargs["hold_id"])
+
+        if (
+            hold is None
+            or hold["user_id"] != self.request.user.id
+            or hold["slot_id"] != self.kwargs["slot_id"]
+        ):
+            raise exceptions.NotFound(slot_constants.ErrorMessage.HOLD_NOT_FOUND)
+
+        return hold
+
+    def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        return response.Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @idempotency.idempotent
+    def confirm(self, request, *args, **kwargs):
+        hold = self.get_hold()
+
+        serializer = slot_serializer.BookingSeatSerializer(
+            data={"seat_ids": hold["seat_ids"]},
+            context=self.get_serializer_context(),
+        )
+        serializer.is_valid(raise_exception=True)
+        booking = serializer.save()
+
+        holds.release_hold(hold)
+        return booking_response(booking, serializer.validated_data["seats"])
+
+    def destroy(self, request, *args, **kwargs):
+        holds.release_hold(self.get_hold())
         return response.Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,225 @@
+"""
+Virtual waiting room for hot slots.
+
+When a slot is hot, its seat map and booking endpoints only serve
+visitors holding an admitted queue token, so a big release cannot
+exhaust the connection pool for every other endpoint.
+
+- A slot is hot when `Slot.is_hot` is set from the admin, or for
+  `WaitingRoomConfig.AUTO_HOT_SECONDS` once it receives more than
+  `WAITING_ROOM_HOT_REQUESTS_PER_SECOND` requests in a second.
+- Joining the queue hands out a signed token carrying the slot, the
+  position and the visitor's admission time. Admission times follow a
+  moving head, `max(joined_at, previous admission + 1 / rate)`, so
+  visitors are let in at the slot's `admission_rate` per second however
+  long after the queue opened they arrive, and a burst after an idle
+  period is spread out too. The head only moves by atomic increments,
+  so joins never wait on each other. Polling is plain arithmetic on the
+  token: joining and polling the queue only touch the cache.
+- An admission lasts `WaitingRoomConfig.ADMISSION_SECONDS` from the
+  visitor's own admission time.
+"""
+
+import math
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from rest_framework import exceptions, permissions
+
+from apps.slot import constants as slot_constants, models as slot_models
+
+
+class QueueRequired(exceptions.Throttled):
+    """
+    Raised when a hot slot is requested without an admitted queue token.
+    """
+
+    default_detail = slot_constants.ErrorMessage.QUEUE_REQUIRED
+    default_code = "queue_required"
+
+
+def _state_key(slot_id):
+    return f"waiting-room:{slot_id}"
+
+
+def _auto_hot_key(slot_id):
+    return f"waiting-room:{slot_id}:auto-hot"
+
+
+def _rate_key(slot_id, second):
+    return f"waiting-room:{slot_id}:requests:{second}"
+
+
+def _head_key(slot_id):
+    return f"waiting-room:{slot_id}:head"
+
+
+def _tail_key(slot_id):
+    return f"waiting-room:{slot_id}:tail"
+
+
+def set_slot_state(slot_id, is_hot, admission_rate):
+    """
+    Mirrors the admin settings of a slot into the cache.
+    """
+
+    cache.set(
+        _state_key(slot_id),
+        {
+            "hot": is_hot,
+            "rate": admission_rate or settings.WAITING_ROOM_ADMIT_PER_SECOND,
+        },
+        None,
+    )
+
+
+@receiver(post_save, sender=slot_models.Slot)
+def mirror_slot_state(sender, instance, **kwargs):
+    set_slot_state(instance.id, instance.is_hot, instance.admission_rate)
+
+
+def get_admission_rate(slot_id):
+    state = cache.get(_state_key(slot_id))
+    return state["rate"] if state else settings.WAITING_ROOM_ADMIT_PER_SECOND
+
+
+def is_hot(slot_id):
+    """
+    Returns whether the slot goes through the waiting room and counts
+    the request towards the automatic threshold.
+    """
+
+    values = cache.get_many([_state_key(slot_id), _auto_hot_key(slot_id)])
+    state = values.get(_state_key(slot_id))
+    if state is None:
+        # Evicted from the cache, mirrored again from the database
+        slot = (
+            slot_models.Slot.objects.filter(id=slot_id)
+            .values("is_hot", "admission_rate")
+            .first()
+        )
+        if slot is None:
+            return False
+        set_slot_state(slot_id, slot["is_hot"], slot["admission_rate"])
+        state = {"hot": slot["is_hot"]}
+
+    if state["hot"] or _auto_hot_key(slot_id) in values:
+        return True
+
+    rate_key = _rate_key(slot_id, int(time.time()))
+    cache.add(rate_key, 0, 2)
+    try:
+        requests = cache.incr(rate_key)
+    except ValueError:
+        # The counter expired between add and incr
+        return False
+
+    if requests > settings.WAITING_ROOM_HOT_REQUESTS_PER_SECOND:
+        cache.set(
+            _auto_hot_key(slot_id),
+            True,
+            slot_constants.WaitingRoomConfig.AUTO_HOT_SECONDS,
+        )
+        return True
+    return False
+
+
+def join(slot_id):
+    """
+    Puts a visitor at the end of the slot's queue.
+    Returns the queue token.
+    """
+
+    config = slot_constants.WaitingRoomConfig
+    # The head is the last admission time in milliseconds, only ever
+    # moved by atomic increments of at least one interval, so concurrent
+    # joins get distinct admission times an interval apart without a lock
+    interval = max(1, round(1000 / get_admission_rate(slot_id)))
+    now = math.floor(time.time() * 1000)
+
+    cache.add(_head_key(slot_id), now - interval, config.QUEUE_TIMEOUT)
+    admitted_at = cache.incr(_head_key(slot_id), interval)
+    if admitted_at < now:
+        # The queue was idle, the head catches up with the present
+        admitted_at = cache.incr(_head_key(slot_id), max(interval, now - admitted_at))
+    cache.add(_tail_key(slot_id), 0, config.QUEUE_TIMEOUT)
+    position = cache.incr(_tail_key(slot_id))
+
+    return signing.dumps(
+        {"slot": slot_id, "position": position, "admitted_at": admitted_at / 1000},
+        salt=config.TOKEN_SALT,
+    )
+
+
+def get_position(slot_id, token):
+    """
+    Returns the queue position of a token, how many visitors are still
+    ahead and the seconds until admission.
+    Raises `ValidationError` for tokens of another slot or expired ones.
+    """
+
+    config = slot_constants.WaitingRoomConfig
+    try:
+        payload = signing.loads(
+            token, salt=config.TOKEN_SALT, max_age=config.TOKEN_MAX_AGE_SECONDS
+        )
+    except signing.BadSignature:
+        payload = None
+
+    if payload is None or payload["slot"] != slot_id or "admitted_at" not in payload:
+        raise exceptions.ValidationError(
+            {config.TOKEN_PARAM: slot_constants.ErrorMessage.INVALID_QUEUE_TOKEN}
+        )
+
+    now = time.time()
+    admitted_at = payload["admitted_at"]
+
+    return {
+        "position": payload["position"],
+        # Visitors are admitted one per interval up to this one
+        "ahead": max(0, math.ceil((admitted_at - now) * get_admission_rate(slot_id))),
+        "eta_seconds": max(0, math.ceil(admitted_at - now)),
+        "admitted": admitted_at <= now,
+        "expired": now - admitted_at > config.ADMISSION_SECONDS,
+    }
+
+
+def check_admission(slot_id, token):
+    """
+    Raises `QueueRequired` when the slot is hot and `token` was not
+    admitted yet, or its admission has lapsed.
+    """
+
+    if not is_hot(slot_id):
+        return
+
+    if token is None:
+        raise QueueRequired()
+
+    position = get_position(slot_id, token)
+    if not position["admitted"] or position["expired"]:
+        raise QueueRequired(wait=position["eta_seconds"] or None)
+
+
+def get_token(request):
+    config = slot_constants.WaitingRoomConfig
+    return request.headers.get(config.TOKEN_HEADER) or request.query_params.get(
+        config.TOKEN_PARAM
+    )
+
+
+class AdmittedFromQueue(permissions.BasePermission):
+    """
+    Lets requests for a hot slot through only with an admitted queue
+    token. Views without a `slot_id` are not gated.
+    """
+
+    def has_permission(self, request, view):
+        slot_id = view.kwargs.get("slot_id")
+        if slot_id is not None:
+            check_admission(slot_id, get_token(request))
+        return True
@@ -4,7 +4,11 @@ from django.contrib.auth.password_validation import validate_password
 from rest_framework import exceptions, serializers
 
 from apps.user import constants as user_constants
-from apps.slot import models as slot_models
+from apps.slot import (
+    constants as slot_constants,
+    models as slot_models,
+    tickets as slot_tickets,
+)
 
 User = get_user_model()
 
@@ -75,10 +79,12 @@ class PurchaseHistorySerializer(serializers.ModelSerializer):
     - Detailed slot info
     - List of booked seats
     - Total booking price
+    - Signed e-ticket of active bookings
     """
 
     seats = serializers.SerializerMethodField()
     slot = serializers.SerializerMethodField()
+    ticket = serializers.SerializerMethodField()
 
     def get_seats(self, obj):
         return [
@@ -89,6 +95,13 @@ class PurchaseHistorySerializer(serializers.ModelSerializer):
             for seat in obj.seats.all()
         ]
 
+    def get_ticket(self, obj):
+        if obj.status != slot_constants.BookingStatus.BOOKED.value:
+            return None
+        return slot_tickets.issue_ticket(
+            obj.id, obj.slot_id, [seat.cinema_seat_id for seat in obj.seats.all()]
+        )
+
     def get_slot(self, obj):
         slot = obj.slot
         return [
@@ -104,4 +117,4 @@ class PurchaseHistorySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = slot_models.Booking
-        fields = ["id", "status", "created_at", "slot", "seats"]
+        fields = ["id", "status", "created_at", "slot", "seats", "ticket"]